@@ -1,29 +1,130 @@
 """
 This module contains a funtion to initialize the database connection to Supabase. The function
 contains error handling functionality on top of the database connection initialization to ensure
-that the connection is properly established.
+that the connection is properly established. It also contains functions to initialize the
+application's logging, the admission controller guarding the credit check route, the local
+audit log of the decisions, the capture of sampled requests and the transaction history, and the
+router sending each card to the same service instance.
 
 Functions:
+    init_logging: Function to route the application's logging through a background writer.
+    stop_logging: Function to write the pending log records and stop the background writer.
     init_db: Function to initialize the database connection to Supabase.
+    init_admission_controller: Function to initialize the admission controller from the environment.
+    init_audit_log: Function to initialize the local audit log of the decisions, if enabled.
+    init_traffic_capture: Function to initialize the capture of sampled requests, if enabled.
+    init_transaction_history: Function to initialize the lookup and export of the transactions,
+    if enabled.
+    init_card_router: Function to initialize the router of the credit checks to the instances.
 
 Dependencies:
+    - atexit: The atexit module for flushing the logs on shutdown.
     - logging: The logging module for logging messages.
     - os: The OS module for interacting with the operating system.
+    - queue: The queue module for handing log records to the background writer.
     - time: The time module for working with time-related functions.
-    - app.service.database_service: The service for interacting with the database.
+    - app.service.utility.structured_logging: The JSON formatter and rate limiting log filter.
+    - app.service.database_service: The service for interacting with the database, imported when
+    the connection is initialized.
+    - app.service.admission_control_service: The service for rate limiting and load shedding,
+    imported when the admission controller is initialized.
+    - app.service.audit_log_service: The service for the local audit log, imported when the audit
+    log is initialized.
+    - app.service.traffic_capture_service: The service for capturing requests, imported when the
+    capture is initialized.
+    - app.service.transaction_history_service: The service for the transaction history, imported
+    when it is initialized.
+    - httpx: The HTTP client of the router, imported when it is initialized.
+    - app.service.card_router_service: The router of the credit checks, imported when it is
+    initialized.
 """
 
+import atexit
 import logging
 import os
+import queue
 import time
-from .service.database_service import DataBaseService
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING
+from .service.utility.structured_logging import JsonFormatter, RateLimitFilter
 
+if TYPE_CHECKING:
+    from .service.database_service import DataBaseService
+    from .service.admission_control_service import AdmissionController
+    from .service.audit_log_service import AuditLog
+    from .service.traffic_capture_service import TrafficCapture
+    from .service.transaction_history_service import TransactionHistory
+    from .service.card_router_service import CardRouter
 
-def init_db() -> DataBaseService:
+_log_listener: QueueListener | None = None
+_log_rate_limit: RateLimitFilter | None = None
+
+
+def init_logging() -> None:
+    """
+    Function to route the application's logging through a queue drained by a background writer,
+    so that logging on the request path only enqueues the record. Records are written as JSON to
+    stderr, and repeated messages are rate limited to LOG_RATE_LIMIT_BURST records per
+    LOG_RATE_LIMIT_WINDOW_SECONDS before they are formatted or enqueued, with the number of
+    suppressed records reported on the next record let through, or in a summary record once the
+    window has closed. On shutdown, the pending suppressed counts are reported before the writer
+    stops.
+    """
+
+    global _log_listener, _log_rate_limit
+    if _log_listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    rate_limit = RateLimitFilter(
+        burst=int(os.getenv("LOG_RATE_LIMIT_BURST", "5")),
+        window_seconds=float(os.getenv("LOG_RATE_LIMIT_WINDOW_SECONDS", "10")),
+        report=queue_handler.emit,
+    )
+    queue_handler.addFilter(rate_limit)
+    rate_limit.start()
+    _log_rate_limit = rate_limit
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+    _log_listener = QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Function to report the pending suppressed counts of the rate limited messages, then stop the
+    background writer once it has written them and every record queued before them.
+    """
+
+    global _log_listener
+    if _log_listener is None:
+        return
+
+    _log_rate_limit.stop()
+    _log_listener.stop()
+    _log_listener = None
+
+
+def init_db() -> "DataBaseService":
     """
     Function to initialize the database connection to Supabase. The function contains error handling
     functionality on top of the database connection initialization to ensure that the connection is
-    properly established.
+    properly established. Read replicas for credit score lookups are read from SUPABASE_READ_URLS as
+    a comma-separated list of URLs. Setting DB_DECISION_MODE to "rpc" makes each decision a single
+    round trip through the check_credit_and_record_transaction database function. Secondary score
+    providers are enabled by SCORE_BUREAU_URL (with its score table in SCORE_BUREAU_TABLE) and by
+    SCORE_SNAPSHOT_PATH, a JSON file mapping card numbers to [score, duration] pairs. Setting
+    KNOWN_CARDS_FILTER to "on" keeps a Bloom filter of the card numbers in credit_scores, so that
+    cards without a score skip the database. SCORE_CACHE_L2_URL enables the score cache shared
+    over the Redis protocol.
 
     Returns:
         DataBaseService: The database service object for interacting with the database.
@@ -32,6 +133,8 @@ def init_db() -> DataBaseService:
         ConnectionError: An error occurred when initializing the connection to Supabase.
     """
 
+    from .service.database_service import DataBaseService
+
     max_retries = 5
     delay_seconds = 5
 
@@ -41,6 +144,17 @@ def init_db() -> DataBaseService:
             db_service = DataBaseService(
                 os.getenv("SUPABASE_URL", "supabase"),
                 os.getenv("SUPABASE_KEY", "supabase"),
+                read_urls=[
+                    read_url.strip()
+                    for read_url in os.getenv("SUPABASE_READ_URLS", "").split(",")
+                    if read_url.strip()
+                ],
+                use_rpc=os.getenv("DB_DECISION_MODE", "two_call") == "rpc",
+                bureau_url=os.getenv("SCORE_BUREAU_URL") or None,
+                bureau_table=os.getenv("SCORE_BUREAU_TABLE", "credit_scores"),
+                score_snapshot_path=os.getenv("SCORE_SNAPSHOT_PATH") or None,
+                known_cards_filter=os.getenv("KNOWN_CARDS_FILTER", "off") == "on",
+                score_cache_url=os.getenv("SCORE_CACHE_L2_URL") or None,
             )
             logging.info("[DB INIT] Connection successful!")
             break
@@ -57,3 +171,168 @@ def init_db() -> DataBaseService:
             time.sleep(delay_seconds)
 
     return db_service
+
+
+def init_admission_controller() -> "AdmissionController":
+    """
+    Function to initialize the admission controller for the credit check route. Per-client rate
+    overrides are read from RATE_LIMIT_CLIENT_OVERRIDES as a comma-separated list of
+    "client:rate:burst" entries, where client is a client label or IP address. Only the API keys
+    listed in TRUSTED_API_KEYS, a comma-separated list of "label:key" entries, identify a client,
+    by its label; requests without one are rate limited by IP address.
+
+    Returns:
+        AdmissionController: The admission controller guarding the credit check route.
+    """
+
+    from .service.admission_control_service import AdmissionController
+
+    client_overrides: dict[str, tuple[float, float]] = {}
+    for entry in os.getenv("RATE_LIMIT_CLIENT_OVERRIDES", "").split(","):
+        if not entry.strip():
+            continue
+        client_id, rate, burst = entry.strip().rsplit(":", 2)
+        client_overrides[client_id] = (float(rate), float(burst))
+
+    trusted_api_keys: dict[str, str] = {}
+    for entry in os.getenv("TRUSTED_API_KEYS", "").split(","):
+        if not entry.strip():
+            continue
+        label, key = entry.strip().split(":", 1)
+        trusted_api_keys[key] = label
+
+    return AdmissionController(
+        default_rate=float(os.getenv("RATE_LIMIT_REQUESTS_PER_SECOND", "20")),
+        default_burst=float(os.getenv("RATE_LIMIT_BURST", "40")),
+        max_in_flight=int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "64")),
+        client_overrides=client_overrides,
+        trusted_api_keys=trusted_api_keys,
+        max_tracked_clients=int(os.getenv("RATE_LIMIT_MAX_TRACKED_CLIENTS", "10000")),
+        overload_retry_after=int(os.getenv("OVERLOAD_RETRY_AFTER_SECONDS", "1")),
+    )
+
+
+def init_audit_log() -> "AuditLog | None":
+    """
+    Function to initialize the local audit log of the credit approval decisions in AUDIT_LOG_DIR.
+    The buffer is flushed every AUDIT_LOG_FLUSH_SECONDS, or earlier once it holds
+    AUDIT_LOG_MAX_BUFFER_BYTES. The audit log is disabled when AUDIT_LOG_DIR is not set.
+
+    Returns:
+        AuditLog | None: The audit log, or None if it is disabled.
+    """
+
+    directory = os.getenv("AUDIT_LOG_DIR", "")
+    if not directory:
+        return None
+
+    from .service.audit_log_service import AuditLog
+
+    return AuditLog(
+        directory,
+        flush_seconds=float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "1")),
+        max_buffer_bytes=int(os.getenv("AUDIT_LOG_MAX_BUFFER_BYTES", str(1 << 20))),
+    )
+
+
+def init_traffic_capture() -> "TrafficCapture | None":
+    """
+    Function to initialize the capture of a TRAFFIC_CAPTURE_SAMPLE_RATE fraction of the credit
+    check requests to JSON lines files in TRAFFIC_CAPTURE_DIR, started anew every
+    TRAFFIC_CAPTURE_MAX_FILE_BYTES. Card numbers and API keys are tokenized with
+    TRAFFIC_CAPTURE_TOKEN_KEY; without it, a random key is used and tokens differ between
+    processes. The capture is disabled when TRAFFIC_CAPTURE_DIR is not set.
+
+    Returns:
+        TrafficCapture | None: The traffic capture, or None if it is disabled.
+    """
+
+    directory = os.getenv("TRAFFIC_CAPTURE_DIR", "")
+    if not directory:
+        return None
+
+    from .service.traffic_capture_service import TrafficCapture
+
+    token_key = os.getenv("TRAFFIC_CAPTURE_TOKEN_KEY", "")
+    if not token_key:
+        logging.warning("TRAFFIC_CAPTURE_TOKEN_KEY is not set, tokens are only stable per process")
+
+    return TrafficCapture(
+        directory,
+        sample_rate=float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "0.01")),
+        token_key=token_key.encode() if token_key else os.urandom(32),
+        max_file_bytes=int(os.getenv("TRAFFIC_CAPTURE_MAX_FILE_BYTES", str(64 << 20))),
+        max_queue=int(os.getenv("TRAFFIC_CAPTURE_MAX_QUEUE", "10000")),
+    )
+
+
+def init_transaction_history(db_service: "DataBaseService") -> "TransactionHistory | None":
+    """
+    Function to initialize the lookup and export of the transactions recorded in the database,
+    for the requests presenting TRANSACTION_HISTORY_ADMIN_TOKEN. Exports query
+    TRANSACTION_EXPORT_PAGE_SIZE transactions per page, and the first page of each card's history
+    is cached for TRANSACTION_HISTORY_CACHE_TTL_SECONDS, in a cache of
+    TRANSACTION_HISTORY_CACHE_MAX_ENTRIES pages, 0 to disable it. The transaction history is
+    disabled when TRANSACTION_HISTORY_ADMIN_TOKEN is not set.
+
+    Parameters:
+        db_service (DataBaseService): The database service querying the transactions.
+
+    Returns:
+        TransactionHistory | None: The transaction history, or None if it is disabled.
+    """
+
+    admin_token = os.getenv("TRANSACTION_HISTORY_ADMIN_TOKEN", "")
+    if not admin_token:
+        return None
+
+    from .service.transaction_history_service import TransactionHistory
+
+    return TransactionHistory(
+        db_service.query_card_transactions,
+        db_service.query_transactions_in_range,
+        admin_token,
+        export_page_size=int(os.getenv("TRANSACTION_EXPORT_PAGE_SIZE", "1000")),
+        cache_max_entries=int(os.getenv("TRANSACTION_HISTORY_CACHE_MAX_ENTRIES", "10000")),
+        cache_ttl_seconds=float(os.getenv("TRANSACTION_HISTORY_CACHE_TTL_SECONDS", "5")),
+    )
+
+
+def init_card_router() -> "CardRouter":
+    """
+    Function to initialize the router of the credit checks to the service instances listed in
+    ROUTER_UPSTREAMS, a comma-separated list of URLs. Each instance is placed on the hash ring at
+    ROUTER_VIRTUAL_NODES points, and may serve up to ROUTER_LOAD_FACTOR times the average number
+    of in-flight requests before cards are passed on to the next instance. Forwarded requests time
+    out after ROUTER_TIMEOUT_SECONDS, and an instance failing ROUTER_MAX_CONSECUTIVE_ERRORS
+    requests in a row is taken off the ring for ROUTER_EJECTION_SECONDS.
+
+    Returns:
+        CardRouter: The router of the credit checks.
+
+    Raises:
+        ValueError: ROUTER_UPSTREAMS is not set.
+    """
+
+    import httpx
+    from .service.card_router_service import CardRouter
+    from .service.utility.consistent_hash import ConsistentHashRing
+
+    upstreams = tuple(
+        upstream.strip().rstrip("/")
+        for upstream in os.getenv("ROUTER_UPSTREAMS", "").split(",")
+        if upstream.strip()
+    )
+    if not upstreams:
+        raise ValueError("ROUTER_UPSTREAMS must list at least one upstream URL")
+
+    return CardRouter(
+        ConsistentHashRing(
+            upstreams,
+            virtual_nodes=int(os.getenv("ROUTER_VIRTUAL_NODES", "160")),
+            load_factor=float(os.getenv("ROUTER_LOAD_FACTOR", "1.25")),
+        ),
+        httpx.AsyncClient(timeout=float(os.getenv("ROUTER_TIMEOUT_SECONDS", "10"))),
+        max_consecutive_errors=int(os.getenv("ROUTER_MAX_CONSECUTIVE_ERRORS", "3")),
+        ejection_seconds=float(os.getenv("ROUTER_EJECTION_SECONDS", "30")),
+    )
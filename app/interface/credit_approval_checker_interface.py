@@ -2,6 +2,8 @@
 This module contains the check_credit_approval_request_result function which is responsible for
 serving as the interface for the credit approval checker. It checks the credit approval request
 result based on the credit score and duration from the database, and the credit approval request.
+It also exposes the legal age check and the credit tier criteria on their own, for decisions that
+are evaluated by the database, and the lookup of the credit tier of a score.
 
 Dependencies:
     - datetime: The datetime module from the Python standard library.
@@ -44,3 +46,45 @@ def get_credit_approval_request_result(
 
     # Step 2: Deny the user if they do not meet the approval criteria
     return False
+
+
+def is_creditee_of_legal_age(date_of_birth: datetime.date) -> bool:
+    """
+    This function checks if the creditee is of legal age, independently of their credit score.
+
+    Parameters:
+        date_of_birth (datetime.date): The date of birth of the creditee.
+    """
+    return CreditApprovalChecker.is_creditee_is_of_legal_age(date_of_birth)
+
+
+def get_credit_tier_criteria() -> list[dict]:
+    """
+    This function returns the approval criteria of each credit tier as a flat list, in the shape
+    expected by the check_credit_and_record_transaction database function.
+
+    Returns:
+        list[dict]: The minimum score, maximum score and minimum duration of each credit tier.
+    """
+    return [
+        {
+            "min_score": criteria["range"][0],
+            "max_score": criteria["range"][1],
+            "min_duration": criteria["min_duration"],
+        }
+        for criteria in CreditApprovalChecker.get_credit_criteria().values()
+    ]
+
+
+def get_credit_tier(credit_score: int) -> str:
+    """
+    This function returns the name of the credit tier of a credit score, or "unrated" if the score
+    is outside every tier.
+
+    Parameters:
+        credit_score (int): The credit score of the creditee.
+
+    Returns:
+        str: The name of the credit tier.
+    """
+    return CreditApprovalChecker.get_credit_tier(credit_score) or "unrated"
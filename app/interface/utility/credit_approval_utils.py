@@ -27,6 +27,8 @@ class CreditApprovalChecker:
         request.
         is_credit_score_and_credit_duration_within_approval_limits: Checks if the credit score and
         credit duration are within the approval limits.
+        get_credit_criteria: Build the approval criteria for each credit tier.
+        get_credit_tier: Find the credit tier of a credit score.
     """
 
     @staticmethod
@@ -65,7 +67,29 @@ class CreditApprovalChecker:
             bool: True if the user is approved, False otherwise.
         """
 
-        credit_criteria: dict = {
+        credit_criteria: dict = CreditApprovalChecker.get_credit_criteria()
+
+        for criteria in credit_criteria.values():
+            score_min, score_max = criteria["range"]
+            if (
+                score_min <= credit_score <= score_max
+                and credit_duration >= criteria["min_duration"]
+            ):
+                return True
+
+        return False
+
+    @staticmethod
+    def get_credit_criteria() -> dict:
+        """
+        Build the approval criteria for each credit tier: the credit score range of the tier and
+        the minimum credit duration required within it.
+
+        Returns:
+            dict: The score range and minimum duration of each credit tier, keyed by tier name.
+        """
+
+        return {
             "poor": {
                 "range": (
                     int(os.getenv("POOR_CREDIT_MIN", "300")),
@@ -110,12 +134,21 @@ class CreditApprovalChecker:
             },
         }
 
-        for criteria in credit_criteria.values():
+    @staticmethod
+    def get_credit_tier(credit_score: int) -> str | None:
+        """
+        Find the credit tier whose score range contains the credit score.
+
+        Parameters:
+            credit_score(int): The credit score of the user.
+
+        Returns:
+            str | None: The name of the credit tier, or None if no tier contains the score.
+        """
+
+        for tier, criteria in CreditApprovalChecker.get_credit_criteria().items():
             score_min, score_max = criteria["range"]
-            if (
-                score_min <= credit_score <= score_max
-                and credit_duration >= criteria["min_duration"]
-            ):
-                return True
+            if score_min <= credit_score <= score_max:
+                return tier
 
-        return False
+        return None
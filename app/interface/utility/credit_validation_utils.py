@@ -8,11 +8,13 @@ Classes:
 
 Dependencies:
     - datetime: The module supplies classes for manipulating dates and times.
+    - CardValidationErrors: The flags of the card validation errors.
 """
 
 import logging
 import datetime
 import os
+from app.model.card_validation_errors import CardValidationErrors
 
 
 class CreditCardValidator:
@@ -29,10 +31,10 @@ class CreditCardValidator:
     """
 
     @staticmethod
-    def get_card_number_length_errors(credit_card_number: str) -> str:
+    def get_card_number_length_errors(credit_card_number: str) -> CardValidationErrors:
         """
-        Validates the length of the credit card number to be between 16 and 19 digits, and appends
-        the errors to the credit approval request if the length is invalid.
+        Validates the length of the credit card number to be between 16 and 19 digits, and returns
+        the error flag if the length is invalid.
 
         Parameters:
             credit_card_number (str): The credit card number to validate.
@@ -42,17 +44,17 @@ class CreditCardValidator:
             <= len(credit_card_number)
             <= int(os.getenv("MAXIMUM_CREDIT_CARD_NUMBER_LENGTH", "19"))
         ):
-            return f"Card number must be between {os.getenv("MINIMUM_CREDIT_CARD_NUMBER_LENGTH")} and {os.getenv("MAXIMUM_CREDIT_CARD_NUMBER_LENGTH")} digits; "
+            return CardValidationErrors.CARD_NUMBER_LENGTH
 
-        return ""
+        return CardValidationErrors(0)
 
     @staticmethod
     def get_cvv_length_errors(
         cvv: str,
-    ) -> str:
+    ) -> CardValidationErrors:
         """
-        Validates the length of the CVV to be between 3 and 4 digits, and appends the errors to the
-        credit approval request if the length is invalid.
+        Validates the length of the CVV to be between 3 and 4 digits, and returns the error flag if
+        the length is invalid.
 
         Parameters:
             cvv (str): The CVV number to validate.
@@ -62,33 +64,33 @@ class CreditCardValidator:
             <= len(cvv)
             <= int(os.getenv("MAXIMUM_CREDIT_CARD_CVV_LENGTH", "4"))
         ):
-            return f"CVV must be {os.getenv('MINIMUM_CREDIT_CARD_CVV_LENGTH')} or {os.getenv('MAXIMUM_CREDIT_CARD_CVV_LENGTH')} digits; "
+            return CardValidationErrors.CVV_LENGTH
 
-        return ""
+        return CardValidationErrors(0)
 
     @staticmethod
     def get_card_expired_errors(
         expiration_date: datetime.date,
-    ) -> str:
+    ) -> CardValidationErrors:
         """
-        Validates the expiration date of the credit card to be in the future, and appends the errors
-        to the credit approval request if the card is expired.
+        Validates the expiration date of the credit card to be in the future, and returns the error
+        flag if the card is expired.
 
         Parameters:
             expiration_date (datetime.date): The expiration date to validate.
         """
         if expiration_date < datetime.date.today():
-            return "Card is expired; "
+            return CardValidationErrors.CARD_EXPIRED
 
-        return ""
+        return CardValidationErrors(0)
 
     @staticmethod
     def get_card_issuer_errors(
         credit_card_issuer: str,
-    ) -> str:
+    ) -> CardValidationErrors:
         """
-        Validates the credit card issuer to be Visa, MasterCard, or American Express, and appends
-        the errors to the credit approval request if the issuer is invalid.
+        Validates the credit card issuer to be Visa, MasterCard, or American Express, and returns
+        the error flag if the issuer is invalid.
 
         Parameters:
             credit_card_issuer (str): The credit card issuer to validate.
@@ -98,9 +100,9 @@ class CreditCardValidator:
             "mastercard",
             "american express",
         ]:
-            return "Invalid credit card issuer type; "
+            return CardValidationErrors.CARD_ISSUER
 
-        return ""
+        return CardValidationErrors(0)
 
     @staticmethod
     def _separate_digits_by_position(
@@ -168,7 +170,7 @@ class CreditCardValidator:
     @staticmethod
     def get_luhn_validation_errors(
         credit_card_number: str,
-    ) -> str:
+    ) -> CardValidationErrors:
         """
         Perform the Luhn algorithm check on the credit card number of the credit approval request.
 
@@ -176,15 +178,15 @@ class CreditCardValidator:
             credit_card_number (str): The credit card number to validate.
 
         Returns:
-            bool: True if the credit card number is valid according to the Luhn algorithm, False
-                otherwise.
+            CardValidationErrors: No flag if the credit card number is valid according to the Luhn
+                algorithm, otherwise the flag of the failed check.
         """
         if not isinstance(credit_card_number, str):
             logging.error(
                 "Invalid type for credit_card_number: Expected str, got %s",
                 type(credit_card_number).__name__,
             )
-            return "Invalid credit card number type; "
+            return CardValidationErrors.CARD_NUMBER_TYPE
 
         odd_digits: list
         even_digits: list
@@ -200,6 +202,6 @@ class CreditCardValidator:
         if (sum(odd_digits) + sum(reduced_even_digits)) % int(
             os.getenv("LUHN_MODULUS", "10")
         ) != 0:
-            return "Invalid credit card number; "
+            return CardValidationErrors.CARD_NUMBER_LUHN
 
-        return ""
+        return CardValidationErrors(0)
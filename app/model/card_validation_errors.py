@@ -0,0 +1,80 @@
+"""
+This module contains the CardValidationErrors class which is responsible for representing the card
+validation errors of a credit approval request as a bitmask. The validators each return a flag,
+the flags are combined into a single integer that is stored in the transactions table, and the
+human-readable message is only rendered when the errors are returned to the client.
+
+Classes:
+    CardValidationErrors
+
+Dependencies:
+    - enum: The enum module for the integer flags.
+    - os: The OS module for the length bounds shown in the messages.
+"""
+
+import enum
+import os
+
+
+class CardValidationErrors(enum.IntFlag):
+    """
+    A class to represent the card validation errors of a credit approval request. The flags are
+    declared in the order the validations run, which is the order of their messages.
+
+    Attributes:
+        CARD_NUMBER_LENGTH: The card number is too short or too long.
+        CVV_LENGTH: The CVV is too short or too long.
+        CARD_EXPIRED: The card is expired.
+        CARD_ISSUER: The card issuer is not supported.
+        CARD_NUMBER_TYPE: The card number is not a string.
+        CARD_NUMBER_LUHN: The card number fails the Luhn check.
+
+    Methods:
+        get_messages: Return the message of each error.
+        get_detail: Return the messages of the errors as a single string.
+    """
+
+    CARD_NUMBER_LENGTH = 1
+    CVV_LENGTH = 2
+    CARD_EXPIRED = 4
+    CARD_ISSUER = 8
+    CARD_NUMBER_TYPE = 16
+    CARD_NUMBER_LUHN = 32
+
+    def get_messages(self) -> list[str]:
+        """
+        Return the human-readable message of each error, in the order the validations run.
+
+        Returns:
+            list[str]: The messages of the errors.
+        """
+        messages = []
+        for error in self:
+            if error is CardValidationErrors.CARD_NUMBER_LENGTH:
+                messages.append(
+                    f"Card number must be between {os.getenv('MINIMUM_CREDIT_CARD_NUMBER_LENGTH')}"
+                    f" and {os.getenv('MAXIMUM_CREDIT_CARD_NUMBER_LENGTH')} digits"
+                )
+            elif error is CardValidationErrors.CVV_LENGTH:
+                messages.append(
+                    f"CVV must be {os.getenv('MINIMUM_CREDIT_CARD_CVV_LENGTH')} or "
+                    f"{os.getenv('MAXIMUM_CREDIT_CARD_CVV_LENGTH')} digits"
+                )
+            elif error is CardValidationErrors.CARD_EXPIRED:
+                messages.append("Card is expired")
+            elif error is CardValidationErrors.CARD_ISSUER:
+                messages.append("Invalid credit card issuer type")
+            elif error is CardValidationErrors.CARD_NUMBER_TYPE:
+                messages.append("Invalid credit card number type")
+            else:
+                messages.append("Invalid credit card number")
+        return messages
+
+    def get_detail(self) -> str:
+        """
+        Return the messages of the errors as the detail of a 400 response, each ending with "; ".
+
+        Returns:
+            str: The detail of the errors, or an empty string if there are none.
+        """
+        return "".join(f"{message}; " for message in self.get_messages())
@@ -8,10 +8,12 @@ Classes:
 Dependencies:
     - datetime: The datetime module from the Python standard library.
     - typing: The typing module provides runtime support for type hints.
+    - CardValidationErrors: The flags of the card validation errors.
 """
 
 import datetime
 from typing import Any
+from app.model.card_validation_errors import CardValidationErrors
 
 
 class CreditApprovalResponse:
@@ -25,11 +27,17 @@ class CreditApprovalResponse:
         date_of_birth (datetime.date): The date of birth of the user for whom the credit approval is
         requested.
         is_approved (bool): A flag indicating if the credit approval request was approved.
-        errors (str): A string containing any errors that occurred during the credit approval
-        process.
+        errors (CardValidationErrors): The flags of the card validation errors of the credit
+        approval request.
         response (str): A string containing the response from the credit approval service.
         credit_card_number (str): The credit card number of the user for whom the credit approval is
         requested.
+        credit_tier (str): The credit tier of the user's credit score, or an empty string if the
+        decision did not depend on the credit score.
+        credit_score (int): The credit score the decision was made with, or -1 if the decision did
+        not depend on the credit score.
+        credit_duration (int): The credit duration the decision was made with, or -1 if the
+        decision did not depend on the credit score.
     """
 
     def __init__(
@@ -37,17 +45,23 @@ class CreditApprovalResponse:
         is_existing_customer: bool,
         date_of_birth: datetime.date,
         is_approved: bool,
-        errors: str = "",
+        errors: CardValidationErrors = CardValidationErrors(0),
         response: str = "",
         credit_card_number: str = "",
+        credit_tier: str = "",
+        credit_score: int = -1,
+        credit_duration: int = -1,
     ):
         # Field validation
         self._validate_type("is_existing_customer", is_existing_customer, bool)
         self._validate_type("date_of_birth", date_of_birth, datetime.date)
         self._validate_type("is_approved", is_approved, bool)
-        self._validate_type("errors", errors, str)
+        self._validate_type("errors", errors, CardValidationErrors)
         self._validate_type("response", response, str)
         self._validate_type("credit_card_number", credit_card_number, str)
+        self._validate_type("credit_tier", credit_tier, str)
+        self._validate_type("credit_score", credit_score, int)
+        self._validate_type("credit_duration", credit_duration, int)
 
         # Assign attributes after validation
         self.is_existing_customer = is_existing_customer
@@ -56,6 +70,9 @@ class CreditApprovalResponse:
         self.errors = errors
         self.response = response
         self.credit_card_number = credit_card_number
+        self.credit_tier = credit_tier
+        self.credit_score = credit_score
+        self.credit_duration = credit_duration
 
     def _validate_type(self, field_name: str, value: Any, expected_type: type) -> None:
         """Helper function to validate types."""
@@ -0,0 +1,109 @@
+"""
+This module contains the RequestDeadline class which is responsible for representing the time budget
+of a single credit approval request. The deadline is carried through the credit check pipeline so
+that database calls only get the remaining budget, and expired requests can be abandoned.
+
+The time budget a client asks for in its X-Request-Timeout header must be a finite number of
+seconds greater than zero, and is clamped to [REQUEST_TIMEOUT_MIN_SECONDS,
+REQUEST_TIMEOUT_MAX_SECONDS], so that a client cannot ask for a budget too short for any database
+call to complete, or hold a slot for an unbounded time.
+
+Classes:
+    RequestDeadline
+
+Types:
+    RequestTimeout: The validated type of the X-Request-Timeout header.
+
+Dependencies:
+    - os: The OS module for interacting with the operating system.
+    - time: The time module for working with time-related functions.
+    - pydantic: The pydantic module for the constraints of the X-Request-Timeout header.
+"""
+
+import os
+import time
+from typing import Annotated
+from pydantic import Field
+
+# The X-Request-Timeout header, shared by the FastAPI route and the fast path so that both reject
+# the same values with the same validation errors
+RequestTimeout = Annotated[float, Field(gt=0, allow_inf_nan=False)]
+
+
+class RequestDeadline:
+    """
+    A class to represent the deadline of a single credit approval request, measured on the
+    monotonic clock.
+
+    Attributes:
+        expires_at (float): The monotonic timestamp after which the request is expired.
+
+    Methods:
+        from_timeout: Create a deadline a number of seconds from now.
+        from_request_timeout: Create the deadline of a request from its X-Request-Timeout header.
+        remaining: The number of seconds left before the deadline.
+        is_expired: Check if the deadline has passed.
+    """
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float) -> None:
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_timeout(cls, timeout_seconds: float) -> "RequestDeadline":
+        """
+        Create a deadline a number of seconds from now.
+
+        Parameters:
+            timeout_seconds (float): The time budget of the request in seconds.
+
+        Returns:
+            RequestDeadline: The deadline of the request.
+        """
+        return cls(time.monotonic() + timeout_seconds)
+
+    @classmethod
+    def from_request_timeout(cls, request_timeout: float | None) -> "RequestDeadline":
+        """
+        Create the deadline of a request from the validated time budget of its X-Request-Timeout
+        header, falling back to REQUEST_TIMEOUT_SECONDS, and clamped to
+        [REQUEST_TIMEOUT_MIN_SECONDS, REQUEST_TIMEOUT_MAX_SECONDS].
+
+        Parameters:
+            request_timeout (float | None): The time budget the client is willing to wait, or
+            None if the header is missing.
+
+        Returns:
+            RequestDeadline: The deadline of the request.
+        """
+        if request_timeout is None:
+            request_timeout = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "5"))
+        return cls.from_timeout(
+            min(
+                max(request_timeout, float(os.getenv("REQUEST_TIMEOUT_MIN_SECONDS", "0.5"))),
+                float(os.getenv("REQUEST_TIMEOUT_MAX_SECONDS", "30")),
+            )
+        )
+
+    def remaining(self, reserve: float = 0.0) -> float:
+        """
+        The number of seconds left before the deadline, never negative.
+
+        Parameters:
+            reserve (float): Seconds held back for the work that must still happen after the call
+            being budgeted.
+
+        Returns:
+            float: The remaining time budget in seconds.
+        """
+        return max(0.0, self.expires_at - time.monotonic() - reserve)
+
+    def is_expired(self) -> bool:
+        """
+        Check if the deadline has passed.
+
+        Returns:
+            bool: True if the deadline has passed, False otherwise.
+        """
+        return time.monotonic() >= self.expires_at
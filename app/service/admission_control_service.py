@@ -0,0 +1,181 @@
+"""
+This module contains the AdmissionController class which is responsible for deciding whether an
+incoming credit check request may proceed. Each client (allowed API key or IP address) has its own
+token bucket, and the total number of requests in flight is capped globally. Rejected requests are
+shed with an HTTP error and a Retry-After header before any database work starts.
+
+The X-API-Key header is not authenticated, so only the keys of a configured allow-list identify a
+client; a request with any other key is counted against its IP address, which keeps callers from
+escaping their limit by rotating keys or from evicting other clients with throwaway keys. Each
+allowed key is given a client label, and clients are tracked and reported by that label, so the
+keys themselves never appear in the counters.
+
+Classes:
+    AdmissionController
+
+Dependencies:
+    - math: The math module for rounding the Retry-After value.
+    - threading: The threading module for guarding shared state.
+    - collections: The collections module for the least recently used client table.
+    - HTTPException: The exception class for handling HTTP errors.
+    - TokenBucket: The class representing a single client's token bucket.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from fastapi import HTTPException
+from app.service.utility.token_bucket import TokenBucket
+
+
+class AdmissionController:
+    """
+    This class is responsible for admission control in front of the credit check route. It keeps a
+    token bucket and admitted/rejected counters per client, and caps the number of requests in
+    flight across all clients.
+
+    Attributes:
+        default_rate (float): The default number of requests per second allowed per client.
+        default_burst (float): The default burst size allowed per client.
+        max_in_flight (int): The maximum number of requests admitted at the same time.
+        client_overrides (dict): Per-client (rate, burst) tuples overriding the defaults.
+        trusted_api_keys (dict[str, str]): The client label of each API key identifying a client,
+        any other key is ignored in favor of the IP address.
+        max_tracked_clients (int): The maximum number of clients kept in memory.
+        overload_retry_after (int): The Retry-After value in seconds sent when overloaded.
+
+    Methods:
+        get_client_id: Return the identity a request is rate limited by.
+        admit: Admit a request for the client or raise an HTTPException.
+        release: Release the in-flight slot taken by an admitted request.
+        get_counters: Return the admission counters for each client.
+    """
+
+    def __init__(
+        self,
+        default_rate: float,
+        default_burst: float,
+        max_in_flight: int,
+        client_overrides: dict[str, tuple[float, float]] | None = None,
+        trusted_api_keys: dict[str, str] | None = None,
+        max_tracked_clients: int = 10000,
+        overload_retry_after: int = 1,
+    ) -> None:
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.max_in_flight = max_in_flight
+        self.client_overrides = client_overrides or {}
+        self.trusted_api_keys = trusted_api_keys or {}
+        self.max_tracked_clients = max_tracked_clients
+        self.overload_retry_after = overload_retry_after
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._clients: OrderedDict[str, tuple[TokenBucket, dict[str, int]]] = (
+            OrderedDict()
+        )
+
+    def _get_client(self, client_id: str) -> tuple[TokenBucket, dict[str, int]]:
+        """
+        Return the token bucket and counters of the client, creating them if needed and evicting
+        the least recently seen client when the table is full. Must be called with the lock held.
+
+        Parameters:
+            client_id (str): The client label or IP address of the client.
+
+        Returns:
+            tuple: The token bucket and the counters of the client.
+        """
+        client = self._clients.get(client_id)
+        if client is not None:
+            self._clients.move_to_end(client_id)
+            return client
+
+        rate, burst = self.client_overrides.get(
+            client_id, (self.default_rate, self.default_burst)
+        )
+        client = (
+            TokenBucket(rate, burst),
+            {"admitted": 0, "rate_limited": 0, "overloaded": 0},
+        )
+        self._clients[client_id] = client
+        if len(self._clients) > self.max_tracked_clients:
+            self._clients.popitem(last=False)
+
+        return client
+
+    def get_client_id(self, api_key: str | None, client_host: str | None) -> str:
+        """
+        Return the identity a request is rate limited by: the client label of its API key if the
+        key is on the allow-list, otherwise the IP address of the client.
+
+        Parameters:
+            api_key (str | None): The X-API-Key header of the request, if any.
+            client_host (str | None): The IP address of the client, if known.
+
+        Returns:
+            str: The client label or IP address of the client, or "unknown".
+        """
+        if api_key:
+            label = self.trusted_api_keys.get(api_key)
+            if label is not None:
+                return label
+        return client_host or "unknown"
+
+    def admit(self, client_id: str) -> None:
+        """
+        Admit a request for the client. Raises an HTTPException with status 503 when the global
+        in-flight cap is reached, or 429 when the client has exhausted its token bucket. Every
+        admitted request must be followed by a call to release.
+
+        Parameters:
+            client_id (str): The client label or IP address of the client.
+
+        Raises:
+            HTTPException: The request was shed because of overload or rate limiting.
+        """
+        with self._lock:
+            bucket, counters = self._get_client(client_id)
+
+            if self._in_flight >= self.max_in_flight:
+                counters["overloaded"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Service overloaded, please retry later",
+                    headers={"Retry-After": str(self.overload_retry_after)},
+                )
+
+            wait_seconds = bucket.try_acquire()
+            if wait_seconds > 0:
+                counters["rate_limited"] += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Rate limit exceeded, please retry later",
+                    headers={"Retry-After": str(math.ceil(wait_seconds))},
+                )
+
+            counters["admitted"] += 1
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """Release the in-flight slot taken by an admitted request."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def get_counters(self) -> dict:
+        """
+        Return the admission counters for each tracked client, along with the number of requests
+        currently in flight.
+
+        Returns:
+            dict: The in-flight count and the admitted/rejected counters per client.
+        """
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "clients": {
+                    client_id: dict(counters)
+                    for client_id, (_, counters) in self._clients.items()
+                },
+            }
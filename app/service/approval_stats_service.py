@@ -0,0 +1,79 @@
+"""
+This module contains the ApprovalStats class which is responsible for keeping rolling aggregates of
+the credit approval decisions made by the service: approvals and denials, the count of each card
+validation error, and the outcomes of each credit tier, over several sliding time windows. The
+aggregates are kept in fixed-memory ring buffers and updated as decisions are made, so that they
+can be served without querying the transactions table.
+
+Classes:
+    ApprovalStats
+
+Dependencies:
+    - SlidingWindowCounter: The class counting events over a sliding time window.
+    - CardValidationErrors: The flags of the card validation errors.
+"""
+
+from app.model.card_validation_errors import CardValidationErrors
+from app.service.utility.sliding_window_counter import SlidingWindowCounter
+
+
+class ApprovalStats:
+    """
+    This class is responsible for the rolling aggregates of the credit approval decisions.
+
+    Attributes:
+        windows (dict[str, SlidingWindowCounter]): The counter of each window, keyed by its label.
+
+    Methods:
+        record: Record a credit approval decision.
+        get_stats: Return the aggregates of each window.
+    """
+
+    def __init__(self, window_seconds: list[float], bucket_count: int = 60) -> None:
+        self.windows = {
+            f"{seconds:g}s": SlidingWindowCounter(seconds, bucket_count)
+            for seconds in window_seconds
+        }
+
+    def record(self, is_approved: bool, errors: CardValidationErrors, credit_tier: str) -> None:
+        """
+        Record a credit approval decision in every window.
+
+        Parameters:
+            is_approved (bool): A boolean indicating if the request was approved.
+            errors (CardValidationErrors): The card validation errors of the request.
+            credit_tier (str): The credit tier of the creditee's score, or "" if the decision did
+            not depend on the score.
+        """
+        outcome = "approved" if is_approved else "denied"
+        keys = [("outcome", outcome), ("tier", credit_tier or "unscored", outcome)]
+        keys.extend(("error", error) for error in errors)
+
+        for counter in self.windows.values():
+            counter.add(keys)
+
+    def get_stats(self) -> dict[str, dict]:
+        """
+        Return the aggregates of each window: the approvals and denials, the approval rate, the
+        count of each card validation error by its message, and the approvals and denials of each
+        credit tier.
+
+        Returns:
+            dict[str, dict]: The aggregates of each window, keyed by its label.
+        """
+        stats = {}
+        for label, counter in self.windows.items():
+            window: dict = {"approved": 0, "denied": 0, "errors": {}, "tiers": {}}
+            for key, count in counter.get_counts().items():
+                if key[0] == "outcome":
+                    window[key[1]] = count
+                elif key[0] == "error":
+                    window["errors"][key[1].get_messages()[0]] = count
+                else:
+                    tier = window["tiers"].setdefault(key[1], {"approved": 0, "denied": 0})
+                    tier[key[2]] = count
+
+            decisions = window["approved"] + window["denied"]
+            window["approval_rate"] = window["approved"] / decisions if decisions else 0.0
+            stats[label] = window
+        return stats
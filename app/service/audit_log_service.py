@@ -0,0 +1,418 @@
+"""
+This module contains the AuditLog class which is responsible for keeping a local audit log of the
+credit approval decisions, so that bulk analytics do not need to read them back from the database.
+Decisions are packed into compact binary records and appended to an in-memory buffer, which a
+background thread flushes to a segment file of the current hour. Once an hour has passed, its
+segments are compacted into columnar .npz files partitioned by hour, with one array per field.
+stream_audit_records reads the partitions and the segments not yet compacted one file at a time,
+so exports do not hold the whole log in memory.
+
+Layout of the audit log directory:
+    segments/<hour>-<pid>.log: The binary records of an hour, appended by one process.
+    segments/<segment>.log.<claim>.<claimer pid>.compacting: A segment being compacted by a
+    process, under a claim id drawn at random for this compaction.
+    hour=<hour>/<segment>-<claim>.npz: The columns of a compacted segment.
+
+Each compaction writes a file of its own claim id, so a later segment of the same hour and pid, such
+as one flushed late or one written by a restarted process that reused the pid, never replaces the
+columns of an earlier one. A segment whose compaction failed is put back under its claim id,
+segments/<segment>.<claim>.log, to be compacted again, and a segment left claimed by a process that
+died while compacting it is put back by the next compaction, or removed if the columnar file of
+its own claim was written. Until then the exporter reads it where it is.
+
+Classes:
+    AuditLog
+
+Functions:
+    stream_audit_records: Stream the audit records of a directory in time order of their hours.
+
+Dependencies:
+    - contextlib: The contextlib module for ignoring the files removed by another process.
+    - datetime: The datetime module for the ages of the users.
+    - glob: The glob module for listing segments and partitions.
+    - logging: The logging module for logging messages.
+    - os: The OS module for interacting with the operating system.
+    - struct: The struct module for the binary records.
+    - threading: The threading module for the background writer.
+    - time: The time module for timestamps and hour partitions.
+    - typing: The typing module for type hints.
+    - numpy: The numpy module for the columnar files, imported when compacting or reading them.
+"""
+
+import contextlib
+import datetime
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Iterator
+
+# Timestamp, approval, existing customer, the lengths of the card number and tier, the bitmask of
+# the card validation errors, the credit score and duration, then the age in years
+_RECORD_HEADER = struct.Struct("<d??BBHhhf")
+
+# The type of each column of the compacted files
+_COLUMNS = (
+    ("timestamp", "float64"),
+    ("credit_card_number", "str"),
+    ("is_approved", "bool"),
+    ("is_existing_customer", "bool"),
+    ("credit_tier", "str"),
+    ("error_codes", "uint16"),
+    ("credit_score", "int16"),
+    ("credit_duration", "int16"),
+    ("age_years", "float32"),
+)
+
+_HOUR_FORMAT = "%Y-%m-%dT%H"
+
+
+def _hour_of(timestamp: float) -> str:
+    """Return the UTC hour partition of a timestamp."""
+    return time.strftime(_HOUR_FORMAT, time.gmtime(timestamp))
+
+
+def _parse_claim(claimed: str) -> tuple[str, str, int]:
+    """Return the segment path, claim id and claimer pid of a claimed segment."""
+    path, claim, claimer = claimed[: -len(".compacting")].rsplit(".", 2)
+    return path, claim, int(claimer)
+
+
+def _compacted_path(directory: str, path: str, claim: str) -> str:
+    """Return the columnar file of a segment compacted under a claim id."""
+    name = os.path.basename(path)[: -len(".log")]
+    return os.path.join(directory, f"hour={name.rsplit('-', 1)[0]}", f"{name}-{claim}.npz")
+
+
+def _is_alive(pid: int) -> bool:
+    """Return whether a process is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_segment(path: str) -> Iterator[dict]:
+    """
+    Read the records of a binary segment. A record cut short by a crash during a write is ignored.
+
+    Parameters:
+        path (str): The path of the segment.
+
+    Returns:
+        Iterator[dict]: The records of the segment.
+    """
+    with open(path, "rb") as segment_file:
+        data = segment_file.read()
+
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(data):
+        (
+            timestamp,
+            is_approved,
+            is_existing_customer,
+            card_length,
+            tier_length,
+            error_codes,
+            credit_score,
+            credit_duration,
+            age_years,
+        ) = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        end = offset + card_length + tier_length
+        if end > len(data):
+            break
+        card_end = offset + card_length
+        yield {
+            "timestamp": timestamp,
+            "credit_card_number": data[offset:card_end].decode(),
+            "is_approved": is_approved,
+            "is_existing_customer": is_existing_customer,
+            "credit_tier": data[card_end:end].decode(),
+            "error_codes": error_codes,
+            "credit_score": credit_score,
+            "credit_duration": credit_duration,
+            "age_years": age_years,
+        }
+        offset = end
+
+
+class AuditLog:
+    """
+    This class is responsible for appending credit approval decisions to the local audit log, and
+    for compacting the segments of past hours into columnar files.
+
+    Attributes:
+        directory (str): The directory of the audit log.
+        flush_seconds (float): The interval between two flushes of the buffer.
+        max_buffer_bytes (int): The buffer size past which a flush is started early.
+
+    Methods:
+        append: Append a decision to the audit log.
+        close: Flush the buffer and stop the background writer.
+        compact: Compact the segments of past hours into columnar files.
+        get_stats: Return the counters of the audit log.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_seconds: float = 1.0,
+        max_buffer_bytes: int = 1 << 20,
+    ) -> None:
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.max_buffer_bytes = max_buffer_bytes
+        os.makedirs(os.path.join(directory, "segments"), exist_ok=True)
+
+        # _lock guards the buffers and counters and is taken on the event loop, so no I/O is done
+        # under it; _write_lock keeps the flushes in order
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._buffer_hour = _hour_of(time.time())
+        self._sealed: list[tuple[str, bytearray]] = []
+        self._wake = threading.Event()
+        self._closed = False
+        self._counters = {
+            "records": 0,
+            "bytes_written": 0,
+            "flushes": 0,
+            "segments_compacted": 0,
+        }
+        self._writer = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._writer.start()
+
+    def append(
+        self,
+        credit_card_number: str,
+        is_approved: bool,
+        is_existing_customer: bool,
+        credit_tier: str,
+        errors: int,
+        credit_score: int,
+        credit_duration: int,
+        date_of_birth: datetime.date,
+    ) -> None:
+        """
+        Append a decision to the audit log. The record is only packed into the in-memory buffer;
+        the background writer does the file I/O, outside the lock taken here.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            is_approved (bool): A boolean indicating if the request was approved.
+            is_existing_customer (bool): A boolean indicating if the user is an existing customer.
+            credit_tier (str): The credit tier of the user's score, or "" if it was not needed.
+            errors (int): The bitmask of the card validation errors of the request.
+            credit_score (int): The credit score of the decision, or -1 if it was not needed.
+            credit_duration (int): The credit duration of the decision, or -1 if it was not needed.
+            date_of_birth (datetime.date): The date of birth of the user, recorded as their age in
+            years at the time of the decision.
+        """
+        card_bytes = credit_card_number.encode()[:255]
+        tier_bytes = credit_tier.encode()[:255]
+        timestamp = time.time()
+        hour = _hour_of(timestamp)
+        age_years = (datetime.date.fromtimestamp(timestamp) - date_of_birth).days / float(
+            os.getenv("DAYS_IN_YEAR", "365.2425")
+        )
+
+        with self._lock:
+            if hour != self._buffer_hour:
+                # Records of a new hour go to a new segment, so seal the buffer of the last hour
+                # for the writer first
+                if self._buffer:
+                    self._sealed.append((self._buffer_hour, self._buffer))
+                    self._buffer = bytearray()
+                    self._wake.set()
+                self._buffer_hour = hour
+            self._buffer += _RECORD_HEADER.pack(
+                timestamp,
+                is_approved,
+                is_existing_customer,
+                len(card_bytes),
+                len(tier_bytes),
+                errors,
+                credit_score,
+                credit_duration,
+                age_years,
+            )
+            self._buffer += card_bytes + tier_bytes
+            self._counters["records"] += 1
+            if len(self._buffer) >= self.max_buffer_bytes:
+                self._wake.set()
+
+    def _flush(self) -> None:
+        """Write the sealed buffers and the current buffer to the segments of their hours. The
+        buffers are swapped out under the lock and written outside it."""
+        with self._write_lock:
+            with self._lock:
+                buffers = self._sealed
+                self._sealed = []
+                if self._buffer:
+                    buffers.append((self._buffer_hour, self._buffer))
+                    self._buffer = bytearray()
+
+            for index, (hour, buffer) in enumerate(buffers):
+                path = os.path.join(self.directory, "segments", f"{hour}-{os.getpid()}.log")
+                try:
+                    with open(path, "ab") as segment_file:
+                        segment_file.write(buffer)
+                except Exception:
+                    with self._lock:
+                        # Keep the unwritten buffers for the next flush, in order
+                        self._sealed[:0] = buffers[index:]
+                    raise
+                with self._lock:
+                    self._counters["bytes_written"] += len(buffer)
+                    self._counters["flushes"] += 1
+
+    def _run(self) -> None:
+        """Flush the buffer periodically, and compact the segments of past hours."""
+        compacted_before = ""
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self._flush()
+                current_hour = _hour_of(time.time())
+                if current_hour != compacted_before:
+                    self.compact()
+                    compacted_before = current_hour
+            except Exception as e:
+                logging.error("Failed to write the audit log: %s", e)
+
+    def compact(self) -> None:
+        """
+        Compact the segments of past hours into columnar files. Each segment is claimed by
+        renaming it under a new claim id first, so that processes sharing the directory do not
+        compact it twice, and is written to the columnar file of that claim, which is never
+        replaced. A segment whose compaction fails is put back under its claim id, and the
+        segments left claimed by processes that have died are recovered first.
+        """
+        import numpy as np
+
+        self._recover_claimed_segments()
+        current_hour = _hour_of(time.time())
+        for path in sorted(glob.glob(os.path.join(self.directory, "segments", "*.log"))):
+            name = os.path.basename(path)[: -len(".log")]
+            hour = name.rsplit("-", 1)[0]
+            if hour >= current_hour:
+                continue
+
+            claim = os.urandom(8).hex()
+            claimed = f"{path}.{claim}.{os.getpid()}.compacting"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            compacted = _compacted_path(self.directory, path, claim)
+            temporary = os.path.join(os.path.dirname(compacted), "." + os.path.basename(compacted))
+            try:
+                records = list(_read_segment(claimed))
+                os.makedirs(os.path.dirname(compacted), exist_ok=True)
+                np.savez_compressed(
+                    temporary,
+                    **{
+                        field: np.array([record[field] for record in records], dtype=dtype)
+                        for field, dtype in _COLUMNS
+                    },
+                )
+                # Linking fails rather than replace a file of the same name
+                os.link(temporary, compacted)
+                os.remove(temporary)
+            except Exception:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(temporary)
+                os.rename(claimed, f"{path[: -len('.log')]}.{claim}.log")
+                raise
+            os.remove(claimed)
+            with self._lock:
+                self._counters["segments_compacted"] += 1
+
+    def _recover_claimed_segments(self) -> None:
+        """Put back the segments claimed by processes that died while compacting them under
+        their claim id, or remove them if the columnar file of their claim was already
+        written."""
+        for claimed in glob.glob(os.path.join(self.directory, "segments", "*.compacting")):
+            path, claim, claimer = _parse_claim(claimed)
+            if claimer != os.getpid() and _is_alive(claimer):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                if os.path.exists(_compacted_path(self.directory, path, claim)):
+                    os.remove(claimed)
+                else:
+                    os.rename(claimed, f"{path[: -len('.log')]}.{claim}.log")
+                logging.warning("Recovered the audit log segment %s", os.path.basename(path))
+
+    def close(self) -> None:
+        """Flush the buffer and stop the background writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self._flush()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Return the counters of the audit log: the records appended, the bytes and flushes written,
+        the segments compacted, and the bytes waiting in the buffer.
+
+        Returns:
+            dict[str, int]: The counters of the audit log.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "buffered_bytes": len(self._buffer)
+                + sum(len(buffer) for _, buffer in self._sealed),
+            }
+
+
+def stream_audit_records(
+    directory: str, since: str | None = None, until: str | None = None
+) -> Iterator[dict]:
+    """
+    Stream the audit records of a directory, hour by hour, reading one columnar file or segment at
+    a time, including the segments claimed for a compaction that has not completed. Records of an
+    hour are in time order within each file.
+
+    Parameters:
+        directory (str): The directory of the audit log.
+        since (str | None): The first hour to export, as YYYY-MM-DDTHH in UTC.
+        until (str | None): The last hour to export, as YYYY-MM-DDTHH in UTC.
+
+    Returns:
+        Iterator[dict]: The audit records.
+    """
+    files: list[tuple[str, str]] = []
+    for path in glob.glob(os.path.join(directory, "hour=*", "*.npz")):
+        files.append((os.path.basename(os.path.dirname(path))[len("hour=") :], path))
+    for path in glob.glob(os.path.join(directory, "segments", "*.log")):
+        files.append((os.path.basename(path).rsplit("-", 1)[0], path))
+    for path in glob.glob(os.path.join(directory, "segments", "*.compacting")):
+        # A claimed segment is read until the columnar file of its claim has been written
+        segment, claim, _ = _parse_claim(path)
+        if not os.path.exists(_compacted_path(directory, segment, claim)):
+            files.append((os.path.basename(segment).rsplit("-", 1)[0], path))
+
+    for hour, path in sorted(files):
+        if (since and hour < since) or (until and hour > until):
+            continue
+        if not path.endswith(".npz"):
+            yield from _read_segment(path)
+            continue
+
+        import numpy as np
+
+        with np.load(path) as columns:
+            fields = {name: columns[name].tolist() for name in columns.files}
+        for values in zip(*fields.values()):
+            yield dict(zip(fields, values))
@@ -0,0 +1,297 @@
+"""
+This module contains the CardRouter class, an ASGI reverse proxy that routes each credit check to a
+service instance chosen by consistent hashing of its card number, so that repeated checks of a
+card reach the instance whose local score cache already holds it, and the caches of the instances
+hold disjoint working sets instead of each holding every card. Instances are kept within a bounded
+load of the average, so a burst of checks for one card spills to the next instance on the ring
+rather than overloading its own. When an instance joins or leaves, only the cards of the arcs it
+gains or loses change instance.
+
+Only URL-encoded credit checks carry a routing key; every other request, including multipart
+credit checks, goes to the least loaded instance. Requests that could not connect to their
+instance are retried once on the next one, and an instance failing to connect repeatedly is
+taken off the ring for a cool-down period. The client address is passed on in X-Forwarded-For,
+which the instances only honor when the router's address is in their SERVER_FORWARDED_ALLOW_IPS.
+
+Each router process balances the loads it observes; the routing itself is the same in every
+process, since the ring is a pure function of the instance URLs.
+
+Classes:
+    CardRouter
+
+Dependencies:
+    - json: The JSON module for encoding the router's own responses.
+    - logging: The logging module for logging messages.
+    - time: The time module for the ejection of failing instances.
+    - urllib.parse: The urllib.parse module for parsing the URL-encoded form.
+    - httpx: The HTTP client forwarding the requests.
+    - ConsistentHashRing: The class mapping card numbers to instances.
+"""
+
+import json
+import logging
+import time
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl
+import httpx
+from app.service.utility.consistent_hash import ConsistentHashRing
+
+_HOP_BY_HOP_HEADERS = frozenset(
+    (
+        b"connection",
+        b"content-length",
+        b"host",
+        b"keep-alive",
+        b"proxy-authenticate",
+        b"proxy-authorization",
+        b"te",
+        b"trailer",
+        b"transfer-encoding",
+        b"upgrade",
+    )
+)
+# The raw body of a response is relayed unchanged, so its length still holds, while the date and
+# server headers are set again by the server running the router
+_DROPPED_RESPONSE_HEADERS = (_HOP_BY_HOP_HEADERS - {b"content-length"}) | {b"date", b"server"}
+
+
+class CardRouter:
+    """
+    An ASGI application forwarding requests to the service instances, routing credit checks by
+    the consistent hash of their card number.
+
+    Attributes:
+        ring (ConsistentHashRing): The ring of the instance URLs.
+        client (httpx.AsyncClient): The client forwarding the requests.
+        max_consecutive_errors (int): The number of consecutive failed requests after which an
+        instance is taken off the ring.
+        ejection_seconds (float): How long an ejected instance is kept off the ring.
+        stats_path (str): The path answered with the statistics of the router.
+
+    Methods:
+        __call__: Handle an ASGI connection.
+        get_routing_key: Return the card number a request is routed by.
+        get_stats: Return the statistics of the router and of each instance.
+    """
+
+    def __init__(
+        self,
+        ring: ConsistentHashRing,
+        client: httpx.AsyncClient,
+        max_consecutive_errors: int = 3,
+        ejection_seconds: float = 30.0,
+        stats_path: str = "/router/stats",
+    ) -> None:
+        self.ring = ring
+        self.client = client
+        self.max_consecutive_errors = max_consecutive_errors
+        self.ejection_seconds = ejection_seconds
+        self.stats_path = stats_path
+
+        self._consecutive_errors: dict[str, int] = {}
+        self._ejected_until: dict[str, float] = {}
+        self._counters = {"requests": 0, "keyed": 0, "retries": 0, "failures": 0, "ejections": 0}
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        """
+        Handle an ASGI connection: forward HTTP requests to an instance, answer the statistics
+        path, and close the client on shutdown.
+        """
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        if scope["path"] == self.stats_path:
+            await self._send(send, 200, json.dumps(self.get_stats()).encode())
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        headers = scope["headers"]
+        key = self.get_routing_key(scope, dict(headers), body)
+        self._counters["requests"] += 1
+        if key is not None:
+            self._counters["keyed"] += 1
+        self._readmit_ejected()
+
+        tried: frozenset[str] = frozenset()
+        while True:
+            node = self.ring.acquire(key, exclude=tried)
+            if node is None:
+                self._counters["failures"] += 1
+                await self._send(send, 502, b'{"detail":"No upstream available"}')
+                return
+            try:
+                response = await self.client.send(
+                    self._build_request(node, scope, headers, body), stream=True
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                self.ring.release(node)
+                self._record_failure(node, e)
+                if tried:
+                    self._counters["failures"] += 1
+                    await self._send(send, 502, b'{"detail":"Upstream unavailable"}')
+                    return
+                self._counters["retries"] += 1
+                tried = frozenset((node,))
+                continue
+            except httpx.HTTPError as e:
+                self.ring.release(node)
+                self._record_failure(node, e)
+                self._counters["failures"] += 1
+                await self._send(send, 502, b'{"detail":"Upstream error"}')
+                return
+
+            self._consecutive_errors[node] = 0
+            try:
+                await self._relay(response, send)
+            finally:
+                await response.aclose()
+                self.ring.release(node)
+            return
+
+    async def _lifespan(
+        self, receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable[None]]
+    ) -> None:
+        """Answer the lifespan events, closing the client on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    def get_routing_key(scope: dict, headers: dict[bytes, bytes], body: bytes) -> str | None:
+        """
+        Return the card number a request is routed by: the credit_card_number field of a
+        URL-encoded POST to /check_credit.
+
+        Parameters:
+            scope (dict): The ASGI scope of the request.
+            headers (dict[bytes, bytes]): The request headers.
+            body (bytes): The request body.
+
+        Returns:
+            str | None: The card number, or None if the request is not routed by card.
+        """
+        if scope["method"] != "POST" or scope["path"] != "/check_credit":
+            return None
+        content_type = headers.get(b"content-type", b"").split(b";", 1)[0].strip()
+        if content_type != b"application/x-www-form-urlencoded":
+            return None
+        for name, value in parse_qsl(body.decode("latin-1"), keep_blank_values=True):
+            if name == "credit_card_number":
+                return value or None
+        return None
+
+    def _build_request(
+        self, node: str, scope: dict, headers: list[tuple[bytes, bytes]], body: bytes
+    ) -> httpx.Request:
+        """Build the request forwarded to an instance, passing the client address on."""
+        forwarded_headers = [
+            (name, value) for name, value in headers if name.lower() not in _HOP_BY_HOP_HEADERS
+        ]
+        if scope.get("client"):
+            client_host = scope["client"][0].encode("latin-1")
+            forwarded_for = dict(headers).get(b"x-forwarded-for")
+            forwarded_headers = [(n, v) for n, v in forwarded_headers if n != b"x-forwarded-for"]
+            forwarded_headers.append(
+                (
+                    b"x-forwarded-for",
+                    forwarded_for + b", " + client_host if forwarded_for else client_host,
+                )
+            )
+
+        url = node + scope.get("raw_path", scope["path"].encode()).decode("latin-1")
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        return self.client.build_request(
+            scope["method"], url, headers=forwarded_headers, content=body
+        )
+
+    @staticmethod
+    async def _relay(response: httpx.Response, send: Callable[[dict], Awaitable[None]]) -> None:
+        """Relay the response of an instance as it is received."""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response.headers.multi_items()
+                    if name.encode("latin-1") not in _DROPPED_RESPONSE_HEADERS
+                ],
+            }
+        )
+        async for chunk in response.aiter_raw():
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    def _record_failure(self, node: str, error: Exception) -> None:
+        """Record a failed request on an instance, taking it off the ring if it keeps failing."""
+        logging.warning("Failed to forward request to %s: %r", node, error)
+        errors = self._consecutive_errors.get(node, 0) + 1
+        self._consecutive_errors[node] = errors
+        if errors >= self.max_consecutive_errors and len(self.ring.get_nodes()) > 1:
+            logging.error("Ejecting upstream %s for %.0f seconds", node, self.ejection_seconds)
+            self.ring.remove(node)
+            self._ejected_until[node] = time.monotonic() + self.ejection_seconds
+            self._counters["ejections"] += 1
+
+    def _readmit_ejected(self) -> None:
+        """Put the instances whose ejection has expired back on the ring."""
+        if not self._ejected_until:
+            return
+        now = time.monotonic()
+        for node, until in list(self._ejected_until.items()):
+            if until <= now:
+                del self._ejected_until[node]
+                self._consecutive_errors[node] = 0
+                self.ring.add(node)
+
+    @staticmethod
+    async def _send(
+        send: Callable[[dict], Awaitable[None]], status: int, body: bytes
+    ) -> None:
+        """Send a complete JSON response."""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def get_stats(self) -> dict:
+        """
+        Return the requests routed, by card or not, retried and failed, the ejected instances,
+        and the in-flight requests, routed requests and load overflows of each instance on the
+        ring.
+
+        Returns:
+            dict: The statistics of the router.
+        """
+        return {
+            **self._counters,
+            "ejected": sorted(self._ejected_until),
+            "upstreams": self.ring.get_stats(),
+        }
@@ -1,82 +1,562 @@
 """
 This module contains the process_credit_check function which serves as the interface for the
-credit check processor. It validates the incoming credit approval request, fetches the credit score
-and duration from the database, runs the credit check process, saves the credit approval request to
-the database, and returns the response.
+credit check processor. The credit check runs as a staged pipeline: the cheap local stages
+(card validation and the score-independent eligibility rules) run first, the credit score is only
+fetched from the database when the decision depends on it, and the transaction is recorded in the
+background since the response does not depend on it. Every database call on the request path is
+bounded by the remaining time budget of the request deadline. Database calls run on a dedicated
+bounded executor, so a slow database cannot starve the threads used by the rest of the application.
+Setting DB_CONCURRENCY_LIMIT to "adaptive" also bounds the database calls in flight by a limit
+learned from their latency, so that calls beyond what the database can serve are shed to the
+fallback paths instead of queueing in it. The score cache and snapshot lookups run on a local
+executor instead, since their answers take microseconds and would pass for the unloaded latency of
+the database. Transactions are recorded on their own executor, so that a burst of lookups cannot
+crowd the inserts out; the inserts dropped when even that executor is full are counted.
+Each decision is also recorded in rolling approval statistics, so that they can be served without
+querying the transactions table, and appended to the local audit log when one is enabled. Cards
+applying more often than the velocity limits allow are denied, or only flagged, from in-memory
+counters before any database work; the counters are per worker process, see
+velocity_check_service for setting VELOCITY_LIMITS with several workers. Setting PRIORITY_LANES
+to "on" schedules the credit checks in two priority lanes, so that the requests decided without
+a database lookup, existing customers and cached scores, keep their own concurrency budget and
+are shed last under overload.
+
+Functions:
+    process_credit_check: Run the credit check pipeline for a credit approval request.
+    wait_for_pending_transactions: Wait for the transactions being recorded in the background.
+    get_pipeline_stats: Return the counters of the database calls made and avoided.
+    get_db_executor_stats: Return the saturation metrics of the database executor.
+    get_db_write_executor_stats: Return the saturation metrics of the transaction executor.
+    get_local_executor_stats: Return the saturation metrics of the local lookup executor.
+    get_approval_stats: Return the rolling approval statistics of each time window.
+    get_velocity_stats: Return the memory usage and exceeded limits of the velocity checks.
+    get_priority_lane_stats: Return the load and latency percentiles of the priority lanes.
 
 Dependencies:
+    - asyncio: The asyncio module for awaiting database calls with a timeout.
+    - collections: The collections module for the pipeline counters.
+    - logging: The logging module for logging messages.
+    - os: The OS module for interacting with the operating system.
     - HTTPException: The exception class for handling HTTP errors.
     - CreditApprovalRequest: The class representing the credit approval request.
     - CreditApprovalResponse: The class representing the credit approval response.
+    - CardValidationErrors: The flags of the card validation errors.
+    - RequestDeadline: The class representing the time budget of the request.
+    - BoundedExecutor: The class running the blocking database calls.
+    - GradientConcurrencyLimit: The adaptive limit on the concurrent database calls.
+    - UnknownOutcomeError: The error of a database function that may have recorded the transaction.
+    - ApprovalStats: The class keeping the rolling approval statistics.
+    - VelocityChecker: The class counting the attempts of each card.
+    - PriorityLanes: The class scheduling the credit checks by priority.
     - get_card_validation_errors: The function that validates the credit card information.
     - get_credit_approval_request_result: The function that runs the credit check process.
+    - is_creditee_of_legal_age: The function that checks the legal age of the creditee.
+    - get_credit_tier_criteria: The function that returns the criteria of each credit tier.
+    - get_credit_tier: The function that returns the credit tier of a credit score.
 """
 
+import asyncio
+import collections
+import logging
+import os
 from fastapi import HTTPException
 from app.model.credit_approval_request import CreditApprovalRequest
 from app.model.credit_approval_response import CreditApprovalResponse
+from app.model.card_validation_errors import CardValidationErrors
+from app.model.request_deadline import RequestDeadline
+from app.service.approval_stats_service import ApprovalStats
+from app.service.velocity_check_service import VelocityChecker
+from app.service.priority_lane_service import HIGH_PRIORITY, LOW_PRIORITY, PriorityLanes
+from app.service.utility.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from app.service.utility.concurrency_limit import GradientConcurrencyLimit
+from app.service.database_service import UnknownOutcomeError
 from app.interface.card_validation_interface import get_card_validation_errors
 from app.interface.credit_approval_checker_interface import (
     get_credit_approval_request_result,
+    get_credit_tier,
+    get_credit_tier_criteria,
+    is_creditee_of_legal_age,
+)
+
+_db_executor_workers = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
+_db_executor_max_queue = int(os.getenv("DB_EXECUTOR_MAX_QUEUE", "64"))
+_db_executor = BoundedExecutor(
+    "db",
+    max_workers=_db_executor_workers,
+    max_queue=_db_executor_max_queue,
+    concurrency_limit=(
+        GradientConcurrencyLimit(
+            initial_limit=int(os.getenv("DB_CONCURRENCY_INITIAL_LIMIT", "8")),
+            min_limit=int(os.getenv("DB_CONCURRENCY_MIN_LIMIT", "2")),
+            max_limit=_db_executor_workers + _db_executor_max_queue,
+            tolerance=float(os.getenv("DB_CONCURRENCY_TOLERANCE", "1.25")),
+            rtt_window=float(os.getenv("DB_CONCURRENCY_RTT_WINDOW_SECONDS", "60")),
+        )
+        if os.getenv("DB_CONCURRENCY_LIMIT", "fixed") == "adaptive"
+        else None
+    ),
+)
+_db_write_executor = BoundedExecutor(
+    "db-write",
+    max_workers=int(os.getenv("DB_WRITE_EXECUTOR_WORKERS", "4")),
+    max_queue=int(os.getenv("DB_WRITE_EXECUTOR_MAX_QUEUE", "256")),
+)
+_local_executor = BoundedExecutor(
+    "local",
+    max_workers=int(os.getenv("LOCAL_EXECUTOR_WORKERS", "4")),
+    max_queue=int(os.getenv("LOCAL_EXECUTOR_MAX_QUEUE", "64")),
+)
+_approval_stats = ApprovalStats(
+    [
+        float(seconds)
+        for seconds in os.getenv("STATS_WINDOWS_SECONDS", "60,900,3600").split(",")
+    ]
+)
+_velocity_checker = VelocityChecker(
+    [
+        (float(seconds), int(max_attempts))
+        for seconds, max_attempts in (
+            entry.strip().split(":")
+            for entry in os.getenv("VELOCITY_LIMITS", "").split(",")
+            if entry.strip()
+        )
+    ],
+    bucket_seconds=float(os.getenv("VELOCITY_BUCKET_SECONDS", "1")),
+    max_tracked_cards=int(os.getenv("VELOCITY_MAX_TRACKED_CARDS", "100000")),
+)
+_priority_lanes = (
+    PriorityLanes(
+        high_limit=int(os.getenv("PRIORITY_HIGH_LIMIT", "16")),
+        low_limit=int(os.getenv("PRIORITY_LOW_LIMIT", "16")),
+        high_max_queue=int(os.getenv("PRIORITY_HIGH_MAX_QUEUE", "24")),
+        low_max_queue=int(os.getenv("PRIORITY_LOW_MAX_QUEUE", "8")),
+        shed_retry_after=int(os.getenv("OVERLOAD_RETRY_AFTER_SECONDS", "1")),
+    )
+    if os.getenv("PRIORITY_LANES", "off") == "on"
+    else None
 )
+_pipeline_counters: collections.Counter = collections.Counter()
+_pending_transactions: set[asyncio.Future] = set()
+
+
+def _raise_if_expired(deadline: RequestDeadline) -> None:
+    """
+    Abandon the request with a 504 if its deadline has passed, since the client has given up.
+
+    Parameters:
+        deadline (RequestDeadline): The deadline of the request.
+
+    Raises:
+        HTTPException: The deadline of the request has passed.
+    """
+    if deadline.is_expired():
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+
+
+async def _run_db_call(deadline: RequestDeadline, reserve: float, func, *args):
+    """
+    Run a blocking database call on the database executor, giving it only the remaining budget of
+    the request minus the reserve held back for the work that follows it. A call still queued when
+    its budget runs out is removed from the queue.
+
+    Parameters:
+        deadline (RequestDeadline): The deadline of the request.
+        reserve (float): Seconds of the budget held back from the call.
+        func: The blocking database method to call.
+        *args: The arguments of the database method.
+
+    Raises:
+        TimeoutError: The call did not complete within its budget.
+        ExecutorSaturatedError: The database executor queue is full.
+    """
+    return await asyncio.wait_for(
+        _db_executor.run(func, *args), timeout=deadline.remaining(reserve=reserve)
+    )
+
+
+def _decide_without_score(
+    credit_approval_request: CreditApprovalRequest, errors: CardValidationErrors
+) -> bool | None:
+    """
+    Decide the credit approval request from the rules that do not depend on the credit score:
+    cards exceeding a velocity limit of VELOCITY_LIMITS are denied, unless VELOCITY_ACTION is
+    "flag", existing customers are approved, and requests failing card validation or from
+    creditees under the legal age are denied.
+
+    Parameters:
+        credit_approval_request (CreditApprovalRequest): The credit approval request.
+        errors (CardValidationErrors): The card validation errors of the request.
+
+    Returns:
+        bool | None: The decision, or None if it depends on the credit score.
+    """
+    velocity_window = _velocity_checker.check(credit_approval_request.credit_card_number)
+    if velocity_window is not None:
+        if os.getenv("VELOCITY_ACTION", "deny") == "flag":
+            _pipeline_counters["velocity_flags"] += 1
+            logging.warning("Card exceeded the velocity limit of the %s window", velocity_window)
+        else:
+            _pipeline_counters["score_fetches_avoided_velocity_limit"] += 1
+            return False
+    if credit_approval_request.is_existing_customer:
+        _pipeline_counters["score_fetches_avoided_existing_customer"] += 1
+        return True
+    if errors:
+        _pipeline_counters["score_fetches_avoided_invalid_card"] += 1
+        return False
+    if not is_creditee_of_legal_age(credit_approval_request.date_of_birth):
+        _pipeline_counters["score_fetches_avoided_under_legal_age"] += 1
+        return False
+    return None
+
+
+async def _decide_with_score(
+    credit_approval_request: CreditApprovalRequest,
+    credit_approval_response: CreditApprovalResponse,
+    db_service,
+    deadline: RequestDeadline,
+) -> bool:
+    """
+    Decide the credit approval request from the credit score, looked up across the score providers
+    of the database service. When the database service uses the database function, the score is
+    fetched and the transaction recorded in a single round trip, with the two-call path as the
+    fallback when the function is known to have recorded nothing.
+
+    Parameters:
+        credit_approval_request (CreditApprovalRequest): The credit approval request.
+        credit_approval_response (CreditApprovalResponse): The response, whose is_approved,
+        credit_tier, credit_score and credit_duration are set.
+        db_service: The database service object.
+        deadline (RequestDeadline): The deadline of the request.
+
+    Returns:
+        bool: True if the transaction was already recorded by the database function.
+
+    Raises:
+        HTTPException: The database function did not complete before the deadline, or failed
+        after it was sent.
+    """
+    reserve = float(os.getenv("DEADLINE_RESERVE_SECONDS", "0.1"))
+
+    # Step 1: If enabled, fetch the score, decide and record the transaction in one round trip
+    if db_service.use_rpc:
+        rpc_result = None
+        try:
+            rpc_result = await _run_db_call(
+                deadline,
+                reserve,
+                db_service.check_credit_and_record_transaction,
+                credit_approval_response.credit_card_number,
+                credit_approval_response.errors,
+                credit_approval_request.is_existing_customer,
+                # The legal age has already been checked by _decide_without_score
+                True,
+                get_credit_tier_criteria(),
+            )
+        except ExecutorSaturatedError as e:
+            logging.warning("Credit check function not run (%r), using two calls", e)
+        except (TimeoutError, UnknownOutcomeError):
+            # The function may have recorded the transaction, which the two-call path would
+            # record again, so the request is abandoned instead
+            _pipeline_counters["rpc_unknown_outcomes"] += 1
+            raise HTTPException(
+                status_code=504, detail="Credit check outcome unknown, transaction may be recorded"
+            ) from None
+
+        if rpc_result is not None:
+            _pipeline_counters["combined_round_trips"] += 1
+            credit_approval_response.is_approved = rpc_result[2]
+            credit_approval_response.credit_tier = get_credit_tier(rpc_result[0])
+            credit_approval_response.credit_score = rpc_result[0]
+            credit_approval_response.credit_duration = rpc_result[1]
+            return True
+
+    # Step 2: Look up the credit score and duration across the score providers, hedging slow
+    # providers, and fall back to random values when no provider answers in time. A lookup
+    # running out of time takes the same path as one whose providers were all shed or failed
+    _pipeline_counters["score_fetches"] += 1
+    score = None
+    try:
+        score = await asyncio.wait_for(
+            db_service.score_lookup.lookup(
+                credit_approval_request.credit_card_number,
+                _db_executor.run,
+                run_local=_local_executor.run,
+            ),
+            timeout=deadline.remaining(reserve=reserve),
+        )
+    except TimeoutError:
+        _pipeline_counters["score_fetch_timeouts"] += 1
+        logging.warning("Credit score lookup ran out of time, using fallback values")
+
+    if score is None:
+        _pipeline_counters["score_fallbacks"] += 1
+        score = db_service.get_fallback_credit_score_and_duration()
+    credit_score, credit_duration = score
+    credit_approval_response.credit_tier = get_credit_tier(credit_score)
+    credit_approval_response.credit_score = credit_score
+    credit_approval_response.credit_duration = credit_duration
+
+    # Step 3: Run the credit check process
+    credit_approval_response.is_approved = get_credit_approval_request_result(
+        credit_approval_request.date_of_birth,
+        credit_approval_request.is_existing_customer,
+        credit_score,
+        credit_duration,
+    )
+    return False
+
+
+def _record_transaction_in_background(
+    credit_approval_response: CreditApprovalResponse, db_service
+) -> None:
+    """
+    Record the transaction of the credit approval request on the transaction executor without
+    holding up the response. The future is kept referenced until it completes so that it can be
+    awaited on shutdown. If the transaction executor is saturated, the transaction is dropped,
+    logged and counted.
+
+    Parameters:
+        credit_approval_response (CreditApprovalResponse): The response to record.
+        db_service: The database service object.
+    """
+    try:
+        future = asyncio.wrap_future(
+            _db_write_executor.submit(
+                db_service.record_credit_approval_request_transaction,
+                credit_approval_response.credit_card_number,
+                credit_approval_response.is_approved,
+                credit_approval_response.errors,
+            )
+        )
+    except ExecutorSaturatedError:
+        _pipeline_counters["transactions_dropped"] += 1
+        logging.error("Transaction executor saturated, transaction not recorded")
+        return
+
+    _pending_transactions.add(future)
+    future.add_done_callback(_pending_transactions.discard)
+
+
+async def wait_for_pending_transactions() -> None:
+    """Wait for the transactions being recorded in the background to complete."""
+    if _pending_transactions:
+        await asyncio.gather(*_pending_transactions, return_exceptions=True)
 
 
-def process_credit_check(
-    credit_approval_request: CreditApprovalRequest, db_service
+def get_db_executor_stats() -> dict:
+    """
+    Return the saturation metrics of the database executor: active threads, queued and rejected
+    calls, queue wait time, and the adaptive concurrency limit with its round trip time estimates.
+
+    Returns:
+        dict: The metrics of the database executor.
+    """
+    return _db_executor.get_stats()
+
+
+def get_db_write_executor_stats() -> dict:
+    """
+    Return the saturation metrics of the executor recording the transactions: active threads,
+    queued and rejected inserts, and queue wait time.
+
+    Returns:
+        dict: The metrics of the transaction executor.
+    """
+    return _db_write_executor.get_stats()
+
+
+def get_local_executor_stats() -> dict:
+    """
+    Return the saturation metrics of the executor running the score cache and snapshot lookups:
+    active threads, queued and rejected lookups, and queue wait time.
+
+    Returns:
+        dict: The metrics of the local lookup executor.
+    """
+    return _local_executor.get_stats()
+
+
+def get_approval_stats() -> dict[str, dict]:
+    """
+    Return the rolling approval statistics of each time window, maintained as decisions are made.
+
+    Returns:
+        dict[str, dict]: The approvals, denials, error counts and tier outcomes of each window.
+    """
+    return _approval_stats.get_stats()
+
+
+def get_velocity_stats() -> dict:
+    """
+    Return the number of cards tracked by the velocity checks, the memory they use, and the
+    attempts exceeding each velocity limit.
+
+    Returns:
+        dict: The statistics of the velocity checks.
+    """
+    return _velocity_checker.get_stats()
+
+
+def get_priority_lane_stats() -> dict[str, dict] | None:
+    """
+    Return, for each priority lane, the requests in flight, queued, shed and expired, and the
+    percentiles of the recent latencies and queue waits.
+
+    Returns:
+        dict[str, dict] | None: The statistics of each lane, or None if the lanes are disabled.
+    """
+    return _priority_lanes.get_stats() if _priority_lanes is not None else None
+
+
+def _get_priority(credit_approval_request: CreditApprovalRequest, db_service) -> str:
+    """
+    Return the priority lane of a credit approval request: high for the requests decided without
+    a database lookup, those of existing customers and those whose score is cached locally, and
+    low for the others. A cached score does not save the lookup when decisions go through the
+    database function.
+
+    Parameters:
+        credit_approval_request (CreditApprovalRequest): The credit approval request.
+        db_service: The database service object.
+
+    Returns:
+        str: HIGH_PRIORITY or LOW_PRIORITY.
+    """
+    if credit_approval_request.is_existing_customer:
+        return HIGH_PRIORITY
+    if (
+        db_service.score_cache is not None
+        and not db_service.use_rpc
+        and db_service.score_cache.contains(credit_approval_request.credit_card_number)
+    ):
+        return HIGH_PRIORITY
+    return LOW_PRIORITY
+
+
+def get_pipeline_stats() -> dict[str, int]:
+    """
+    Return the counters of the credit check pipeline: the score fetches made, the score fetches
+    avoided for each reason, the fetches that fell back to random values or ran out of time, the
+    round trips saved by the database function, its calls abandoned with an unknown outcome, and
+    the transactions dropped because the transaction executor was saturated.
+
+    Returns:
+        dict[str, int]: The pipeline counters.
+    """
+    return dict(_pipeline_counters)
+
+
+async def process_credit_check(
+    credit_approval_request: CreditApprovalRequest,
+    db_service,
+    deadline: RequestDeadline,
+    audit_log=None,
 ) -> dict[str, str]:
     """
     This function serves as the interface for the credit check processor. It validates the incoming
-    credit approval request, fetches the credit score and duration from the database, runs the
-    credit check process, saves the credit approval request to the database, and returns the
-    response.
+    credit approval request, fetches the credit score and duration from the database when the
+    decision depends on it, runs the credit check process, saves the credit approval request to the
+    database, and returns the response. When the priority lanes are enabled, the credit check
+    first waits for a slot of its lane.
 
     Parameters:
         credit_approval_request (CreditApprovalRequest): An instance of the CreditApprovalRequest
         class representing the credit approval request.
         db_service: The database service object.
+        deadline (RequestDeadline): The deadline of the request. Database calls only get the
+        remaining budget, and the request is abandoned with a 504 once it has expired.
+        audit_log: The local audit log of the decisions, or None if it is disabled.
     """
 
-    # Prep Step: Initialize credit score and duration from the database
-    credit_score, credit_duration = db_service.fetch_credit_score_and_duration_from_db(
-        credit_approval_request.credit_card_number
-    )
+    # Prep Step: Abandon the request before any database work if the client has given up
+    _raise_if_expired(deadline)
+
+    # Prep Step: If enabled, wait for a slot of the priority lane of the request
+    if _priority_lanes is None:
+        return await _run_credit_check(credit_approval_request, db_service, deadline, audit_log)
+    async with _priority_lanes.slot(_get_priority(credit_approval_request, db_service), deadline):
+        return await _run_credit_check(credit_approval_request, db_service, deadline, audit_log)
+
+
+async def _run_credit_check(
+    credit_approval_request: CreditApprovalRequest,
+    db_service,
+    deadline: RequestDeadline,
+    audit_log,
+) -> dict[str, str]:
+    """
+    Run the stages of the credit check pipeline for a credit approval request.
+
+    Parameters:
+        credit_approval_request (CreditApprovalRequest): The credit approval request.
+        db_service: The database service object.
+        deadline (RequestDeadline): The deadline of the request.
+        audit_log: The local audit log of the decisions, or None if it is disabled.
+
+    Returns:
+        dict[str, str]: The result of the credit check.
+
+    Raises:
+        HTTPException: The card validation failed.
+    """
 
     # Prep Step: Initialize the response object
     credit_approval_response: CreditApprovalResponse = CreditApprovalResponse(
         is_existing_customer=credit_approval_request.is_existing_customer,
         date_of_birth=credit_approval_request.date_of_birth,
         is_approved=False,
-        errors="",
+        credit_card_number=credit_approval_request.credit_card_number,
     )
 
-    # Step 1: Append validation errors to the response object
-    credit_approval_response.errors += get_card_validation_errors(
+    # Stage 1: Set the validation errors of the response object
+    credit_approval_response.errors = get_card_validation_errors(
         credit_approval_request.credit_card_number,
         credit_approval_request.cvv,
         credit_approval_request.expiration_date,
         credit_approval_request.credit_card_issuer,
     )
 
-    # Step 2: Run the credit check process and update the response object
-    credit_approval_response.is_approved = get_credit_approval_request_result(
-        credit_approval_request.date_of_birth,
-        credit_approval_request.is_existing_customer,
-        credit_score,
-        credit_duration,
+    # Stage 2: Decide from the rules that do not need the credit score, and only fetch the score
+    # from the database when the decision depends on it
+    transaction_recorded = False
+    decision = _decide_without_score(
+        credit_approval_request, credit_approval_response.errors
     )
+    if decision is not None:
+        credit_approval_response.is_approved = decision
+    else:
+        transaction_recorded = await _decide_with_score(
+            credit_approval_request, credit_approval_response, db_service, deadline
+        )
+
+    # Stage 3: Save the credit approval request to the database, concurrently with the response
+    if not transaction_recorded:
+        _record_transaction_in_background(credit_approval_response, db_service)
 
-    # Step 3: Save the credit approval request to the database
-    db_service.record_credit_approval_request_transaction(
-        credit_approval_response.credit_card_number,
+    # Stage 4: Record the decision in the rolling approval statistics and the local audit log
+    _approval_stats.record(
         credit_approval_response.is_approved,
         credit_approval_response.errors,
+        credit_approval_response.credit_tier,
     )
+    if audit_log is not None:
+        audit_log.append(
+            credit_approval_response.credit_card_number,
+            credit_approval_response.is_approved,
+            credit_approval_response.is_existing_customer,
+            credit_approval_response.credit_tier,
+            credit_approval_response.errors,
+            credit_approval_response.credit_score,
+            credit_approval_response.credit_duration,
+            credit_approval_response.date_of_birth,
+        )
 
-    # Step 4a: If applicable, raise an exception with errors
-    if credit_approval_response.errors != "":
-        raise HTTPException(status_code=400, detail=credit_approval_response.errors)
+    # Stage 5a: If applicable, raise an exception with the messages of the errors
+    if credit_approval_response.errors:
+        raise HTTPException(status_code=400, detail=credit_approval_response.errors.get_detail())
 
-    # Step 4b: Return the response
+    # Stage 5b: Return the response
     if credit_approval_response.is_approved:
         return {"credit_approval": "approved"}
     return {"credit_approval": "denied"}
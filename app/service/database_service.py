@@ -1,24 +1,67 @@
 """
 This module contains a class for interacting with the Supabase database. The class contains methods
 for checking the credit score and duration of a user, as well as recording the transaction of a
-credit approval request.
+credit approval request, and for paging through the recorded transactions. Score lookups and
+transaction history reads can be served by read replicas, while transactions are always written
+to the primary database. Optionally, the score lookup and the transaction insert
+are combined into one round trip through the check_credit_and_record_transaction database function
+defined in sql/. Credit scores are looked up across an ordered list of score providers: the
+credit_scores table, an optional secondary bureau and an optional local snapshot, with random
+values only as the last resort. Optionally, a Bloom filter of the card numbers in credit_scores
+lets lookups for cards that definitely have no score skip the database, and a two-tier cache, local
+and shared over the Redis protocol, serves repeated lookups. Only the PostgREST client
+is imported up front; the full Supabase client, which pulls in the auth, storage, realtime and
+functions stacks, is imported on first use.
 
 Classes:
+    UnknownOutcomeError: Raised when the database function may have recorded the transaction.
     DataBaseService: A class for interacting with the Supabase database.
     
 Dependencies:
     - random: The random module for generating random values.
     - os: The OS module for interacting with the operating system.
     - logging: The logging module for logging messages.
+    - time: The time module for measuring query latency.
+    - functools: The functools module for caching the lazily created Supabase client.
     - typing: The typing module for type hints.
-    - supabase: The Supabase module for interacting with the Supabase database.
+    - httpx: The HTTP client of PostgREST, for telling apart the errors raised before sending.
+    - postgrest: The PostgREST client for querying the Supabase database tables.
+    - score_provider_service: The classes for looking up scores across providers.
+    - known_cards_service: The class for the Bloom filter of the card numbers with a score.
+    - score_cache_service: The class for the two-tier cache of the credit scores.
+    - RedisClient: The client of the shared L2 score cache.
+    - supabase: The Supabase module, imported on first use of the full client.
+    - ReplicaPool: The class for load balancing reads across replicas.
 """
 
 import random
 import os
 import logging
-from typing import Any
-from supabase import create_client, Client
+import time
+import functools
+from typing import Any, Callable, TYPE_CHECKING
+import httpx
+from postgrest import APIError, SyncPostgrestClient
+from app.service.utility.replica_pool import ReadReplica, ReplicaPool
+from app.service.known_cards_service import KnownCardFilter
+from app.service.score_cache_service import ScoreCache
+from app.service.utility.redis_client import RedisClient
+from app.service.score_provider_service import (
+    HedgedScoreLookup,
+    ScoreProvider,
+    load_score_snapshot,
+)
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# The columns of the transactions returned by the history queries
+TRANSACTION_COLUMNS = ("id", "created_at", "card_number", '"approved?"', "error_codes")
+
+
+class UnknownOutcomeError(RuntimeError):
+    """Raised when the database function failed after it was sent, so it may have recorded the
+    transaction, and recording it again could duplicate it."""
 
 
 class DataBaseService:
@@ -28,24 +71,252 @@ class DataBaseService:
     credit approval request.
 
     Attributes:
-        supabase (Client): The Supabase client object for interacting with the Supabase database.
+        postgrest (SyncPostgrestClient): The PostgREST client object for interacting with the
+        tables of the primary Supabase database.
+        read_replicas (ReplicaPool): The read replicas serving credit score lookups.
+        score_lookup (HedgedScoreLookup): The score providers, in order of preference.
+        known_cards (KnownCardFilter | None): The Bloom filter of the card numbers in
+        credit_scores, or None if it is disabled.
+        score_cache (ScoreCache | None): The two-tier cache of the scores read from credit_scores,
+        or None if it is disabled.
+        use_rpc (bool): Whether decisions go through the check_credit_and_record_transaction
+        database function. Turned off automatically if the function does not exist.
+        supabase (Client): The full Supabase client, created and imported on first access.
 
     Methods:
         __init__: Initialize the Supabase client's PostgreSQL database for the application.
+        _create_client: Create a PostgREST client for the given URL.
+        _create_score_providers: Create the score providers in order of preference.
+        _create_known_card_filter: Create the Bloom filter of the card numbers in credit_scores.
+        _create_score_cache: Create the two-tier cache of the scores read from credit_scores.
+        _query_known_cards: Query a page of the card numbers in credit_scores.
+        _fetch_primary_credit_score: Fetch the credit score of a card from credit_scores.
         _test_db_connection: Attempt a simple query to confirm that the Supabase DB is reachable.
+        _execute_on_read_replica: Run a read query on a read replica or the primary.
+        _query_credit_scores: Query the credit_scores table on a read replica or the primary.
+        query_card_transactions: Query a page of the transactions of a card, newest first.
+        query_transactions_in_range: Query a page of the transactions of a time range, oldest
+        first.
+        _query_bureau_credit_scores: Query the score table of the secondary bureau.
+        _get_score_from_response: Extract the credit score and duration from a query response.
         fetch_credit_score_and_duration_from_db: Fetch the credit score and credit duration of the
-        user by querying the Supabase database.
+        user from the first score provider that has them.
+        get_fallback_credit_score_and_duration: Generate random credit score and credit duration
+        values for when the database cannot provide them.
         record_credit_approval_request_transaction: Record the transaction of the credit approval
         request in the Supabase database.
+        check_credit_and_record_transaction: Fetch the credit score, decide and record the
+        transaction in a single call to the database function.
     """
 
-    def __init__(self, url: str, key: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        read_urls: list[str] | None = None,
+        use_rpc: bool = False,
+        bureau_url: str | None = None,
+        bureau_table: str = "credit_scores",
+        score_snapshot_path: str | None = None,
+        known_cards_filter: bool = False,
+        score_cache_url: str | None = None,
+    ) -> None:
         """
         Initialize the Supabase client's PostgreSQL database for the application, and test the
-        connection to the database.
+        connection to the database. If read replica URLs are given, credit score lookups are load
+        balanced across them and only fall back to the primary when every replica is ejected. If a
+        bureau URL or a score snapshot path is given, they are used as secondary score providers.
+        If known_cards_filter is set, the Bloom filter of the card numbers in credit_scores starts
+        loading in the background once the connection is tested. If a score cache URL is given, or
+        SCORE_CACHE_MAX_ENTRIES is set, scores read from credit_scores are cached.
         """
-        self.supabase: Client = create_client(url, key)
+        self.use_rpc = use_rpc
+        self._url = url
+        self._key = key
+        self.postgrest: SyncPostgrestClient = self._create_client(url, key)
+        self.read_replicas = ReplicaPool(
+            [
+                ReadReplica(read_url, self._create_client(read_url, key))
+                for read_url in read_urls or []
+            ],
+            max_consecutive_errors=int(
+                os.getenv("READ_REPLICA_MAX_CONSECUTIVE_ERRORS", "3")
+            ),
+            ejection_seconds=float(os.getenv("READ_REPLICA_EJECTION_SECONDS", "30")),
+        )
+        self.known_cards = self._create_known_card_filter() if known_cards_filter else None
+        self.score_cache = self._create_score_cache(score_cache_url)
+        self.score_lookup = HedgedScoreLookup(
+            self._create_score_providers(
+                key, bureau_url, bureau_table, score_snapshot_path
+            ),
+            may_have_score=None if self.known_cards is None else self.known_cards.might_contain,
+        )
         self._test_db_connection()
+        if self.known_cards is not None:
+            self.known_cards.start()
+
+    def _create_known_card_filter(self) -> KnownCardFilter:
+        """
+        Create the Bloom filter of the card numbers in credit_scores, sized for
+        KNOWN_CARDS_CAPACITY cards at a false positive rate of KNOWN_CARDS_FALSE_POSITIVE_RATE, and
+        refreshed every KNOWN_CARDS_REFRESH_SECONDS from the last value of
+        KNOWN_CARDS_CURSOR_COLUMN, an increasing column of credit_scores.
+
+        Returns:
+            KnownCardFilter: The filter of the card numbers with a credit score.
+        """
+        cursor_column = os.getenv("KNOWN_CARDS_CURSOR_COLUMN", "id")
+        return KnownCardFilter(
+            lambda cursor, page_size: self._query_known_cards(cursor_column, cursor, page_size),
+            capacity=int(os.getenv("KNOWN_CARDS_CAPACITY", "1000000")),
+            false_positive_rate=float(os.getenv("KNOWN_CARDS_FALSE_POSITIVE_RATE", "0.01")),
+            page_size=int(os.getenv("KNOWN_CARDS_PAGE_SIZE", "1000")),
+            refresh_seconds=float(os.getenv("KNOWN_CARDS_REFRESH_SECONDS", "60")),
+        )
+
+    @staticmethod
+    def _create_score_cache(score_cache_url: str | None) -> ScoreCache | None:
+        """
+        Create the two-tier cache of the scores read from credit_scores: a local cache of
+        SCORE_CACHE_MAX_ENTRIES entries, and the shared L2 at the given redis:// URL, whose calls
+        are bounded by SCORE_CACHE_L2_TIMEOUT_SECONDS and skipped for SCORE_CACHE_L2_RETRY_SECONDS
+        after a failure. Entries expire after SCORE_CACHE_TTL_SECONDS.
+
+        Parameters:
+            score_cache_url (str | None): The redis:// URL of the L2 cache.
+
+        Returns:
+            ScoreCache | None: The score cache, or None if neither tier is enabled.
+        """
+        max_entries = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "0"))
+        if max_entries <= 0 and not score_cache_url:
+            return None
+
+        l2 = None
+        if score_cache_url:
+            l2 = RedisClient(
+                score_cache_url,
+                timeout=float(os.getenv("SCORE_CACHE_L2_TIMEOUT_SECONDS", "0.01")),
+            )
+        return ScoreCache(
+            max_entries=max_entries,
+            ttl_seconds=float(os.getenv("SCORE_CACHE_TTL_SECONDS", "300")),
+            l2=l2,
+            l2_retry_seconds=float(os.getenv("SCORE_CACHE_L2_RETRY_SECONDS", "5")),
+        )
+
+    def _create_score_providers(
+        self,
+        key: str,
+        bureau_url: str | None,
+        bureau_table: str,
+        score_snapshot_path: str | None,
+    ) -> list[ScoreProvider]:
+        """
+        Create the score providers in order of preference: the score cache if configured, the
+        credit_scores table, the secondary bureau if configured, and the local snapshot if
+        configured. A slow cache is hedged by the credit_scores table like any other provider. A
+        snapshot that cannot be loaded is logged and skipped. Until enough latency samples are
+        collected, each provider is hedged after SCORE_HEDGE_DEFAULT_DELAY_SECONDS. The score cache
+        and the credit_scores table are skipped for the cards ruled out by the known card filter,
+        and the score cache and the snapshot are marked local.
+
+        Parameters:
+            key (str): The API key of the Supabase project.
+            bureau_url (str | None): The URL of the secondary bureau's Supabase project.
+            bureau_table (str): The score table of the secondary bureau.
+            score_snapshot_path (str | None): The path of the local score snapshot.
+
+        Returns:
+            list[ScoreProvider]: The score providers.
+        """
+        default_hedge_delay = float(os.getenv("SCORE_HEDGE_DEFAULT_DELAY_SECONDS", "0.1"))
+        filtered = self.known_cards is not None
+        providers = []
+        if self.score_cache is not None:
+            providers.append(
+                ScoreProvider(
+                    "cache",
+                    self.score_cache.get,
+                    default_hedge_delay=default_hedge_delay,
+                    filtered=filtered,
+                    local=True,
+                )
+            )
+        providers.append(
+            ScoreProvider(
+                "primary",
+                self._fetch_primary_credit_score,
+                default_hedge_delay=default_hedge_delay,
+                filtered=filtered,
+            )
+        )
+
+        if bureau_url:
+            bureau_client = self._create_client(bureau_url, key)
+            providers.append(
+                ScoreProvider(
+                    "bureau",
+                    lambda card_number: self._get_score_from_response(
+                        self._query_bureau_credit_scores(
+                            bureau_client, bureau_table, card_number
+                        )
+                    ),
+                    default_hedge_delay=default_hedge_delay,
+                )
+            )
+
+        if score_snapshot_path:
+            try:
+                snapshot = load_score_snapshot(score_snapshot_path)
+            except (OSError, ValueError) as e:
+                logging.error("Failed to load score snapshot, skipping it: %s", e)
+            else:
+                providers.append(
+                    ScoreProvider(
+                        "snapshot",
+                        snapshot.get,
+                        default_hedge_delay=default_hedge_delay,
+                        local=True,
+                    )
+                )
+
+        return providers
+
+    @staticmethod
+    def _create_client(url: str, key: str) -> SyncPostgrestClient:
+        """
+        Create a PostgREST client for the REST endpoint of the given Supabase URL, authenticated
+        the same way the Supabase client would be. HTTP calls are capped by
+        DB_CLIENT_TIMEOUT_SECONDS so that a call abandoned by an expired request deadline does not
+        hold a thread indefinitely.
+
+        Parameters:
+            url (str): The URL of the Supabase project or read replica.
+            key (str): The API key of the Supabase project.
+
+        Returns:
+            SyncPostgrestClient: The PostgREST client.
+        """
+        return SyncPostgrestClient(
+            f"{url.rstrip('/')}/rest/v1",
+            headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+            timeout=float(os.getenv("DB_CLIENT_TIMEOUT_SECONDS", "10")),
+        )
+
+    @functools.cached_property
+    def supabase(self) -> "Client":
+        """
+        The full Supabase client, for features beyond the database tables. The supabase package
+        and its auth, storage, realtime and functions dependencies are imported on first access.
+
+        Returns:
+            Client: The Supabase client of the primary database.
+        """
+        from supabase import create_client
+
+        return create_client(self._url, self._key)
 
     def _test_db_connection(self) -> None:
         """Attempt a simple query to confirm that the Supabase DB is reachable. Raises
@@ -55,14 +326,15 @@ class DataBaseService:
             ConnectionError: An error occurred when testing the connection to the Supabase database.
         """
         try:
-            self.supabase.table("transactions").select("*").limit(1).execute()
+            self.postgrest.table("transactions").select("*").limit(1).execute()
         except Exception as e:
             raise ConnectionError from e
 
     def fetch_credit_score_and_duration_from_db(self, credit_card_number) -> tuple:
         """
-        Fetch the credit score and credit duration of the user by querying the Supabase database. If
-        the query fails for any reason, random values are used instead.
+        Fetch the credit score and credit duration of the user from the first score provider that
+        has them, trying each provider in turn. If no provider answers, random values are used
+        instead.
 
         Parameters:
             credit_card_number (str): The credit card number of the user.
@@ -72,60 +344,348 @@ class DataBaseService:
 
         """
 
-        result = {}
+        result = self.score_lookup.lookup_in_order(credit_card_number)
+        if result is None:
+            logging.error(
+                "Failed to fetch credit score and/or duration, using random values"
+            )
+            return self.get_fallback_credit_score_and_duration()
 
+        return result
+
+    @staticmethod
+    def _get_score_from_response(data: Any) -> tuple | None:
+        """
+        Extract the credit score and duration from the response of a score table query.
+
+        Parameters:
+            data (Any): The response of the query.
+
+        Returns:
+            tuple | None: The credit score and duration, or None if the card has no score.
+        """
+        if not data.data:
+            return None
+        return data.data[0]["score"], data.data[0]["duration"]
+
+    def _fetch_primary_credit_score(self, credit_card_number: str) -> tuple | None:
+        """
+        Fetch the credit score and duration of the card from the credit_scores table, and cache
+        it if the score cache is enabled. A card let through by the known card filter without a
+        score is recorded as a false positive.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            tuple | None: The credit score and duration, or None if the card has no score.
+        """
+        score = self._get_score_from_response(self._query_credit_scores(credit_card_number))
+        if score is None and self.known_cards is not None:
+            self.known_cards.record_false_positive()
+        if score is not None and self.score_cache is not None:
+            self.score_cache.set(credit_card_number, score)
+        return score
+
+    def _query_known_cards(
+        self, cursor_column: str, cursor: Any, page_size: int
+    ) -> list[tuple[Any, str]]:
+        """
+        Query a page of the card numbers in credit_scores, in the order of the cursor column.
+
+        Parameters:
+            cursor_column (str): The increasing column of credit_scores to page by.
+            cursor (Any): The cursor value to continue after, or None to start from the beginning.
+            page_size (int): The maximum number of cards of the page.
+
+        Returns:
+            list[tuple[Any, str]]: The cursor value and card number of each card.
+        """
+        query = (
+            self.postgrest.table("credit_scores")
+            .select(f"card_number, {cursor_column}")
+            .order(cursor_column)
+            .limit(page_size)
+        )
+        if cursor is not None:
+            query = query.gt(cursor_column, cursor)
+        return [(row[cursor_column], row["card_number"]) for row in query.execute().data]
+
+    @staticmethod
+    def _query_bureau_credit_scores(
+        client: SyncPostgrestClient, table: str, credit_card_number: str
+    ) -> Any:
+        """
+        Query the score table of the secondary bureau for the card.
+
+        Parameters:
+            client (SyncPostgrestClient): The PostgREST client of the bureau.
+            table (str): The score table of the bureau.
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            Any: The response of the query.
+        """
+        return (
+            client.table(table)
+            .select("score, duration")
+            .eq("card_number", credit_card_number)
+            .execute()
+        )
+
+    def _execute_on_read_replica(self, build_query: Callable[[SyncPostgrestClient], Any]) -> Any:
+        """
+        Run a read query on a read replica, recording the replica's latency or failure. A query
+        failing on a replica is retried once on another healthy replica, or on the primary
+        database when there is none. The primary database is used when no replica is available.
+
+        Parameters:
+            build_query (Callable): Builds the query to run from the client of the replica.
+
+        Returns:
+            Any: The response of the query.
+        """
+        replica = self.read_replicas.choose()
+        if replica is None:
+            return build_query(self.postgrest).execute()
+
+        start = time.perf_counter()
         try:
-            data: Any = (
-                self.supabase.table("credit_scores")
-                .select("score, duration")
-                .eq("card_number", credit_card_number)
-                .execute()
+            data = build_query(replica.client).execute()
+        except Exception as e:
+            self.read_replicas.record_failure(replica)
+            retry_replica = self.read_replicas.choose(exclude=replica)
+            logging.warning(
+                "Read replica %s failed (%r), retrying on %s",
+                replica.url,
+                e,
+                "the primary" if retry_replica is None else retry_replica.url,
             )
+            if retry_replica is None:
+                return build_query(self.postgrest).execute()
+            replica = retry_replica
+            start = time.perf_counter()
+            try:
+                data = build_query(replica.client).execute()
+            except Exception:
+                self.read_replicas.record_failure(replica)
+                raise
 
-            credit_score = result["score"] = data.data[0]["score"]
-            credit_duration = result["duration"] = data.data[0]["duration"]
+        self.read_replicas.record_success(replica, time.perf_counter() - start)
+        return data
 
-        except Exception:
-            logging.error(
-                "Failed to fetch credit score and/or duration, using random values"
+    def _query_credit_scores(self, credit_card_number: str) -> Any:
+        """
+        Query the credit_scores table for the card on a read replica, or on the primary database
+        when no replica is available.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            Any: The response of the query.
+        """
+        return self._execute_on_read_replica(
+            lambda client: client.table("credit_scores")
+            .select("score, duration")
+            .eq("card_number", credit_card_number)
+        )
+
+    def query_card_transactions(
+        self,
+        credit_card_number: str,
+        limit: int,
+        before: tuple[str, int] | None = None,
+    ) -> list[dict]:
+        """
+        Query a page of the transactions of a card, newest first, on a read replica. Pages are
+        keyed by the (created_at, id) of the last row of the previous page rather than an offset,
+        so that every page is a range scan of the (card_number, created_at, id) index, however
+        deep it is. The created_at bound is repeated outside the tie-breaking filter so that it
+        can be used as an index condition.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            limit (int): The maximum number of transactions of the page.
+            before (tuple[str, int] | None): The created_at and id of the last transaction of the
+            previous page, or None for the newest transactions.
+
+        Returns:
+            list[dict]: The transactions of the page.
+        """
+
+        def build_query(client: SyncPostgrestClient) -> Any:
+            query = (
+                client.table("transactions")
+                .select(*TRANSACTION_COLUMNS)
+                .eq("card_number", credit_card_number)
+                .order("created_at", desc=True)
+                .order("id", desc=True)
+                .limit(limit)
             )
-            credit_score = result["score"] = random.randint(
-                int(os.getenv("RANDOM_CREDIT_SCORE_MIN", "300")),
-                int(os.getenv("RANDOM_CREDIT_SCORE_MAX", "850")),
+            if before is not None:
+                created_at, row_id = before
+                query = query.lte("created_at", created_at).or_(
+                    f'created_at.lt."{created_at}",id.lt.{row_id}'
+                )
+            return query
+
+        return self._execute_on_read_replica(build_query).data
+
+    def query_transactions_in_range(
+        self,
+        start: str,
+        end: str,
+        limit: int,
+        after: tuple[str, int] | None = None,
+    ) -> list[dict]:
+        """
+        Query a page of the transactions created in [start, end), oldest first, on a read
+        replica. Pages are keyed by the (created_at, id) of the last row of the previous page, so
+        that every page is a range scan of the (created_at, id) index.
+
+        Parameters:
+            start (str): The ISO 8601 timestamp of the start of the range, included.
+            end (str): The ISO 8601 timestamp of the end of the range, excluded.
+            limit (int): The maximum number of transactions of the page.
+            after (tuple[str, int] | None): The created_at and id of the last transaction of the
+            previous page, or None to start from the beginning of the range.
+
+        Returns:
+            list[dict]: The transactions of the page.
+        """
+
+        def build_query(client: SyncPostgrestClient) -> Any:
+            query = (
+                client.table("transactions")
+                .select(*TRANSACTION_COLUMNS)
+                .lt("created_at", end)
+                .order("created_at")
+                .order("id")
+                .limit(limit)
             )
-            credit_duration = result["duration"] = random.randint(
-                int(os.getenv("RANDOM_CREDIT_DURATION_MIN", "0")),
-                int(os.getenv("RANDOM_CREDIT_DURATION_MAX", "10")),
+            if after is None:
+                return query.gte("created_at", start)
+            created_at, row_id = after
+            return query.gte("created_at", created_at).or_(
+                f'created_at.gt."{created_at}",id.gt.{row_id}'
             )
 
+        return self._execute_on_read_replica(build_query).data
+
+    @staticmethod
+    def get_fallback_credit_score_and_duration() -> tuple:
+        """
+        Generate random credit score and credit duration values for when no score provider can
+        provide them, because every provider failed or has no score for the card.
+
+        Returns:
+            tuple: A tuple containing the random credit score and credit duration.
+        """
+        credit_score = random.randint(
+            int(os.getenv("RANDOM_CREDIT_SCORE_MIN", "300")),
+            int(os.getenv("RANDOM_CREDIT_SCORE_MAX", "850")),
+        )
+        credit_duration = random.randint(
+            int(os.getenv("RANDOM_CREDIT_DURATION_MIN", "0")),
+            int(os.getenv("RANDOM_CREDIT_DURATION_MAX", "10")),
+        )
         return credit_score, credit_duration
 
     def record_credit_approval_request_transaction(
         self,
         credit_card_number: str,
         is_approved: bool,
-        errors: str,
+        errors: int,
     ) -> None:
         """
-        Record the transaction of the credit approval request in the Supabase database.
+        Record the transaction of the credit approval request in the Supabase database. The
+        validation errors are stored as their bitmask in the error_codes column.
 
         Parameters:
             credit_card_number (str): The credit card number of the user.
             is_approved (bool): A boolean indicating if the credit approval request was approved.
-            errors (str): A string containing the errors encountered during the credit approval
-            request.
+            errors (int): The bitmask of the card validation errors of the request.
         """
         try:
             (
-                self.supabase.table("transactions")
+                self.postgrest.table("transactions")
                 .insert(
                     {
                         "card_number": credit_card_number,
                         "approved?": is_approved,
-                        "errors": errors,
+                        "error_codes": int(errors),
                     }
                 )
                 .execute()
             )
         except Exception as e:
             logging.error("Failed to record transaction: %s", e)
+
+    def check_credit_and_record_transaction(
+        self,
+        credit_card_number: str,
+        errors: int,
+        is_existing_customer: bool,
+        is_of_legal_age: bool,
+        credit_tier_criteria: list[dict],
+    ) -> tuple | None:
+        """
+        Fetch the credit score, decide and record the transaction in a single round trip through
+        the check_credit_and_record_transaction database function, which runs on the primary. If
+        the function does not exist, use_rpc is turned off so that later requests go straight to
+        the two-call path.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            errors (int): The bitmask of the card validation errors of the request.
+            is_existing_customer (bool): A boolean indicating if the user is an existing customer.
+            is_of_legal_age (bool): A boolean indicating if the user is of legal age.
+            credit_tier_criteria (list[dict]): The score range and minimum duration of each tier.
+
+        Returns:
+            tuple | None: A tuple containing the credit score, credit duration and approval of the
+            user, or None if the card has no credit score, the function does not exist or the
+            call failed before it was sent, in which case nothing was recorded and the two-call
+            path must be used. Cards ruled out by the known card filter are not sent to the
+            database.
+
+        Raises:
+            UnknownOutcomeError: The call failed after it was sent, so the transaction may have
+            been recorded.
+        """
+        if self.known_cards is not None and credit_card_number not in self.known_cards:
+            return None
+
+        try:
+            data: Any = self.postgrest.rpc(
+                "check_credit_and_record_transaction",
+                {
+                    "p_card_number": credit_card_number,
+                    "p_error_codes": int(errors),
+                    "p_is_existing_customer": is_existing_customer,
+                    "p_is_of_legal_age": is_of_legal_age,
+                    "p_criteria": credit_tier_criteria,
+                },
+            ).execute()
+        except APIError as e:
+            if e.code == "PGRST202":
+                self.use_rpc = False
+                logging.warning(
+                    "check_credit_and_record_transaction is missing, using two calls"
+                )
+                return None
+            logging.error("Failed to run check_credit_and_record_transaction: %s", e)
+            raise UnknownOutcomeError(str(e)) from e
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            logging.error("Failed to send check_credit_and_record_transaction: %s", e)
+            return None
+        except Exception as e:
+            logging.error("Failed to run check_credit_and_record_transaction: %s", e)
+            raise UnknownOutcomeError(str(e)) from e
+
+        row = data.data[0]
+        if not row["found"]:
+            return None
+
+        return row["score"], row["duration"], row["approved"]
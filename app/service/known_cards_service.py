@@ -0,0 +1,175 @@
+"""
+This module contains the KnownCardFilter class which is responsible for keeping a Bloom filter of
+the card numbers that have a credit score, so that score lookups for cards that definitely have no
+score can skip the database. The filter is loaded in the background at startup by paging through
+the card numbers in the order of an increasing cursor column, and refreshed incrementally from the
+last cursor seen. Once more cards are loaded than the filter was sized for, it is rebuilt with
+twice the capacity. Until the first load completes, every card is reported as possibly known.
+
+Classes:
+    KnownCardFilter
+
+Dependencies:
+    - logging: The logging module for logging messages.
+    - threading: The threading module for the background refresh and guarding shared state.
+    - typing: The typing module for type hints.
+    - BloomFilter: The class holding the card numbers.
+"""
+
+import logging
+import threading
+from typing import Any, Callable
+from app.service.utility.bloom_filter import BloomFilter
+
+
+class KnownCardFilter:
+    """
+    This class is responsible for the Bloom filter of the card numbers that have a credit score,
+    and for the observed false positive rate of its lookups.
+
+    Attributes:
+        load_page (Callable): Returns the (cursor, card number) pairs after a cursor, or from the
+        start for None, ordered by cursor and limited to a page size.
+        capacity (int): The number of cards the filter is sized for.
+        false_positive_rate (float): The target false positive rate at capacity.
+        page_size (int): The number of cards loaded per query.
+        refresh_seconds (float): The interval between two incremental refreshes.
+
+    Methods:
+        start: Start loading and refreshing the filter in the background.
+        stop: Stop the background refresh.
+        refresh: Load the cards added since the last refresh.
+        might_contain: Return whether a card may have a score, counting the lookup.
+        __contains__: Return whether a card may have a score, without counting the lookup.
+        record_false_positive: Record that a card let through by the filter had no score.
+        get_stats: Return the size of the filter and its false positive rates.
+    """
+
+    def __init__(
+        self,
+        load_page: Callable[[Any, int], list[tuple[Any, str]]],
+        capacity: int = 1000000,
+        false_positive_rate: float = 0.01,
+        page_size: int = 1000,
+        refresh_seconds: float = 60.0,
+    ) -> None:
+        self.load_page = load_page
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.page_size = page_size
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._filter: BloomFilter | None = None
+        self._cursor: Any = None
+        self._stopped = threading.Event()
+        self._counters = {"definitely_absent": 0, "false_positives": 0, "refreshes": 0}
+
+    def start(self) -> None:
+        """Start loading the filter, then refreshing it every refresh_seconds, in the background."""
+
+        def run() -> None:
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error("Failed to refresh the known card filter: %s", e)
+                if self._stopped.wait(self.refresh_seconds):
+                    return
+
+        threading.Thread(target=run, name="known-cards", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop the background refresh."""
+        self._stopped.set()
+
+    def refresh(self) -> None:
+        """
+        Load the cards added since the last refresh, page by page. The first load, and a reload
+        once the filter is past its capacity, builds a new filter which replaces the current one
+        when complete.
+        """
+        with self._refresh_lock:
+            bloom_filter, cursor = self._filter, self._cursor
+            if bloom_filter is None or bloom_filter.count > bloom_filter.capacity:
+                capacity = self.capacity if bloom_filter is None else bloom_filter.capacity * 2
+                bloom_filter, cursor = BloomFilter(capacity, self.false_positive_rate), None
+
+            while True:
+                page = self.load_page(cursor, self.page_size)
+                for cursor, credit_card_number in page:
+                    bloom_filter.add(credit_card_number)
+                if len(page) < self.page_size:
+                    break
+
+            with self._lock:
+                self._filter, self._cursor = bloom_filter, cursor
+                self._counters["refreshes"] += 1
+
+    def might_contain(self, credit_card_number: str) -> bool:
+        """
+        Return whether a card may have a credit score, counting the cards ruled out for the
+        observed false positive rate.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            bool: False if the card definitely has no score, True otherwise.
+        """
+        if credit_card_number in self:
+            return True
+        with self._lock:
+            self._counters["definitely_absent"] += 1
+        return False
+
+    def __contains__(self, credit_card_number: str) -> bool:
+        """
+        Return whether a card may have a credit score. Every card may have one until the filter
+        is loaded.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            bool: False if the card definitely has no score, True otherwise.
+        """
+        bloom_filter = self._filter
+        return bloom_filter is None or credit_card_number in bloom_filter
+
+    def record_false_positive(self) -> None:
+        """Record that a card let through by the loaded filter had no credit score."""
+        if self._filter is None:
+            return
+        with self._lock:
+            self._counters["false_positives"] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Return whether the filter is loaded, the cards it holds, its capacity and size, the
+        target and expected false positive rates, and the false positive rate observed among the
+        lookups of cards without a score.
+
+        Returns:
+            dict: The statistics of the filter.
+        """
+        with self._lock:
+            stats: dict = dict(self._counters)
+            bloom_filter = self._filter
+
+        checked = stats["definitely_absent"] + stats["false_positives"]
+        stats["observed_false_positive_rate"] = (
+            stats["false_positives"] / checked if checked else 0.0
+        )
+        stats["loaded"] = bloom_filter is not None
+        stats["target_false_positive_rate"] = self.false_positive_rate
+        if bloom_filter is not None:
+            stats["cards"] = bloom_filter.count
+            stats["capacity"] = bloom_filter.capacity
+            stats["size_bytes"] = bloom_filter.size_bytes()
+            stats["hash_count"] = bloom_filter.hash_count
+            stats["estimated_false_positive_rate"] = (
+                bloom_filter.estimated_false_positive_rate()
+            )
+        return stats
@@ -0,0 +1,204 @@
+"""
+This module contains the PriorityLanes class which is responsible for scheduling the credit checks
+in two priority lanes. Requests that can be decided without a database lookup, such as those of
+existing customers, who are approved unconditionally, and those whose credit score is already
+cached, take the high-priority lane; the others take the low-priority lane. Each lane has its own
+budget of concurrent requests and its own bounded queue, so new applicants waiting on the database
+cannot hold the slots that existing customers need. The high-priority lane may also take the idle
+slots of the low-priority lane, and a freed slot goes to a waiting high-priority request first,
+so under overload the low-priority queue fills up and sheds requests while the high-priority lane
+keeps flowing. The latency of each lane, queueing included, is tracked for its percentiles.
+
+Classes:
+    PriorityLanes
+
+Dependencies:
+    - asyncio: The asyncio module for waiting for a slot.
+    - contextlib: The contextlib module for holding a slot over the credit check.
+    - statistics: The statistics module for the latency percentiles.
+    - threading: The threading module for guarding the statistics.
+    - time: The time module for measuring latency.
+    - collections: The collections module for the queues and the recent latencies.
+    - HTTPException: The exception class for handling HTTP errors.
+    - RequestDeadline: The class representing the time budget of the request.
+"""
+
+import asyncio
+import contextlib
+import statistics
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator
+from fastapi import HTTPException
+from app.model.request_deadline import RequestDeadline
+
+HIGH_PRIORITY = "high"
+LOW_PRIORITY = "low"
+
+
+class _Lane:
+    """The slots, queue and statistics of a priority lane."""
+
+    __slots__ = ("limit", "max_queue", "in_flight", "waiters", "counters", "latencies", "waits")
+
+    def __init__(self, limit: int, max_queue: int, latency_window: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.counters = {"admitted": 0, "queued": 0, "borrowed": 0, "shed": 0, "expired": 0}
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.waits: deque[float] = deque(maxlen=latency_window)
+
+
+class PriorityLanes:
+    """
+    This class is responsible for admitting the credit checks into their priority lane, queueing
+    them while the lane is full and shedding them when its queue is full.
+
+    Attributes:
+        shed_retry_after (int): The Retry-After value in seconds sent with a shed request.
+
+    Methods:
+        slot: Hold a slot of a lane for the duration of a credit check.
+        get_stats: Return the load, shed requests and latency percentiles of each lane.
+    """
+
+    def __init__(
+        self,
+        high_limit: int = 16,
+        low_limit: int = 16,
+        high_max_queue: int = 24,
+        low_max_queue: int = 8,
+        latency_window: int = 1000,
+        shed_retry_after: int = 1,
+    ) -> None:
+        self.shed_retry_after = shed_retry_after
+
+        self._lock = threading.Lock()
+        self._lanes = {
+            HIGH_PRIORITY: _Lane(high_limit, high_max_queue, latency_window),
+            LOW_PRIORITY: _Lane(low_limit, low_max_queue, latency_window),
+        }
+
+    def _try_acquire(self, lane: _Lane) -> _Lane | None:
+        """Take a free slot for a request of a lane, from the low-priority lane if a high-priority
+        request finds its own lane full. Return the lane owning the slot, or None if there is no
+        free slot or requests are already waiting for one."""
+        if lane.waiters:
+            return None
+        if lane.in_flight < lane.limit:
+            lane.in_flight += 1
+            return lane
+
+        low = self._lanes[LOW_PRIORITY]
+        if lane is self._lanes[HIGH_PRIORITY] and low.in_flight < low.limit and not low.waiters:
+            low.in_flight += 1
+            lane.counters["borrowed"] += 1
+            return low
+        return None
+
+    def _release(self, owner: _Lane) -> None:
+        """Hand a freed slot to the next waiting request, high-priority requests first; a slot of
+        the high-priority lane is never handed to a low-priority request."""
+        high = self._lanes[HIGH_PRIORITY]
+        for lane in (high,) if owner is high else (high, owner):
+            while lane.waiters:
+                waiter = lane.waiters.popleft()
+                if not waiter.done():
+                    if lane is not owner:
+                        lane.counters["borrowed"] += 1
+                    waiter.set_result(owner)
+                    return
+        owner.in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: str, deadline: RequestDeadline) -> AsyncIterator[None]:
+        """
+        Hold a slot of a lane for the duration of a credit check, waiting for one in the queue of
+        the lane if it is full. Requests finding the queue full are shed with a 503, and requests
+        whose deadline passes while queued are abandoned with a 504.
+
+        Parameters:
+            priority (str): The lane of the request, HIGH_PRIORITY or LOW_PRIORITY.
+            deadline (RequestDeadline): The deadline of the request.
+
+        Raises:
+            HTTPException: The request was shed or its deadline passed while queued.
+        """
+        lane = self._lanes[priority]
+        start = time.perf_counter()
+
+        owner = self._try_acquire(lane)
+        if owner is None:
+            if len(lane.waiters) >= lane.max_queue:
+                with self._lock:
+                    lane.counters["shed"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Service overloaded, please retry later",
+                    headers={"Retry-After": str(self.shed_retry_after)},
+                )
+
+            waiter = asyncio.get_running_loop().create_future()
+            lane.waiters.append(waiter)
+            with self._lock:
+                lane.counters["queued"] += 1
+            try:
+                owner = await asyncio.wait_for(waiter, timeout=deadline.remaining())
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    self._release(waiter.result())
+                else:
+                    waiter.cancel()
+                    with contextlib.suppress(ValueError):
+                        lane.waiters.remove(waiter)
+                if not isinstance(e, TimeoutError):
+                    raise
+                with self._lock:
+                    lane.counters["expired"] += 1
+                raise HTTPException(status_code=504, detail="Request deadline exceeded") from None
+
+        wait = time.perf_counter() - start
+        with self._lock:
+            lane.counters["admitted"] += 1
+        try:
+            yield
+        finally:
+            self._release(owner)
+            with self._lock:
+                lane.latencies.append(time.perf_counter() - start)
+                lane.waits.append(wait)
+
+    def get_stats(self) -> dict[str, dict]:
+        """
+        Return, for each lane, its slots in use and budget, its queued requests and queue size,
+        the requests admitted, queued, given a slot of the low-priority lane, shed and expired,
+        and the percentiles of the recent latencies and queue waits.
+
+        Returns:
+            dict[str, dict]: The statistics of each lane.
+        """
+        stats = {}
+        for name, lane in self._lanes.items():
+            with self._lock:
+                lane_stats: dict = {
+                    **lane.counters,
+                    "in_flight": lane.in_flight,
+                    "limit": lane.limit,
+                    "waiting": len(lane.waiters),
+                    "max_queue": lane.max_queue,
+                }
+                latencies = list(lane.latencies)
+                waits = list(lane.waits)
+
+            if len(latencies) >= 2:
+                percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+                lane_stats["latency_p50_ms"] = percentiles[49] * 1000
+                lane_stats["latency_p99_ms"] = percentiles[98] * 1000
+                lane_stats["queue_wait_p99_ms"] = (
+                    statistics.quantiles(waits, n=100, method="inclusive")[98] * 1000
+                )
+            stats[name] = lane_stats
+        return stats
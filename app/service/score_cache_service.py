@@ -0,0 +1,237 @@
+"""
+This module contains the ScoreCache class which is responsible for caching the credit scores read
+from the credit_scores table in two tiers: a local least recently used cache in each process, and
+an optional L2 shared by every process over the Redis protocol, so that a lookup made by one pod
+warms the others. Multi-key reads and writes are pipelined into a single round trip. Every L2 call
+is bounded by the client timeout, and after a failure the L2 is skipped for a retry interval, so a
+slow or unavailable L2 costs at most one timeout before lookups go straight to the database.
+
+Classes:
+    ScoreCache
+
+Dependencies:
+    - logging: The logging module for logging messages.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for the expiry of the entries.
+    - collections: The collections module for the least recently used local cache.
+    - RedisClient: The client of the L2 cache.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from app.service.utility.redis_client import RedisClient, RedisResponseError
+
+
+class ScoreCache:
+    """
+    This class is responsible for the two-tier cache of the credit scores.
+
+    Attributes:
+        max_entries (int): The maximum number of entries of the local cache, 0 to disable it.
+        ttl_seconds (float): The time an entry is kept in either tier.
+        l2 (RedisClient | None): The client of the L2 cache, or None if it is disabled.
+        l2_retry_seconds (float): The time the L2 is skipped for after a failure.
+        key_prefix (str): The prefix of the L2 keys.
+
+    Methods:
+        contains: Return whether the score of a card is cached locally.
+        get: Return the cached score of a card.
+        get_many: Return the cached scores of several cards.
+        set: Cache the score of a card.
+        set_many: Cache the scores of several cards.
+        get_stats: Return the hits, misses and L2 failures of the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 300.0,
+        l2: RedisClient | None = None,
+        l2_retry_seconds: float = 5.0,
+        key_prefix: str = "credit_score:",
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.l2 = l2
+        self.l2_retry_seconds = l2_retry_seconds
+        self.key_prefix = key_prefix
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, tuple[int, int]]] = OrderedDict()
+        self._l2_down_until = 0.0
+        self._counters = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "l2_errors": 0,
+            "l2_skipped": 0,
+        }
+
+    def _get_local(self, credit_card_number: str, now: float) -> tuple[int, int] | None:
+        """Return the unexpired local entry of a card. Must be called with the lock held."""
+        entry = self._entries.get(credit_card_number)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[credit_card_number]
+            return None
+        self._entries.move_to_end(credit_card_number)
+        return entry[1]
+
+    def _set_local(self, credit_card_number: str, score: tuple[int, int], now: float) -> None:
+        """Store a local entry, evicting the least recently used one when full. Must be called
+        with the lock held."""
+        if self.max_entries <= 0:
+            return
+        self._entries[credit_card_number] = (now + self.ttl_seconds, score)
+        self._entries.move_to_end(credit_card_number)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _call_l2(self, commands: list[tuple]) -> list | None:
+        """
+        Run commands on the L2 in a single round trip, unless it has failed recently. A failure is
+        logged and the L2 is skipped for l2_retry_seconds.
+
+        Parameters:
+            commands (list[tuple]): The commands to run.
+
+        Returns:
+            list | None: The replies, or None if the L2 was skipped or failed.
+        """
+        if self.l2 is None:
+            return None
+        with self._lock:
+            if time.monotonic() < self._l2_down_until:
+                self._counters["l2_skipped"] += 1
+                return None
+
+        try:
+            replies = self.l2.pipeline(commands)
+        except (OSError, RedisResponseError) as e:
+            logging.warning("Score cache L2 unavailable, skipping it: %r", e)
+            with self._lock:
+                self._counters["l2_errors"] += 1
+                self._l2_down_until = time.monotonic() + self.l2_retry_seconds
+            return None
+        return replies
+
+    def contains(self, credit_card_number: str) -> bool:
+        """
+        Return whether the local cache holds an unexpired score of a card, without counting a
+        lookup, refreshing its recency or querying the L2.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            bool: Whether the score of the card is cached locally.
+        """
+        with self._lock:
+            entry = self._entries.get(credit_card_number)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, credit_card_number: str) -> tuple[int, int] | None:
+        """
+        Return the cached score of a card.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            tuple[int, int] | None: The credit score and duration, or None on a miss.
+        """
+        return self.get_many([credit_card_number]).get(credit_card_number)
+
+    def get_many(self, credit_card_numbers: list[str]) -> dict[str, tuple[int, int]]:
+        """
+        Return the cached scores of several cards, reading the cards missing from the local cache
+        from the L2 in a single round trip.
+
+        Parameters:
+            credit_card_numbers (list[str]): The credit card numbers.
+
+        Returns:
+            dict[str, tuple[int, int]]: The credit score and duration of each card found.
+        """
+        now = time.monotonic()
+        found: dict[str, tuple[int, int]] = {}
+        with self._lock:
+            for credit_card_number in credit_card_numbers:
+                score = self._get_local(credit_card_number, now)
+                if score is not None:
+                    found[credit_card_number] = score
+            self._counters["l1_hits"] += len(found)
+
+        missing = [number for number in credit_card_numbers if number not in found]
+        replies = None
+        if missing:
+            replies = self._call_l2(
+                [("MGET", *(self.key_prefix + number for number in missing))]
+            )
+
+        with self._lock:
+            if replies is not None and isinstance(replies[0], list):
+                for credit_card_number, value in zip(missing, replies[0]):
+                    if value is None:
+                        continue
+                    score, duration = value.split(b":")
+                    found[credit_card_number] = (int(score), int(duration))
+                    self._set_local(credit_card_number, found[credit_card_number], now)
+                    self._counters["l2_hits"] += 1
+            self._counters["misses"] += len(credit_card_numbers) - len(found)
+        return found
+
+    def set(self, credit_card_number: str, score: tuple[int, int]) -> None:
+        """
+        Cache the score of a card in both tiers.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            score (tuple[int, int]): The credit score and duration.
+        """
+        self.set_many({credit_card_number: score})
+
+    def set_many(self, scores: dict[str, tuple[int, int]]) -> None:
+        """
+        Cache the scores of several cards in both tiers, writing them to the L2 in a single round
+        trip.
+
+        Parameters:
+            scores (dict[str, tuple[int, int]]): The credit score and duration of each card.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for credit_card_number, score in scores.items():
+                self._set_local(credit_card_number, score, now)
+
+        self._call_l2(
+            [
+                (
+                    "SET",
+                    self.key_prefix + credit_card_number,
+                    f"{score[0]}:{score[1]}",
+                    "PX",
+                    int(self.ttl_seconds * 1000),
+                )
+                for credit_card_number, score in scores.items()
+            ]
+        )
+
+    def get_stats(self) -> dict:
+        """
+        Return the hits of each tier, the misses, the L2 failures and the lookups made while the
+        L2 was skipped, and the number of local entries.
+
+        Returns:
+            dict: The statistics of the cache.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "l1_entries": len(self._entries),
+                "l2_enabled": self.l2 is not None,
+                "l2_available": time.monotonic() >= self._l2_down_until,
+            }
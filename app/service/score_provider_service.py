@@ -0,0 +1,328 @@
+"""
+This module contains the classes for looking up credit scores across an ordered list of score
+providers, such as the primary credit_scores table, a secondary bureau and a local snapshot. A
+lookup queries the first provider, and if it has not answered within its p95 latency, hedges by
+querying the next provider in parallel. The first valid answer wins. A provider that fails or has no
+score for the card hands over to the next one straight away. A lookup can have a membership filter
+of the cards with a score, consulted once per lookup, in which case the providers it applies to are
+skipped without a call for the cards the filter rules out. Local providers, such as a cache or a
+snapshot, can be run apart from the database calls, so that their fast answers do not feed the
+latency-based limit of the database. The win rate and latency of each provider are tracked.
+
+Classes:
+    ScoreProvider
+    HedgedScoreLookup
+
+Functions:
+    load_score_snapshot: Load a local credit score snapshot from a JSON file.
+
+Dependencies:
+    - asyncio: The asyncio module for running providers in parallel.
+    - collections: The collections module for the recent latency samples.
+    - json: The json module for reading the snapshot file.
+    - logging: The logging module for logging messages.
+    - statistics: The statistics module for the latency percentiles.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for measuring provider latency.
+    - typing: The typing module for type hints.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import statistics
+import threading
+import time
+from typing import Awaitable, Callable
+
+
+def load_score_snapshot(path: str) -> dict[str, tuple[int, int]]:
+    """
+    Load a local credit score snapshot from a JSON file mapping each card number to its
+    [score, duration] pair.
+
+    Parameters:
+        path (str): The path of the snapshot file.
+
+    Returns:
+        dict[str, tuple[int, int]]: The credit score and duration of each card number.
+    """
+    with open(path, encoding="utf-8") as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    return {
+        card_number: (int(score), int(duration))
+        for card_number, (score, duration) in snapshot.items()
+    }
+
+
+class ScoreProvider:
+    """
+    A class to represent a single source of credit scores and its observed performance.
+
+    Attributes:
+        name (str): The name of the provider, used in the metrics.
+        default_hedge_delay (float): The hedge delay in seconds used until enough latency samples
+        have been collected.
+        min_samples (int): The number of latency samples needed before the p95 is used.
+        filtered (bool): Whether the provider only has scores for the cards passing the
+        membership filter of the lookup, so that it is skipped for the cards the filter rules out.
+        local (bool): Whether the provider answers from memory or a cache rather than the
+        database, so that the lookup runs it apart from the database calls.
+
+    Methods:
+        is_skipped: Return whether the filter rules out the provider, recording the skip.
+        fetch: Look up the credit score and duration of a card, recording the outcome.
+        hedge_delay: Return how long to wait for the provider before querying the next one.
+        record_win: Record that the provider's answer was used.
+        get_stats: Return the call counts and latency of the provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lookup: Callable[[str], tuple | None],
+        default_hedge_delay: float = 0.1,
+        min_samples: int = 20,
+        filtered: bool = False,
+        local: bool = False,
+    ) -> None:
+        self.name = name
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.filtered = filtered
+        self.local = local
+        self._lookup = lookup
+        self._lock = threading.Lock()
+        self._latencies: collections.deque = collections.deque(maxlen=256)
+        self._counters = {
+            "calls": 0,
+            "answers": 0,
+            "misses": 0,
+            "errors": 0,
+            "wins": 0,
+            "skipped": 0,
+        }
+
+    def is_skipped(self, may_have_score: bool) -> bool:
+        """
+        Return whether the membership filter of the lookup rules out the provider, in which case
+        the provider is not queried for the card.
+
+        Parameters:
+            may_have_score (bool): The answer of the membership filter for the card.
+
+        Returns:
+            bool: True if the provider definitely has no score for the card.
+        """
+        if not self.filtered or may_have_score:
+            return False
+        with self._lock:
+            self._counters["skipped"] += 1
+        return True
+
+    def fetch(self, credit_card_number: str) -> tuple | None:
+        """
+        Look up the credit score and duration of a card. Errors are logged and reported as no
+        answer, so that the next provider can be used.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            tuple | None: The credit score and duration, or None if the provider has no score for
+            the card or failed.
+        """
+        start = time.perf_counter()
+        outcome = "answers"
+        try:
+            result = self._lookup(credit_card_number)
+            if result is None:
+                outcome = "misses"
+            return result
+        except Exception as e:
+            outcome = "errors"
+            logging.error("Score provider %s failed: %s", self.name, e)
+            return None
+        finally:
+            with self._lock:
+                self._counters["calls"] += 1
+                self._counters[outcome] += 1
+                self._latencies.append(time.perf_counter() - start)
+
+    def hedge_delay(self) -> float:
+        """
+        Return how long to wait for the provider before querying the next one in parallel: the
+        p95 of its recent latencies, or the default delay until enough samples are collected.
+
+        Returns:
+            float: The hedge delay in seconds.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.default_hedge_delay
+            latencies = list(self._latencies)
+        return statistics.quantiles(latencies, n=20, method="inclusive")[18]
+
+    def record_win(self) -> None:
+        """Record that the provider's answer was used for the decision."""
+        with self._lock:
+            self._counters["wins"] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Return the call counts and the latency percentiles of the recent calls of the provider.
+
+        Returns:
+            dict: The statistics of the provider.
+        """
+        with self._lock:
+            stats: dict = dict(self._counters)
+            latencies = list(self._latencies)
+
+        if len(latencies) >= 2:
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            stats["latency_p50_ms"] = percentiles[49] * 1000
+            stats["latency_p95_ms"] = percentiles[94] * 1000
+        return stats
+
+
+class HedgedScoreLookup:
+    """
+    This class is responsible for looking up credit scores across an ordered list of providers.
+    Later providers are only queried when the earlier ones are slow, fail or have no score for the
+    card, so in the common case a lookup costs a single call to the first provider. Filtered
+    providers are skipped when the membership filter rules out the card.
+
+    Attributes:
+        providers (list[ScoreProvider]): The providers, in order of preference.
+        may_have_score (Callable[[str], bool] | None): The membership filter of the cards with a
+        score, called once per lookup, or None to query the providers for every card.
+
+    Methods:
+        lookup: Look up a score, hedging slow providers with the next ones in parallel.
+        lookup_in_order: Look up a score by trying each provider in turn, without hedging.
+        get_stats: Return the win rate and latency of each provider.
+    """
+
+    def __init__(
+        self,
+        providers: list[ScoreProvider],
+        may_have_score: Callable[[str], bool] | None = None,
+    ) -> None:
+        self.providers = providers
+        self.may_have_score = may_have_score
+        self._lock = threading.Lock()
+        self._lookups = 0
+
+    def _may_have_score(self, credit_card_number: str) -> bool:
+        """Return whether the card may have a score, asking the membership filter once."""
+        return self.may_have_score is None or self.may_have_score(credit_card_number)
+
+    async def lookup(
+        self,
+        credit_card_number: str,
+        run: Callable[..., Awaitable],
+        run_local: Callable[..., Awaitable] | None = None,
+    ) -> tuple | None:
+        """
+        Look up the credit score and duration of a card. The first provider is queried, and the
+        next one is queried in parallel as soon as the last one queried has not answered within
+        its hedge delay, or has failed. The first valid answer wins and the other calls are
+        cancelled.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            run: The coroutine function running a blocking provider call, such as an executor's
+            run method. Errors it raises count as a failed provider.
+            run_local: The coroutine function running the calls of the local providers, or None
+            to run them with run.
+
+        Returns:
+            tuple | None: The credit score and duration, or None if no provider answered.
+        """
+        with self._lock:
+            self._lookups += 1
+
+        may_have_score = self._may_have_score(credit_card_number)
+        in_flight: dict[asyncio.Future, ScoreProvider] = {}
+        remaining = (
+            provider for provider in self.providers if not provider.is_skipped(may_have_score)
+        )
+        hedge_at = 0.0
+
+        def query_next() -> bool:
+            nonlocal hedge_at
+            provider = next(remaining, None)
+            if provider is None:
+                return False
+            runner = run_local if provider.local and run_local is not None else run
+            in_flight[asyncio.ensure_future(runner(provider.fetch, credit_card_number))] = provider
+            hedge_at = time.perf_counter() + provider.hedge_delay()
+            return True
+
+        has_next = query_next()
+        try:
+            while in_flight:
+                timeout = max(0.0, hedge_at - time.perf_counter()) if has_next else None
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    has_next = query_next()
+                    continue
+
+                for future in done:
+                    provider = in_flight.pop(future)
+                    result = None
+                    if not future.cancelled() and future.exception() is None:
+                        result = future.result()
+                    if result is not None:
+                        provider.record_win()
+                        return result
+                    has_next = query_next()
+            return None
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def lookup_in_order(self, credit_card_number: str) -> tuple | None:
+        """
+        Look up the credit score and duration of a card by trying each provider in turn, for
+        callers outside the event loop.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+
+        Returns:
+            tuple | None: The credit score and duration, or None if no provider answered.
+        """
+        with self._lock:
+            self._lookups += 1
+
+        may_have_score = self._may_have_score(credit_card_number)
+        for provider in self.providers:
+            if provider.is_skipped(may_have_score):
+                continue
+            result = provider.fetch(credit_card_number)
+            if result is not None:
+                provider.record_win()
+                return result
+        return None
+
+    def get_stats(self) -> dict[str, dict]:
+        """
+        Return the statistics of each provider, with its win rate over all lookups.
+
+        Returns:
+            dict[str, dict]: The statistics of each provider, keyed by name.
+        """
+        with self._lock:
+            lookups = self._lookups
+
+        stats = {}
+        for provider in self.providers:
+            provider_stats = provider.get_stats()
+            provider_stats["win_rate"] = provider_stats["wins"] / lookups if lookups else 0.0
+            stats[provider.name] = provider_stats
+        return stats
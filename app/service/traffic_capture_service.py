@@ -0,0 +1,277 @@
+"""
+This module contains the TrafficCapture class and its ASGI middleware, which record a sample of the
+/check_credit requests to rotating JSON lines files, so that benchmarks can replay real traffic
+with its original timing. On the request path, a sampled request only has its body copied as it is
+received and enqueued with its arrival time; a background thread parses the form, tokenizes it and
+writes it. Card numbers and API keys are replaced by keyed tokens, so the same card always gets the
+same token: a token keeps the length of the card number and whether it passes the Luhn check, so
+replayed requests take the same validation path. CVVs are replaced by zeros, and names are
+redacted.
+
+Each line of a capture file is one request:
+    {"timestamp": 1792380347.32, "headers": {"x-request-timeout": "2"}, "form": {...}}
+
+Classes:
+    TrafficCapture
+    TrafficCaptureMiddleware
+
+Dependencies:
+    - hashlib: The hashlib module for the keyed tokens.
+    - hmac: The hmac module for the keyed tokens.
+    - json: The JSON module for writing the capture files.
+    - logging: The logging module for logging messages.
+    - os: The OS module for interacting with the operating system.
+    - queue: The queue module for handing requests to the background writer.
+    - random: The random module for sampling the requests.
+    - threading: The threading module for the background writer.
+    - time: The time module for the arrival times.
+    - urllib.parse: The urllib.parse module for parsing the URL-encoded form.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl
+
+_CAPTURED_HEADERS = (b"x-request-timeout", b"x-api-key")
+_REDACTED_FIELDS = ("first_name", "last_name")
+
+
+class TrafficCapture:
+    """
+    This class is responsible for sampling requests and writing them, tokenized, to rotating JSON
+    lines files from a background thread.
+
+    Attributes:
+        directory (str): The directory of the capture files.
+        sample_rate (float): The fraction of requests captured.
+        max_file_bytes (int): The size past which a new capture file is started.
+
+    Methods:
+        should_capture: Decide whether to capture a request.
+        enqueue: Hand a captured request to the background writer.
+        tokenize_card_number: Replace a card number by its keyed token.
+        close: Write the queued requests and stop the background writer.
+        get_stats: Return the counters of the capture.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float,
+        token_key: bytes,
+        max_file_bytes: int = 64 << 20,
+        max_queue: int = 10000,
+    ) -> None:
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_file_bytes = max_file_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._token_key = token_key
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._file_bytes = 0
+        self._counters = {"captured": 0, "dropped": 0, "skipped": 0, "files": 0}
+        self._writer = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._writer.start()
+
+    def should_capture(self) -> bool:
+        """
+        Decide whether to capture a request, at the sample rate.
+
+        Returns:
+            bool: Whether the request is captured.
+        """
+        return random.random() < self.sample_rate
+
+    def enqueue(self, timestamp: float, headers: dict[bytes, bytes], body: bytes) -> None:
+        """
+        Hand a captured request to the background writer. The request is dropped if the writer
+        has fallen behind.
+
+        Parameters:
+            timestamp (float): The arrival time of the request, as a UNIX timestamp.
+            headers (dict[bytes, bytes]): The request headers.
+            body (bytes): The URL-encoded form.
+        """
+        try:
+            self._queue.put_nowait((timestamp, headers, body))
+        except queue.Full:
+            self._counters["dropped"] += 1
+
+    def _tokenize(self, value: str) -> bytes:
+        """Return the keyed digest of a value."""
+        return hmac.new(self._token_key, value.encode(), hashlib.sha256).digest()
+
+    def tokenize_card_number(self, credit_card_number: str) -> str:
+        """
+        Replace the digits of a card number by keyed pseudo-random digits. A number of digits
+        keeps its length, and its check digit is chosen so that the token passes the Luhn check
+        exactly when the card number does.
+
+        Parameters:
+            credit_card_number (str): The credit card number.
+
+        Returns:
+            str: The token of the card number.
+        """
+        digest = self._tokenize(credit_card_number)
+        while len(digest) < len(credit_card_number):
+            digest += self._tokenize(digest.hex())
+        token = "".join(
+            str(digest[index] % 10) if character.isdigit() else character
+            for index, character in enumerate(credit_card_number)
+        )
+        if not credit_card_number.isdigit() or len(credit_card_number) < 2:
+            return token
+
+        def luhn_total(number: str) -> int:
+            total = 0
+            for position, digit in enumerate(reversed(number)):
+                value = int(digit) * (2 if position % 2 else 1)
+                total += value - 9 if value > 9 else value
+            return total % 10
+
+        payload = token[:-1]
+        check_digit = (10 - luhn_total(payload + "0")) % 10
+        if luhn_total(credit_card_number) != 0:
+            check_digit = (check_digit + 1) % 10
+        return payload + str(check_digit)
+
+    def _build_record(self, timestamp: float, headers: dict[bytes, bytes], body: bytes) -> dict:
+        """Parse and tokenize a captured request."""
+        form = dict(parse_qsl(body.decode("latin-1"), keep_blank_values=True))
+        if "credit_card_number" in form:
+            form["credit_card_number"] = self.tokenize_card_number(form["credit_card_number"])
+        if "cvv" in form:
+            form["cvv"] = "0" * len(form["cvv"])
+        for field in _REDACTED_FIELDS:
+            if field in form:
+                form[field] = "redacted"
+
+        captured_headers = {}
+        for name in _CAPTURED_HEADERS:
+            if name in headers:
+                value = headers[name].decode("latin-1")
+                if name == b"x-api-key":
+                    value = self._tokenize(value).hex()[:16]
+                captured_headers[name.decode()] = value
+        return {"timestamp": timestamp, "headers": captured_headers, "form": form}
+
+    def _write(self, line: str) -> None:
+        """Write a line to the current capture file, starting a new file when it is full."""
+        if self._file is None or self._file_bytes >= self.max_file_bytes:
+            if self._file is not None:
+                self._file.close()
+            path = os.path.join(
+                self.directory,
+                f"capture-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}"
+                f"-{os.getpid()}-{self._counters['files']}.jsonl",
+            )
+            self._file = open(path, "a", encoding="utf-8")
+            self._file_bytes = 0
+            self._counters["files"] += 1
+        self._file.write(line)
+        self._file_bytes += len(line)
+
+    def _run(self) -> None:
+        """Write the captured requests, flushing whenever the queue is drained."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(json.dumps(self._build_record(*item)) + "\n")
+                self._counters["captured"] += 1
+            except Exception as e:
+                self._counters["skipped"] += 1
+                logging.warning("Failed to capture a request: %s", e)
+            if self._queue.empty() and self._file is not None:
+                self._file.flush()
+        if self._file is not None:
+            self._file.close()
+
+    def close(self) -> None:
+        """Write the queued requests and stop the background writer."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Return the requests captured, dropped because the writer fell behind, and skipped because
+        they could not be parsed, and the number of capture files started.
+
+        Returns:
+            dict[str, int]: The counters of the capture.
+        """
+        return {**self._counters, "queued": self._queue.qsize()}
+
+
+class TrafficCaptureMiddleware:
+    """
+    An ASGI middleware capturing a sample of the URL-encoded POST requests to /check_credit. A
+    request is only captured once, even when the middleware wraps several layers of the
+    application.
+
+    Attributes:
+        app: The wrapped ASGI application.
+        capture (TrafficCapture): The capture writing the sampled requests.
+
+    Methods:
+        __call__: Handle an ASGI connection.
+    """
+
+    def __init__(self, app, capture: TrafficCapture) -> None:
+        self.app = app
+        self.capture = capture
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        """
+        Handle an ASGI connection, copying the body of a sampled credit check request as the
+        wrapped application receives it, and enqueueing it once complete.
+        """
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] != "/check_credit"
+            or "traffic_capture" in scope
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        scope["traffic_capture"] = True
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").split(b";", 1)[0].strip()
+        if (
+            content_type != b"application/x-www-form-urlencoded"
+            or not self.capture.should_capture()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        timestamp = time.time()
+        chunks: list[bytes] = []
+
+        async def receive_and_copy() -> dict:
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.capture.enqueue(timestamp, headers, b"".join(chunks))
+            return message
+
+        await self.app(scope, receive_and_copy, send)
@@ -0,0 +1,267 @@
+"""
+This module contains the TransactionHistory class which is responsible for looking up the recorded
+transactions of a card and exporting the transactions of a time range for reconciliation. Both are
+paged with keyset pagination on (created_at, id): each page continues after the last row of the
+previous one instead of skipping an offset, so deep pages cost the same as the first. Lookups
+return an opaque cursor for the next page, and exports stream the range page by page as NDJSON or
+CSV, holding a single page in memory. The first page of each card's history, its most recent
+transactions, is cached for a short time, since the same card tends to be looked up repeatedly.
+Since both expose card numbers and the whole ledger, every request must present the admin token.
+
+Classes:
+    TransactionHistory
+
+Dependencies:
+    - base64: The base64 module for encoding the cursors.
+    - csv: The csv module for the CSV export.
+    - datetime: The datetime module for the bounds of the exported range.
+    - hmac: The hmac module for comparing the admin token in constant time.
+    - io: The io module for writing CSV rows to strings.
+    - json: The json module for the cursors and the NDJSON export.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for the expiry of the cached pages.
+    - collections: The collections module for the least recently used cache.
+    - typing: The typing module for type hints.
+    - HTTPException: The exception class for handling HTTP errors.
+"""
+
+import base64
+import csv
+import datetime
+import hmac
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator
+from fastapi import HTTPException
+
+# The fields of the exported transactions, in the order of the CSV columns
+EXPORT_FIELDS = ("id", "created_at", "card_number", "approved?", "error_codes")
+
+# The largest page a card lookup may ask for
+MAX_PAGE_SIZE = 500
+
+
+class TransactionHistory:
+    """
+    This class is responsible for paging through the transactions of a card and exporting the
+    transactions of a time range.
+
+    Attributes:
+        query_card_page (Callable): Returns the transactions of a card, newest first, before a
+        (created_at, id) key or from the newest for None, limited to a page size.
+        query_range_page (Callable): Returns the transactions created in [start, end), oldest
+        first, after a (created_at, id) key or from the start for None, limited to a page size.
+        export_page_size (int): The number of transactions queried per page of an export.
+        cache_max_entries (int): The maximum number of cached pages, 0 to disable the cache.
+        cache_ttl_seconds (float): The time a cached page is kept.
+        admin_token (str): The token the requests must present.
+
+    Methods:
+        authorize: Check the admin token presented by a request.
+        get_card_history: Return a page of the transactions of a card and the next cursor.
+        export_transactions: Stream the transactions of a time range as NDJSON or CSV.
+        get_stats: Return the lookups, cache hits and exported transactions.
+    """
+
+    def __init__(
+        self,
+        query_card_page: Callable[[str, int, tuple[str, int] | None], list[dict]],
+        query_range_page: Callable[[str, str, int, tuple[str, int] | None], list[dict]],
+        admin_token: str,
+        export_page_size: int = 1000,
+        cache_max_entries: int = 10000,
+        cache_ttl_seconds: float = 5.0,
+    ) -> None:
+        self.query_card_page = query_card_page
+        self.query_range_page = query_range_page
+        self.admin_token = admin_token
+        self.export_page_size = export_page_size
+        self.cache_max_entries = cache_max_entries
+        self.cache_ttl_seconds = cache_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, int], tuple[float, dict]] = OrderedDict()
+        self._counters = {
+            "unauthorized": 0,
+            "card_lookups": 0,
+            "cache_hits": 0,
+            "exports": 0,
+            "exported_transactions": 0,
+        }
+
+    def authorize(self, token: str | None) -> None:
+        """
+        Check the admin token presented by a request.
+
+        Parameters:
+            token (str | None): The token of the request, None if it has none.
+
+        Raises:
+            HTTPException: The token is missing or wrong.
+        """
+        if token is not None and hmac.compare_digest(token.encode(), self.admin_token.encode()):
+            return
+        with self._lock:
+            self._counters["unauthorized"] += 1
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    @staticmethod
+    def _encode_cursor(row: dict) -> str:
+        """Return the opaque cursor continuing after a transaction."""
+        key = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[str, int]:
+        """
+        Return the (created_at, id) key of a cursor.
+
+        Raises:
+            HTTPException: The cursor was not returned by a previous lookup.
+        """
+        try:
+            created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            datetime.datetime.fromisoformat(created_at)
+            if type(row_id) is not int:
+                raise TypeError
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return created_at, row_id
+
+    def _get_cached(self, key: tuple[str, int]) -> dict | None:
+        """Return the unexpired cached page of a key, counting the hit."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self._counters["cache_hits"] += 1
+            return entry[1]
+
+    def _set_cached(self, key: tuple[str, int], page: dict) -> None:
+        """Cache a page, evicting the least recently used one when full."""
+        if self.cache_max_entries <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl_seconds, page)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def get_card_history(
+        self, credit_card_number: str, limit: int, cursor: str | None = None
+    ) -> dict:
+        """
+        Return a page of the transactions of a card, newest first. The first page is served from
+        the cache when it was looked up less than cache_ttl_seconds ago, so it may miss the most
+        recent transactions for that long.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the user.
+            limit (int): The maximum number of transactions of the page.
+            cursor (str | None): The next_cursor of the previous page, or None for the newest
+            transactions.
+
+        Returns:
+            dict: The transactions of the page, and the cursor of the next page, None on the last
+            page.
+
+        Raises:
+            HTTPException: The cursor is invalid.
+        """
+        with self._lock:
+            self._counters["card_lookups"] += 1
+
+        key = (credit_card_number, limit)
+        if cursor is None:
+            page = self._get_cached(key)
+            if page is not None:
+                return page
+
+        before = None if cursor is None else self._decode_cursor(cursor)
+        rows = self.query_card_page(credit_card_number, limit, before)
+        page = {
+            "transactions": rows,
+            "next_cursor": self._encode_cursor(rows[-1]) if len(rows) == limit else None,
+        }
+        if cursor is None:
+            self._set_cached(key, page)
+        return page
+
+    def export_transactions(
+        self, start: datetime.datetime, end: datetime.datetime, export_format: str = "ndjson"
+    ) -> Iterator[str]:
+        """
+        Stream the transactions created in [start, end), oldest first, one page at a time. Naive
+        bounds are taken as UTC. A query failing mid-export is raised, ending the stream early.
+
+        Parameters:
+            start (datetime.datetime): The start of the range, included.
+            end (datetime.datetime): The end of the range, excluded.
+            export_format (str): "ndjson" for one JSON object per line, or "csv" for a header
+            row followed by one row per transaction.
+
+        Returns:
+            Iterator[str]: The chunks of the export, one per page.
+
+        Raises:
+            HTTPException: The range is empty or the format is unknown.
+        """
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=datetime.timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=datetime.timezone.utc)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start must be before end")
+        if export_format not in ("ndjson", "csv"):
+            raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+        with self._lock:
+            self._counters["exports"] += 1
+        return self._export_pages(start.isoformat(), end.isoformat(), export_format)
+
+    def _export_pages(self, start: str, end: str, export_format: str) -> Iterator[str]:
+        """Yield the pages of an export, formatted."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_FIELDS)
+
+        after = None
+        while True:
+            rows = self.query_range_page(start, end, self.export_page_size, after)
+            for row in rows:
+                if export_format == "csv":
+                    writer.writerow([row.get(field) for field in EXPORT_FIELDS])
+                else:
+                    buffer.write(json.dumps(row, separators=(",", ":")))
+                    buffer.write("\n")
+            with self._lock:
+                self._counters["exported_transactions"] += len(rows)
+
+            chunk = buffer.getvalue()
+            if chunk:
+                yield chunk
+            buffer.seek(0)
+            buffer.truncate()
+
+            if len(rows) < self.export_page_size:
+                return
+            after = (rows[-1]["created_at"], rows[-1]["id"])
+
+    def get_stats(self) -> dict:
+        """
+        Return the requests rejected for their admin token, the card lookups made and served from
+        the cache, the cached pages, and the exports and transactions exported.
+
+        Returns:
+            dict: The statistics of the transaction history.
+        """
+        with self._lock:
+            return {**self._counters, "cached_pages": len(self._cache)}
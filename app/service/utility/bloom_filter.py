@@ -0,0 +1,96 @@
+"""
+This module contains the BloomFilter class which is responsible for answering set membership in a
+fixed amount of memory. An item is hashed once and the positions of its bits are derived from two
+halves of the digest by double hashing. Items that were added are always reported as present;
+items that were not are reported as absent except at the configured false positive rate.
+
+Classes:
+    BloomFilter
+
+Dependencies:
+    - hashlib: The hashlib module for hashing the items.
+    - math: The math module for sizing the filter.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    A Bloom filter of strings sized for a number of items and a false positive rate.
+
+    Attributes:
+        capacity (int): The number of items the filter is sized for.
+        false_positive_rate (float): The false positive rate at capacity.
+        bit_count (int): The number of bits of the filter.
+        hash_count (int): The number of bits set per item.
+        count (int): The number of items added.
+
+    Methods:
+        add: Add an item to the filter.
+        __contains__: Return whether an item may have been added.
+        size_bytes: Return the memory used by the bits of the filter.
+        estimated_false_positive_rate: Return the false positive rate at the current fill.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.bit_count = max(
+            8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        """Return the positions of the bits of an item."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.bit_count for index in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        """
+        Add an item to the filter.
+
+        Parameters:
+            item (str): The item to add.
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """
+        Return whether an item may have been added. False means it was definitely not added.
+
+        Parameters:
+            item (str): The item to look up.
+
+        Returns:
+            bool: Whether the item may have been added.
+        """
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def size_bytes(self) -> int:
+        """
+        Return the memory used by the bits of the filter.
+
+        Returns:
+            int: The size of the filter in bytes.
+        """
+        return len(self._bits)
+
+    def estimated_false_positive_rate(self) -> float:
+        """
+        Return the expected false positive rate for the number of items added so far.
+
+        Returns:
+            float: The expected false positive rate.
+        """
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
@@ -0,0 +1,197 @@
+"""
+This module contains the BoundedExecutor class which is responsible for running blocking calls on a
+dedicated thread pool with a bounded queue. Calls submitted while every thread is busy and the queue
+is full are rejected instead of queueing without limit, and the executor keeps metrics on queue wait
+time, active threads and rejections. An adaptive concurrency limit can further bound the calls in
+flight, learning from the latency of the completed calls how many the dependency can serve before
+it starts queueing them itself.
+
+Classes:
+    ExecutorSaturatedError
+    BoundedExecutor
+
+Dependencies:
+    - asyncio: The asyncio module for awaiting calls from the event loop.
+    - collections: The collections module for the recent queue wait samples.
+    - concurrent.futures: The concurrent.futures module for the thread pool.
+    - functools: The functools module for binding call arguments.
+    - statistics: The statistics module for the queue wait percentiles.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for measuring queue wait time.
+    - GradientConcurrencyLimit: The adaptive limit on the calls in flight.
+"""
+
+import asyncio
+import collections
+import functools
+import statistics
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.service.utility.concurrency_limit import GradientConcurrencyLimit
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a call is submitted while every thread is busy and the queue is full."""
+
+
+class BoundedExecutor:
+    """
+    A class to run blocking calls on a dedicated thread pool of `max_workers` threads, with at most
+    `max_queue` calls waiting for a thread, and at most `concurrency_limit` calls in flight if an
+    adaptive limit is given.
+
+    Attributes:
+        name (str): The name of the executor, used as the thread name prefix.
+        max_workers (int): The number of threads of the pool.
+        max_queue (int): The number of calls allowed to wait for a thread.
+        concurrency_limit (GradientConcurrencyLimit | None): The adaptive limit on the calls in
+        flight, updated from the time each call takes from submission to completion.
+
+    Methods:
+        submit: Submit a blocking call, raising ExecutorSaturatedError when full.
+        run: Run a blocking call from the event loop and await its result.
+        get_stats: Return the saturation metrics of the executor.
+        shutdown: Shut the pool down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        concurrency_limit: GradientConcurrencyLimit | None = None,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.concurrency_limit = concurrency_limit
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_waits: collections.deque = collections.deque(maxlen=1024)
+
+    def submit(self, func, *args) -> Future:
+        """
+        Submit a blocking call to the pool.
+
+        Parameters:
+            func: The blocking function to call.
+            *args: The arguments of the function.
+
+        Returns:
+            Future: The future of the call.
+
+        Raises:
+            ExecutorSaturatedError: Every thread is busy and the queue is full, or the concurrency
+            limit is reached.
+        """
+        capacity = self.max_workers + self.max_queue
+        if self.concurrency_limit is not None:
+            capacity = min(capacity, self.concurrency_limit.get_limit())
+        with self._lock:
+            if self._pending >= capacity:
+                self._rejected += 1
+                raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+        future = self._pool.submit(self._run_measured, submitted_at, func, *args)
+        future.add_done_callback(functools.partial(self._release, submitted_at))
+        return future
+
+    async def run(self, func, *args):
+        """
+        Run a blocking call on the pool from the event loop. Cancelling the awaiting task removes
+        the call from the queue if it has not started yet.
+
+        Parameters:
+            func: The blocking function to call.
+            *args: The arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+
+        Raises:
+            ExecutorSaturatedError: Every thread is busy and the queue is full.
+        """
+        return await asyncio.wrap_future(self.submit(functools.partial(func, *args)))
+
+    def _run_measured(self, submitted_at: float, func, *args):
+        """
+        Run the call on a pool thread, recording how long it waited in the queue.
+
+        Parameters:
+            submitted_at (float): The perf_counter timestamp of the submission.
+            func: The blocking function to call.
+            *args: The arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        with self._lock:
+            self._queue_waits.append(time.perf_counter() - submitted_at)
+            self._active += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def _release(self, submitted_at: float, future: Future) -> None:
+        """
+        Release the capacity held by a call once it has completed or been cancelled, and update
+        the concurrency limit from the time a completed call took.
+
+        Parameters:
+            submitted_at (float): The perf_counter timestamp of the submission.
+            future (Future): The future of the call.
+        """
+        with self._lock:
+            in_flight = self._pending
+            self._pending -= 1
+
+        if self.concurrency_limit is not None and not future.cancelled():
+            self.concurrency_limit.on_sample(
+                time.perf_counter() - submitted_at,
+                in_flight,
+                failed=future.exception() is not None,
+            )
+
+    def get_stats(self) -> dict:
+        """
+        Return the saturation metrics of the executor: active threads, queued calls, completed and
+        rejected calls, the queue wait time of the recent calls, and the concurrency limit with its
+        round trip time estimates if it is adaptive.
+
+        Returns:
+            dict: The metrics of the executor.
+        """
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            stats = {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active_threads": self._active,
+                "queued": self._pending - self._active,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+        if len(waits) >= 2:
+            percentiles = statistics.quantiles(waits, n=100, method="inclusive")
+            stats["queue_wait_p50_ms"] = percentiles[49] * 1000
+            stats["queue_wait_p99_ms"] = percentiles[98] * 1000
+        stats["queue_wait_max_ms"] = waits[-1] * 1000 if waits else 0.0
+        stats["concurrency_limit"] = (
+            self.concurrency_limit.get_stats() if self.concurrency_limit is not None else None
+        )
+        return stats
+
+    def shutdown(self) -> None:
+        """Shut the pool down, waiting for the running calls to complete."""
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,164 @@
+"""
+This module contains the GradientConcurrencyLimit class which is responsible for finding the number
+of concurrent calls to a dependency that maximizes throughput without inflating latency. It
+compares the recent round trip time of the calls with the round trip time of the dependency when
+it is not loaded: while the recent RTT stays within a tolerance of the unloaded RTT the dependency
+is keeping up, and the limit grows by about its square root per sample; once calls start queueing
+in the dependency the recent RTT rises, and the limit shrinks in proportion. Failed calls cut the
+limit multiplicatively, as in AIMD.
+
+The unloaded RTT is measured passively, as the minimum RTT of the calls of the last one to two
+windows: the fastest call of a window is one that did not queue in the dependency, so no calls
+need to be held back to measure it. The minimum of the older window is forgotten at each new
+window, which lets the reference follow the dependency when its latency changes for good.
+
+Classes:
+    GradientConcurrencyLimit
+
+Dependencies:
+    - math: The math module for the growth of the limit.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for the windows of the unloaded RTT.
+"""
+
+import math
+import threading
+import time
+
+
+class GradientConcurrencyLimit:
+    """
+    A class to represent an adaptive limit on the concurrent calls to a dependency, updated from
+    the round trip time of each completed call.
+
+    Attributes:
+        min_limit (int): The lowest limit.
+        max_limit (int): The highest limit.
+        tolerance (float): The ratio of the recent to the unloaded RTT tolerated before the limit
+        shrinks.
+        smoothing (float): The weight of each new limit estimate.
+        backoff_ratio (float): The factor the limit is multiplied by after a failed call.
+        rtt_window (float): The seconds of each window the minimum RTT is taken over.
+
+    Methods:
+        get_limit: Return the current limit.
+        on_sample: Update the limit from a completed call.
+        get_stats: Return the limit and the RTT estimates.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        tolerance: float = 1.25,
+        smoothing: float = 0.2,
+        backoff_ratio: float = 0.9,
+        short_window: int = 10,
+        rtt_window: float = 60.0,
+    ) -> None:
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Concurrency limits must satisfy 1 <= min <= initial <= max")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff_ratio = backoff_ratio
+        self.rtt_window = rtt_window
+
+        self._short_weight = 2 / (short_window + 1)
+        self._lock = threading.Lock()
+        self._limit = float(initial_limit)
+        self._short_rtt = 0.0
+        self._window_min_rtt = math.inf
+        self._previous_min_rtt = math.inf
+        self._window_end: float | None = None
+        self._counters = {"samples": 0, "failures": 0, "windows": 0}
+
+    def get_limit(self) -> int:
+        """
+        Return the current limit on the concurrent calls.
+
+        Returns:
+            int: The limit.
+        """
+        return int(self._limit)
+
+    def _unloaded_rtt(self) -> float | None:
+        """Return the minimum RTT of the current and previous windows, or None before the first
+        sample. Must be called with the lock held."""
+        rtt = min(self._window_min_rtt, self._previous_min_rtt)
+        return rtt if rtt < math.inf else None
+
+    def _record_rtt(self, rtt: float, now: float) -> None:
+        """Record the RTT of a call in the minimum of its window, starting a new window once the
+        current one has ended. Must be called with the lock held."""
+        if self._window_end is None:
+            self._window_end = now + self.rtt_window
+        elif now >= self._window_end:
+            self._counters["windows"] += 1
+            # A window without calls carries nothing over, so an idle period does not keep a
+            # stale minimum
+            skipped = now >= self._window_end + self.rtt_window
+            self._previous_min_rtt = math.inf if skipped else self._window_min_rtt
+            self._window_min_rtt = math.inf
+            self._window_end = now + self.rtt_window
+        self._window_min_rtt = min(self._window_min_rtt, rtt)
+
+    def on_sample(
+        self, rtt: float, in_flight: int, failed: bool = False, now: float | None = None
+    ) -> None:
+        """
+        Update the limit from a completed call. The limit is not raised while fewer than half of
+        the allowed calls are in flight, since the samples then say nothing about a higher limit.
+
+        Parameters:
+            rtt (float): The round trip time of the call in seconds.
+            in_flight (int): The number of calls in flight when the call completed, itself included.
+            failed (bool): Whether the call failed.
+            now (float | None): The current monotonic time, defaults to time.monotonic().
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            self._counters["samples"] += 1
+            if failed:
+                self._counters["failures"] += 1
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                return
+
+            self._record_rtt(rtt, now)
+            if self._short_rtt <= 0:
+                self._short_rtt = rtt
+            self._short_rtt += (rtt - self._short_rtt) * self._short_weight
+            if in_flight < self._limit / 2 or self._short_rtt <= 0:
+                return
+
+            unloaded_rtt = self._unloaded_rtt()
+            gradient = max(0.5, min(1.0, self.tolerance * unloaded_rtt / self._short_rtt))
+            estimate = self._limit * gradient + math.sqrt(self._limit)
+            self._limit = min(
+                self.max_limit,
+                max(self.min_limit, self._limit + (estimate - self._limit) * self.smoothing),
+            )
+
+    def get_stats(self) -> dict:
+        """
+        Return the current limit, the recent and unloaded RTT estimates, and the samples,
+        failures and RTT windows observed.
+
+        Returns:
+            dict: The statistics of the limit.
+        """
+        with self._lock:
+            unloaded_rtt = self._unloaded_rtt()
+            return {
+                **self._counters,
+                "limit": int(self._limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "short_rtt_ms": self._short_rtt * 1000,
+                "unloaded_rtt_ms": unloaded_rtt * 1000 if unloaded_rtt is not None else None,
+            }
@@ -0,0 +1,202 @@
+"""
+This module contains the ConsistentHashRing class which is responsible for mapping keys, such as
+card numbers, to a stable node out of a changing set of nodes. Each node is placed on a hash ring at
+many virtual points, and a key belongs to the first node found clockwise from its own hash, so
+adding or removing a node only moves the keys of the arcs that node gains or loses, about 1/n of
+them. Lookups can bound the load of the nodes: a node already serving more than load_factor times
+the average number of in-flight requests is passed over for the next node on the ring, which keeps
+a hot key from overloading its node while every other key stays where it is.
+
+Classes:
+    ConsistentHashRing
+
+Dependencies:
+    - bisect: The bisect module for finding the position of a key on the ring.
+    - hashlib: The hashlib module for hashing the keys and the virtual points.
+    - math: The math module for rounding the load bound.
+    - threading: The threading module for guarding shared state.
+"""
+
+import bisect
+import hashlib
+import math
+import threading
+
+
+def _hash(value: str) -> int:
+    """Return the position of a value on the ring, the same in every process."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """
+    A class to represent a consistent hash ring of nodes with bounded loads.
+
+    Attributes:
+        virtual_nodes (int): The number of points of each node on the ring.
+        load_factor (float): The number of in-flight requests a node may serve, as a multiple of
+        the average, before keys are passed on to the next node. Must be greater than 1.
+
+    Methods:
+        add: Add a node to the ring.
+        remove: Remove a node from the ring.
+        get_nodes: Return the nodes of the ring.
+        get_node: Return the node of a key, regardless of load.
+        acquire: Return the node of a key under the load bound, counting a request on it.
+        release: Count the end of a request on a node.
+        get_stats: Return the load and the requests of each node.
+    """
+
+    def __init__(
+        self, nodes: tuple[str, ...] = (), virtual_nodes: int = 160, load_factor: float = 1.25
+    ) -> None:
+        if load_factor <= 1:
+            raise ValueError("load_factor must be greater than 1")
+
+        self.virtual_nodes = virtual_nodes
+        self.load_factor = load_factor
+
+        self._lock = threading.Lock()
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self._loads: dict[str, int] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        """
+        Add a node to the ring at its virtual points. Adding a node already on the ring does
+        nothing.
+
+        Parameters:
+            node (str): The node.
+        """
+        with self._lock:
+            if node in self._loads:
+                return
+            self._loads[node] = 0
+            self._counters.setdefault(node, {"requests": 0, "overflow": 0})
+            for replica in range(self.virtual_nodes):
+                point = _hash(f"{node}#{replica}")
+                index = bisect.bisect(self._points, point)
+                self._points.insert(index, point)
+                self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        """
+        Remove a node and its virtual points from the ring. Its keys move to the nodes following
+        its points, and the keys of the other nodes stay where they are.
+
+        Parameters:
+            node (str): The node.
+        """
+        with self._lock:
+            if self._loads.pop(node, None) is None:
+                return
+            kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+            self._points = [point for point, _ in kept]
+            self._owners = [owner for _, owner in kept]
+
+    def get_nodes(self) -> list[str]:
+        """
+        Return the nodes of the ring.
+
+        Returns:
+            list[str]: The nodes, in the order they were added.
+        """
+        with self._lock:
+            return list(self._loads)
+
+    def _walk(self, key: str):
+        """Yield the distinct nodes clockwise from the position of a key. Must be called with the
+        lock held."""
+        start = bisect.bisect(self._points, _hash(key))
+        seen: set[str] = set()
+        for offset in range(len(self._points)):
+            owner = self._owners[(start + offset) % len(self._points)]
+            if owner not in seen:
+                seen.add(owner)
+                yield owner
+                if len(seen) == len(self._loads):
+                    return
+
+    def get_node(self, key: str) -> str | None:
+        """
+        Return the node of a key, regardless of load.
+
+        Parameters:
+            key (str): The key.
+
+        Returns:
+            str | None: The node, or None if the ring is empty.
+        """
+        with self._lock:
+            return next(self._walk(key), None)
+
+    def acquire(self, key: str | None, exclude: frozenset[str] = frozenset()) -> str | None:
+        """
+        Return the node of a key under the load bound, and count a request in flight on it. The
+        first node clockwise from the key serving fewer than
+        ceil(load_factor * (in-flight requests + 1) / nodes) requests is chosen, so the load of
+        every node stays within load_factor of the average. A request without a key goes to the
+        least loaded node. Every acquired node must be released.
+
+        Parameters:
+            key (str | None): The key, or None for a request without affinity.
+            exclude (frozenset[str]): Nodes not to choose, such as nodes that already failed the
+            request.
+
+        Returns:
+            str | None: The node, or None if no node is left to choose.
+        """
+        with self._lock:
+            candidates = [node for node in self._loads if node not in exclude]
+            if not candidates:
+                return None
+
+            if key is None:
+                node = min(candidates, key=self._loads.__getitem__)
+            else:
+                bound = math.ceil(
+                    self.load_factor * (sum(self._loads.values()) + 1) / len(self._loads)
+                )
+                node = None
+                for owner in self._walk(key):
+                    if owner in exclude:
+                        continue
+                    if self._loads[owner] < bound:
+                        node = owner
+                        break
+                    self._counters[owner]["overflow"] += 1
+                if node is None:
+                    node = min(candidates, key=self._loads.__getitem__)
+
+            self._loads[node] += 1
+            self._counters[node]["requests"] += 1
+            return node
+
+    def release(self, node: str) -> None:
+        """
+        Count the end of a request on a node acquired with acquire.
+
+        Parameters:
+            node (str): The node.
+        """
+        with self._lock:
+            if self._loads.get(node, 0) > 0:
+                self._loads[node] -= 1
+
+    def get_stats(self) -> list[dict]:
+        """
+        Return, for each node on the ring, its in-flight requests, the requests routed to it, and
+        the requests passed over it because it was at the load bound.
+
+        Returns:
+            list[dict]: The statistics of each node.
+        """
+        with self._lock:
+            return [
+                {"node": node, "in_flight": load, **self._counters[node]}
+                for node, load in self._loads.items()
+            ]
@@ -0,0 +1,77 @@
+"""
+This module contains the EventLoopLagMonitor class which is responsible for measuring how late the
+event loop runs scheduled callbacks. A monitor task sleeps for a fixed interval and records how much
+longer than the interval it actually took to wake up. Sustained lag means the loop is CPU bound or
+blocked, as opposed to waiting on the database.
+
+Classes:
+    EventLoopLagMonitor
+
+Dependencies:
+    - asyncio: The asyncio module for the monitor task.
+    - time: The time module for measuring the lag.
+"""
+
+import asyncio
+import time
+
+
+class EventLoopLagMonitor:
+    """
+    A class to measure the lag of the event loop it is started on.
+
+    Attributes:
+        interval (float): The number of seconds between two measurements.
+        ewma_alpha (float): The weight of the newest sample in the lag moving average.
+
+    Methods:
+        start: Start the monitor task on the running event loop.
+        stop: Stop the monitor task.
+        get_stats: Return the latest, average and maximum lag.
+    """
+
+    def __init__(self, interval: float = 0.5, ewma_alpha: float = 0.2) -> None:
+        self.interval = interval
+        self.ewma_alpha = ewma_alpha
+        self._task: asyncio.Task | None = None
+        self._last_lag = 0.0
+        self._lag_ewma = 0.0
+        self._max_lag = 0.0
+
+    def start(self) -> None:
+        """Start the monitor task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._monitor())
+
+    async def stop(self) -> None:
+        """Stop the monitor task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _monitor(self) -> None:
+        """Sleep for the interval in a loop, recording how late each wake-up is."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self._last_lag = lag
+            self._lag_ewma += self.ewma_alpha * (lag - self._lag_ewma)
+            self._max_lag = max(self._max_lag, lag)
+
+    def get_stats(self) -> dict:
+        """
+        Return the latest, average and maximum lag of the event loop.
+
+        Returns:
+            dict: The lag of the event loop in milliseconds.
+        """
+        return {
+            "lag_ms": self._last_lag * 1000,
+            "lag_ewma_ms": self._lag_ewma * 1000,
+            "lag_max_ms": self._max_lag * 1000,
+        }
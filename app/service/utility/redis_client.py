@@ -0,0 +1,149 @@
+"""
+This module contains a minimal client for servers speaking the Redis protocol (RESP). Commands are
+sent in pipelines: every command of a call is written in a single send, and the replies are read
+back in order, so a multi-key call costs one round trip. Connections are pooled, and every read is
+bounded by the client timeout. A connection that fails or times out is closed rather than reused.
+
+Classes:
+    RedisResponseError
+    RedisClient
+
+Dependencies:
+    - queue: The queue module for the connection pool.
+    - socket: The socket module for the connections.
+    - urllib.parse: The urllib.parse module for parsing redis:// URLs.
+"""
+
+import queue
+import socket
+from urllib.parse import urlparse
+
+
+class RedisResponseError(Exception):
+    """An error reply of the server to a command."""
+
+
+class RedisClient:
+    """
+    A client for a server speaking the Redis protocol, such as Redis, Valkey or KeyDB.
+
+    Attributes:
+        host (str): The host of the server.
+        port (int): The port of the server.
+        password (str | None): The password sent with AUTH, if any.
+        db (int): The database selected on each connection.
+        timeout (float): The maximum time in seconds to connect, or to wait for each reply.
+
+    Methods:
+        pipeline: Send commands in a single round trip and return their replies.
+        close: Close the pooled connections.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.01, max_idle_connections: int = 16) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=max_idle_connections)
+
+    @staticmethod
+    def _encode(command: tuple) -> bytes:
+        """Encode a command as a RESP array of bulk strings."""
+        parts = [b"*%d\r\n" % len(command)]
+        for argument in command:
+            value = argument if isinstance(argument, bytes) else str(argument).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(value), value))
+        return b"".join(parts)
+
+    @staticmethod
+    def _read_reply(reader) -> object:
+        """
+        Read one reply. Error replies are returned as RedisResponseError instances, so that the
+        other replies of the pipeline can still be read.
+        """
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the server")
+        kind, value = line[:1], line[1:-2]
+        if kind == b"+":
+            return value.decode()
+        if kind == b"-":
+            return RedisResponseError(value.decode())
+        if kind == b":":
+            return int(value)
+        if kind == b"$":
+            length = int(value)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(value)
+            if length < 0:
+                return None
+            return [RedisClient._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the server: {line!r}")
+
+    def _connect(self) -> tuple[socket.socket, object]:
+        """Open a connection, authenticating and selecting the database if needed."""
+        connection = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = connection.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            connection.sendall(b"".join(self._encode(command) for command in setup))
+            for _ in setup:
+                reply = self._read_reply(reader)
+                if isinstance(reply, RedisResponseError):
+                    connection.close()
+                    raise reply
+        return connection, reader
+
+    def pipeline(self, commands: list[tuple]) -> list:
+        """
+        Send commands in a single round trip and return their replies, in order.
+
+        Parameters:
+            commands (list[tuple]): The commands, each a tuple of its name and arguments.
+
+        Returns:
+            list: The reply of each command. Error replies are RedisResponseError instances.
+
+        Raises:
+            OSError: The server could not be reached or did not reply within the timeout.
+            RedisResponseError: The server refused the authentication or database selection.
+        """
+        try:
+            connection, reader = self._idle.get_nowait()
+        except queue.Empty:
+            connection, reader = self._connect()
+
+        try:
+            connection.sendall(b"".join(self._encode(command) for command in commands))
+            replies = [self._read_reply(reader) for _ in commands]
+        except BaseException:
+            connection.close()
+            raise
+
+        try:
+            self._idle.put_nowait((connection, reader))
+        except queue.Full:
+            connection.close()
+        return replies
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            connection.close()
@@ -0,0 +1,171 @@
+"""
+This module contains the ReplicaPool class which is responsible for load balancing read queries
+across database read replicas. Replicas are picked by comparing the latency of two random healthy
+replicas, and a replica that keeps failing is ejected for a cool-down period before being probed
+again.
+
+Classes:
+    ReadReplica
+    ReplicaPool
+
+Dependencies:
+    - random: The random module for picking candidate replicas.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for working with time-related functions.
+    - typing: The typing module for type hints.
+"""
+
+import random
+import threading
+import time
+from typing import Any
+
+
+class ReadReplica:
+    """
+    A class to represent a single read replica and its observed health.
+
+    Attributes:
+        url (str): The URL of the replica.
+        client (Any): The database client connected to the replica.
+        latency_ewma (float | None): The exponentially weighted moving average of the query
+        latency in seconds, or None if the replica has not been measured yet.
+        consecutive_errors (int): The number of failed queries since the last success.
+        ejected_until (float): The monotonic timestamp until which the replica is ejected.
+        successes (int): The total number of successful queries.
+        errors (int): The total number of failed queries.
+    """
+
+    __slots__ = (
+        "url",
+        "client",
+        "latency_ewma",
+        "consecutive_errors",
+        "ejected_until",
+        "successes",
+        "errors",
+    )
+
+    def __init__(self, url: str, client: Any) -> None:
+        self.url = url
+        self.client = client
+        self.latency_ewma: float | None = None
+        self.consecutive_errors = 0
+        self.ejected_until = 0.0
+        self.successes = 0
+        self.errors = 0
+
+
+class ReplicaPool:
+    """
+    This class is responsible for picking the read replica for each query and tracking replica
+    health. Each pick compares two random healthy replicas and keeps the one with the lower latency
+    average, which favours fast replicas without sending all the traffic to a single one.
+
+    Attributes:
+        replicas (list[ReadReplica]): The replicas in the pool.
+        max_consecutive_errors (int): The number of consecutive errors after which a replica is
+        ejected.
+        ejection_seconds (float): How long an ejected replica is kept out of rotation.
+        ewma_alpha (float): The weight of the newest latency sample in the moving average.
+
+    Methods:
+        choose: Pick the replica for the next query.
+        record_success: Record a successful query and its latency.
+        record_failure: Record a failed query, ejecting the replica if needed.
+        get_stats: Return the health statistics of each replica.
+    """
+
+    def __init__(
+        self,
+        replicas: list[ReadReplica],
+        max_consecutive_errors: int = 3,
+        ejection_seconds: float = 30.0,
+        ewma_alpha: float = 0.3,
+    ) -> None:
+        self.replicas = replicas
+        self.max_consecutive_errors = max_consecutive_errors
+        self.ejection_seconds = ejection_seconds
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def choose(self, exclude: ReadReplica | None = None) -> ReadReplica | None:
+        """
+        Pick the replica for the next query. Replicas that have not been measured yet, including
+        replicas coming back from ejection, are preferred so that they get probed.
+
+        Parameters:
+            exclude (ReadReplica | None): A replica not to pick, such as one that just failed the
+            query being retried.
+
+        Returns:
+            ReadReplica | None: The chosen replica, or None if every other replica is ejected.
+        """
+        now = time.monotonic()
+        healthy = [r for r in self.replicas if r.ejected_until <= now and r is not exclude]
+        if not healthy:
+            return None
+        if len(healthy) == 1:
+            return healthy[0]
+
+        first, second = random.sample(healthy, 2)
+        return min(first, second, key=lambda r: r.latency_ewma or 0.0)
+
+    def record_success(self, replica: ReadReplica, latency: float) -> None:
+        """
+        Record a successful query and fold its latency into the replica's moving average.
+
+        Parameters:
+            replica (ReadReplica): The replica that answered the query.
+            latency (float): The latency of the query in seconds.
+        """
+        with self._lock:
+            replica.successes += 1
+            replica.consecutive_errors = 0
+            if replica.latency_ewma is None:
+                replica.latency_ewma = latency
+            else:
+                replica.latency_ewma += self.ewma_alpha * (
+                    latency - replica.latency_ewma
+                )
+
+    def record_failure(self, replica: ReadReplica) -> None:
+        """
+        Record a failed query. After max_consecutive_errors failures in a row the replica is
+        ejected for ejection_seconds, and its latency average is reset so it is probed on return.
+
+        Parameters:
+            replica (ReadReplica): The replica that failed the query.
+        """
+        with self._lock:
+            replica.errors += 1
+            replica.consecutive_errors += 1
+            if replica.consecutive_errors >= self.max_consecutive_errors:
+                replica.ejected_until = time.monotonic() + self.ejection_seconds
+                replica.consecutive_errors = 0
+                replica.latency_ewma = None
+
+    def get_stats(self) -> list[dict]:
+        """
+        Return the health statistics of each replica.
+
+        Returns:
+            list[dict]: The URL, latency average, error counts and ejection state of each replica.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": r.url,
+                    "latency_ewma_ms": (
+                        None if r.latency_ewma is None else r.latency_ewma * 1000
+                    ),
+                    "successes": r.successes,
+                    "errors": r.errors,
+                    "ejected": r.ejected_until > now,
+                }
+                for r in self.replicas
+            ]
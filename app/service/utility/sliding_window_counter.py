@@ -0,0 +1,92 @@
+"""
+This module contains the SlidingWindowCounter class which is responsible for counting events over a
+sliding time window in fixed memory. The window is split into a ring of buckets, and running totals
+are kept alongside them: recording an event updates the newest bucket and the totals, and buckets
+falling out of the window are subtracted from the totals as the ring advances. Reading the counts
+never scans the recorded events.
+
+Classes:
+    SlidingWindowCounter
+
+Dependencies:
+    - collections: The collections module for the bucket counters.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for working with time-related functions.
+    - typing: The typing module for type hints.
+"""
+
+import collections
+import threading
+import time
+from typing import Hashable, Iterable
+
+
+class SlidingWindowCounter:
+    """
+    A class to count events by key over the last `window_seconds`, at the resolution of one
+    bucket.
+
+    Attributes:
+        window_seconds (float): The length of the window in seconds.
+        bucket_count (int): The number of buckets in the ring.
+
+    Methods:
+        add: Count one event for each of the given keys.
+        get_counts: Return the counts of each key over the window.
+    """
+
+    def __init__(self, window_seconds: float, bucket_count: int = 60) -> None:
+        self.window_seconds = window_seconds
+        self.bucket_count = bucket_count
+        self._bucket_seconds = window_seconds / bucket_count
+        self._buckets = [collections.Counter() for _ in range(bucket_count)]
+        self._totals: collections.Counter = collections.Counter()
+        self._newest = int(time.monotonic() // self._bucket_seconds)
+        self._lock = threading.Lock()
+
+    def _advance(self, now: float) -> None:
+        """
+        Move the ring forward to the bucket of `now`, subtracting the buckets that fall out of the
+        window from the totals. Must be called with the lock held.
+
+        Parameters:
+            now (float): The monotonic timestamp.
+        """
+        newest = int(now // self._bucket_seconds)
+        expired_until = min(newest, self._newest + self.bucket_count)
+        for index in range(self._newest + 1, expired_until + 1):
+            bucket = self._buckets[index % self.bucket_count]
+            self._totals.subtract(bucket)
+            bucket.clear()
+        self._newest = max(self._newest, newest)
+
+    def add(self, keys: Iterable[Hashable], now: float | None = None) -> None:
+        """
+        Count one event for each of the given keys.
+
+        Parameters:
+            keys (Iterable[Hashable]): The keys of the event.
+            now (float | None): The monotonic timestamp of the event, the current time by default.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._advance(now)
+            bucket = self._buckets[self._newest % self.bucket_count]
+            for key in keys:
+                bucket[key] += 1
+                self._totals[key] += 1
+
+    def get_counts(self, now: float | None = None) -> dict:
+        """
+        Return the counts of each key over the window.
+
+        Parameters:
+            now (float | None): The monotonic timestamp to read at, the current time by default.
+
+        Returns:
+            dict: The count of each key seen in the window.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._advance(now)
+            return {key: count for key, count in self._totals.items() if count}
@@ -0,0 +1,199 @@
+"""
+This module contains the logging building blocks used by the application: a formatter emitting one
+JSON object per record, and a filter rate limiting repeated messages. Records suppressed by the
+filter are counted and reported on the next record of the same message that is let through, or,
+if the message does not recur, in a summary record once its window has closed or when it is
+evicted to bound memory.
+
+Classes:
+    JsonFormatter
+    RateLimitFilter
+
+Dependencies:
+    - datetime: The datetime module for formatting timestamps.
+    - json: The JSON module for serializing records.
+    - logging: The logging module for logging messages.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for working with time-related functions.
+"""
+
+import datetime
+import json
+import logging
+import threading
+import time
+from typing import Callable
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    A logging formatter that renders each record as a single-line JSON object with the timestamp,
+    level, logger name and message, plus the exception and the suppressed count when present.
+
+    Methods:
+        format: Render the record as JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Render the record as JSON.
+
+        Parameters:
+            record (logging.LogRecord): The record to render.
+
+        Returns:
+            str: The JSON representation of the record.
+        """
+        entry: dict = {
+            "timestamp": datetime.datetime.fromtimestamp(
+                record.created, tz=datetime.timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+
+        return json.dumps(entry)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    A logging filter letting through at most `burst` records of the same message per window. The
+    message is identified by its logger, level and unformatted template, so the check costs a
+    dictionary lookup and no string formatting. The first record of the next window carries the
+    number of records suppressed in the previous window in its `suppressed` attribute. When the
+    message does not come back, the count is reported in a summary record instead, by the
+    background flush once the window has closed, or when the message is evicted.
+
+    Attributes:
+        burst (int): The number of records of the same message let through per window.
+        window_seconds (float): The length of a window in seconds.
+        max_tracked_messages (int): The maximum number of messages whose windows are kept.
+        report (Callable | None): Called with the summary records, bypassing the filter.
+
+    Methods:
+        filter: Decide whether the record is let through.
+        flush: Report the suppressed counts of the closed windows.
+        start: Start flushing the closed windows every window_seconds in the background.
+        stop: Stop the background flush and report every pending suppressed count.
+    """
+
+    def __init__(
+        self,
+        burst: int = 5,
+        window_seconds: float = 10.0,
+        max_tracked_messages: int = 1024,
+        report: Callable[[logging.LogRecord], None] | None = None,
+    ) -> None:
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self.max_tracked_messages = max_tracked_messages
+        self.report = report
+        self._lock = threading.Lock()
+        self._windows: dict[tuple, list] = {}
+        self._stopped = threading.Event()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether the record is let through.
+
+        Parameters:
+            record (logging.LogRecord): The record to check.
+
+        Returns:
+            bool: True if the record is let through, False if it is suppressed.
+        """
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        summaries: list[logging.LogRecord] = []
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window is not None else 0
+                # Bound memory when messages are built with f-strings instead of templates
+                if window is None and len(self._windows) >= self.max_tracked_messages:
+                    summaries = self._evict_locked(now)
+                self._windows[key] = [now, 1, 0]
+                record.suppressed = suppressed
+                allowed = True
+            elif window[1] < self.burst:
+                window[1] += 1
+                allowed = True
+            else:
+                window[2] += 1
+                allowed = False
+
+        self._report(summaries)
+        return allowed
+
+    def _evict_locked(self, now: float) -> list[logging.LogRecord]:
+        """Make room for a new message by dropping the closed windows, or the oldest window if
+        none is closed, and return the summaries of their suppressed counts. Must be called with
+        the lock held."""
+        evicted = [
+            key for key, window in self._windows.items() if now - window[0] >= self.window_seconds
+        ] or [next(iter(self._windows))]
+        return [
+            self._summarize(key, suppressed)
+            for key in evicted
+            if (suppressed := self._windows.pop(key)[2])
+        ]
+
+    @staticmethod
+    def _summarize(key: tuple, suppressed: int) -> logging.LogRecord:
+        """Build the summary record of the records of a message suppressed in a window."""
+        name, levelno, msg = key
+        record = logging.LogRecord(
+            name, levelno, "", 0, "%d records suppressed: %s", (suppressed, msg), None
+        )
+        record.suppressed = suppressed
+        return record
+
+    def _report(self, summaries: list[logging.LogRecord]) -> None:
+        """Hand the summary records to the report callable, if any."""
+        if self.report is not None:
+            for summary in summaries:
+                self.report(summary)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Report the suppressed counts of the closed windows in summary records and forget those
+        windows, so that the count of a message that does not recur is not lost.
+
+        Parameters:
+            force (bool): Whether to also report and forget the windows still open.
+        """
+        now = time.monotonic()
+        with self._lock:
+            closed = [
+                key
+                for key, window in self._windows.items()
+                if force or now - window[0] >= self.window_seconds
+            ]
+            summaries = [
+                self._summarize(key, suppressed)
+                for key in closed
+                if (suppressed := self._windows.pop(key)[2])
+            ]
+        self._report(summaries)
+
+    def start(self) -> None:
+        """Start flushing the closed windows every window_seconds in the background."""
+
+        def run() -> None:
+            while not self._stopped.wait(self.window_seconds):
+                self.flush()
+
+        threading.Thread(target=run, name="log-rate-limit", daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop the background flush and report every pending suppressed count."""
+        self._stopped.set()
+        self.flush(force=True)
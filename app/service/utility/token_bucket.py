@@ -0,0 +1,62 @@
+"""
+This module contains the TokenBucket class which is responsible for rate limiting a single client.
+Tokens are refilled continuously at a fixed rate up to a maximum burst size, and each admitted
+request consumes one token.
+
+Classes:
+    TokenBucket
+
+Dependencies:
+    - time: The time module for working with time-related functions.
+"""
+
+import time
+
+
+class TokenBucket:
+    """
+    A class to represent a single token bucket. The bucket starts full, refills at `rate` tokens per
+    second and never holds more than `burst` tokens.
+
+    Attributes:
+        rate (float): The number of tokens added to the bucket per second.
+        burst (float): The maximum number of tokens the bucket can hold.
+        tokens (float): The number of tokens currently in the bucket.
+        last_refill (float): The monotonic timestamp of the last refill.
+
+    Methods:
+        try_acquire: Attempt to take one token from the bucket.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "last_refill")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("Token bucket rate must be positive and burst at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+
+    def try_acquire(self, now: float | None = None) -> float:
+        """
+        Attempt to take one token from the bucket.
+
+        Parameters:
+            now (float | None): The current monotonic time, defaults to time.monotonic().
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the number of seconds until one is available.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
@@ -0,0 +1,167 @@
+"""
+This module contains the VelocityChecker class which is responsible for detecting cards that apply
+too many times in a short time. Each card keeps the counts of its attempts in time buckets, packed
+in a compact array of (bucket, count) pairs, headed by the running total of each window and the
+position of its oldest bucket, so a check only visits the buckets leaving a window instead of
+summing every bucket of every window. The cards are kept in least recently seen order:
+cards whose last attempt has left the longest window expire from the front of the table, and the
+least recently seen card is evicted when the table is full. A check touches a single card and
+never queries the transactions table.
+
+The counts are kept in the memory of each process, so the limits are per worker. Under serve, the
+attempts of a card are spread over the SERVER_WORKERS workers of its instance, and a card can make
+up to SERVER_WORKERS times the maximum of a limit before every worker has denied it. For the
+limits to hold exactly, run one worker per instance (SERVER_WORKERS=1) behind the card router,
+which sends every check of a card to the same instance; a burst beyond the router's bounded load
+may still spill to a second instance, where it is counted separately. With several workers per
+instance, set each maximum of VELOCITY_LIMITS to the intended limit divided by SERVER_WORKERS,
+which holds on average; attempts sent over one keep-alive connection all reach the same worker,
+so for such clients the divided limit is stricter than intended.
+
+Classes:
+    VelocityChecker
+
+Dependencies:
+    - array: The array module for the compact bucket counts of each card.
+    - sys: The sys module for measuring the memory used.
+    - threading: The threading module for guarding shared state.
+    - time: The time module for working with time-related functions.
+    - collections: The collections module for the least recently seen card table.
+"""
+
+import array
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class VelocityChecker:
+    """
+    This class is responsible for counting the attempts of each card over one or more sliding
+    windows, and reporting the cards exceeding the limit of a window.
+
+    Attributes:
+        limits (list[tuple[float, int]]): The (window in seconds, maximum attempts) of each limit.
+        bucket_seconds (float): The resolution of the windows.
+        max_tracked_cards (int): The maximum number of cards kept in memory.
+
+    Methods:
+        check: Count an attempt of a card and return the window whose limit it exceeds.
+        get_stats: Return the number of cards tracked, their memory usage and the limits exceeded.
+    """
+
+    def __init__(
+        self,
+        limits: list[tuple[float, int]],
+        bucket_seconds: float = 1.0,
+        max_tracked_cards: int = 100000,
+    ) -> None:
+        self.limits = limits
+        self.bucket_seconds = bucket_seconds
+        self.max_tracked_cards = max_tracked_cards
+
+        # The label, length in buckets and maximum attempts of each window, shortest first
+        self._windows = sorted(
+            (round(seconds / bucket_seconds), f"{seconds:g}s", max_attempts)
+            for seconds, max_attempts in limits
+        )
+        self._longest_window = self._windows[-1][0] if self._windows else 0
+        self._lock = threading.Lock()
+        self._cards: OrderedDict[str, array.array] = OrderedDict()
+        self._evicted_cards = 0
+        self._exceeded = {label: 0 for _, label, _ in self._windows}
+
+    def _expire(self, bucket: int) -> None:
+        """
+        Remove the cards whose last attempt has left the longest window. The table is in least
+        recently seen order, so only its front is inspected. Must be called with the lock held.
+
+        Parameters:
+            bucket (int): The current bucket.
+        """
+        while self._cards:
+            card, counts = next(iter(self._cards.items()))
+            if counts[-2] > bucket - self._longest_window:
+                return
+            del self._cards[card]
+
+    def check(self, credit_card_number: str, now: float | None = None) -> str | None:
+        """
+        Count an attempt of a card and return the shortest window whose limit it exceeds, counting
+        the attempt itself.
+
+        Parameters:
+            credit_card_number (str): The credit card number of the attempt.
+            now (float | None): The monotonic timestamp of the attempt, the current time by default.
+
+        Returns:
+            str | None: The label of the exceeded window, e.g. "60s", or None.
+        """
+        if not self._windows:
+            return None
+
+        now = time.monotonic() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        windows = len(self._windows)
+        header = 2 * windows
+        with self._lock:
+            self._expire(bucket)
+            counts = self._cards.get(credit_card_number)
+            if counts is None:
+                # The total of each window, then the position of its oldest bucket
+                counts = self._cards[credit_card_number] = array.array(
+                    "Q", [0] * windows + [header] * windows
+                )
+                if len(self._cards) > self.max_tracked_cards:
+                    self._cards.popitem(last=False)
+                    self._evicted_cards += 1
+            else:
+                self._cards.move_to_end(credit_card_number)
+
+            # Take the buckets that have left each window off its total, drop the buckets that
+            # have left the longest window, then count the attempt in every window
+            for index, (window, _, _) in enumerate(self._windows):
+                start = counts[windows + index]
+                while start < len(counts) and counts[start] <= bucket - window:
+                    counts[index] -= counts[start + 1]
+                    start += 2
+                counts[windows + index] = start
+            expired = counts[header - 1] - header
+            if expired:
+                del counts[header : header + expired]
+                for index in range(windows, header):
+                    counts[index] -= expired
+            if len(counts) > header and counts[-2] == bucket:
+                counts[-1] += 1
+            else:
+                counts.extend((bucket, 1))
+
+            for index in range(windows):
+                counts[index] += 1
+            for index, (_, label, max_attempts) in enumerate(self._windows):
+                if counts[index] > max_attempts:
+                    self._exceeded[label] += 1
+                    return label
+        return None
+
+    def get_stats(self) -> dict:
+        """
+        Return the number of cards tracked, the bytes used by the card table, the cards evicted
+        because the table was full, and the number of attempts exceeding the limit of each window.
+        Measuring the memory visits every tracked card.
+
+        Returns:
+            dict: The statistics of the velocity checks.
+        """
+        with self._lock:
+            memory_bytes = sys.getsizeof(self._cards) + sum(
+                sys.getsizeof(card) + sys.getsizeof(counts)
+                for card, counts in self._cards.items()
+            )
+            return {
+                "tracked_cards": len(self._cards),
+                "memory_bytes": memory_bytes,
+                "evicted_cards": self._evicted_cards,
+                "exceeded": dict(self._exceeded),
+            }
@@ -0,0 +1,158 @@
+"""
+This module contains the throughput benchmark of the /check_credit endpoint, comparing the FastAPI
+route to the raw ASGI fast path. Requests are driven straight into each ASGI application on a single
+event loop, without an HTTP server or network, so the result is the number of requests one core can
+decide. The application connects to a local stand-in PostgREST server from conftest.py, the requests
+are from existing customers so that no score lookup is involved, and the transaction insert is
+replaced by a no-op, so that both paths do the same credit check work and the difference is the
+cost of the HTTP layer.
+
+The benchmark can be run by executing the following command:
+    - python -m benchmarks.check_credit_throughput --requests 5000
+
+Functions:
+    build_scope: Build the ASGI scope of a credit check request.
+    drive: Send credit check requests straight into an ASGI application.
+    run_benchmark: Measure the requests per second of the FastAPI route and the fast path.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - asyncio: The asyncio module for driving the ASGI applications.
+    - importlib: The importlib module for importing the application once configured.
+    - os: The OS module for interacting with the operating system.
+    - time: The time module for timing the requests.
+    - urllib.parse: The urllib.parse module for encoding the form.
+    - conftest: The local stand-in PostgREST server.
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import time
+from urllib.parse import urlencode
+from conftest import TEST_KEY, StandInPostgrest
+
+FORM = urlencode(
+    {
+        "first_name": "John",
+        "last_name": "Doe",
+        "date_of_birth": "2000-01-01",
+        "is_existing_customer": "true",
+        "credit_card_number": "4929439557473282537",
+        "expiration_date": "2027-08",
+        "cvv": "123",
+        "credit_card_issuer": "Visa",
+    }
+).encode()
+
+
+def build_scope() -> dict:
+    """
+    Build the ASGI scope of a URL-encoded credit check request.
+
+    Returns:
+        dict: The ASGI scope.
+    """
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/check_credit",
+        "raw_path": b"/check_credit",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/x-www-form-urlencoded"),
+            (b"content-length", str(len(FORM)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+
+async def drive(asgi_app, requests: int) -> float:
+    """
+    Send credit check requests one after the other straight into an ASGI application.
+
+    Parameters:
+        asgi_app: The ASGI application.
+        requests (int): The number of requests.
+
+    Returns:
+        float: The number of requests per second.
+    """
+    from app.service.credit_check_service import wait_for_pending_transactions
+
+    statuses: list[int] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": FORM, "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi_app(build_scope(), receive, send)
+    elapsed = time.perf_counter() - start
+    await wait_for_pending_transactions()
+
+    if set(statuses) != {200}:
+        raise RuntimeError(f"Unexpected statuses: {sorted(set(statuses))}")
+    return requests / elapsed
+
+
+def run_benchmark(requests: int) -> dict[str, float]:
+    """
+    Measure the requests per second of the FastAPI route and of the fast path, after a warm-up.
+
+    Parameters:
+        requests (int): The number of requests per measurement.
+
+    Returns:
+        dict[str, float]: The requests per second of each path, and the speedup of the fast path.
+    """
+    server = StandInPostgrest()
+    os.environ.update(
+        {
+            "SUPABASE_URL": server.url,
+            "SUPABASE_KEY": TEST_KEY,
+            "RATE_LIMIT_REQUESTS_PER_SECOND": "1000000",
+            "RATE_LIMIT_BURST": "1000000",
+            "LOG_LEVEL": "WARNING",
+        }
+    )
+    main = importlib.import_module("main")
+    main.db_service.record_credit_approval_request_transaction = lambda *args: None
+
+    async def measure() -> dict[str, float]:
+        await drive(main.app, min(requests, 500))
+        await drive(main.fast_app, min(requests, 500))
+        return {
+            "fastapi_route": await drive(main.app, requests),
+            "fast_path": await drive(main.fast_app, requests),
+        }
+
+    try:
+        results = asyncio.run(measure())
+    finally:
+        server.shutdown()
+        server.server_close()
+    results["speedup"] = results["fast_path"] / results["fastapi_route"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.requests)
+    print(f"FastAPI route: {results['fastapi_route']:.0f} requests/s")
+    print(f"Fast path:     {results['fast_path']:.0f} requests/s")
+    print(f"Speedup:       {results['speedup']:.2f}x")
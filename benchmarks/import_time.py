@@ -0,0 +1,154 @@
+"""
+This module contains the import-time benchmark of the application's startup. It imports main.py
+itself in a fresh interpreter under `python -X importtime`, so every module loaded at startup is
+measured, including those imported by the init functions, with only the connection test of the
+database stubbed out. It takes the median of several runs, and fails when the total import time
+exceeds the stored baseline by more than the regression threshold, or when any of the heavy
+Supabase modules is imported at startup. test_import_time.py runs the same check with the test
+suite.
+
+The benchmark can be run by executing the following commands:
+    - python benchmarks/import_time.py
+    - python benchmarks/import_time.py --update-baseline
+
+Functions:
+    measure_import_time: Measure the startup imports once under -X importtime.
+    run_benchmark: Measure the startup imports several times and compare them to the baseline.
+    get_regression: Describe a regression of the startup import time against the baseline.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - json: The JSON module for reading and writing the baseline.
+    - os: The OS module for interacting with the operating system.
+    - statistics: The statistics module for taking the median of the runs.
+    - subprocess: The subprocess module for running fresh interpreters.
+    - sys: The sys module for locating the interpreter.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(PROJECT_ROOT, "benchmarks", "import_time_baseline.json")
+
+# Importing main runs the init functions, which would otherwise wait on an unreachable database
+STARTUP_IMPORTS = (
+    "import app.service.database_service as database_service\n"
+    "database_service.DataBaseService._test_db_connection = lambda self: None\n"
+    "import main"
+)
+
+FORBIDDEN_MODULES = (
+    "supabase",
+    "gotrue",
+    "storage3",
+    "realtime",
+    "websockets",
+    "aiohttp",
+    "supafunc",
+)
+
+
+def measure_import_time() -> tuple[int, set[str]]:
+    """
+    Measure the startup imports once in a fresh interpreter under -X importtime.
+
+    Returns:
+        tuple: The total import time in microseconds and the names of the imported modules.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_IMPORTS],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    modules: set[str] = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, module = line.split(":", 1)[1].split("|")
+        total_us += int(self_us)
+        modules.add(module.strip())
+
+    return total_us, modules
+
+
+def run_benchmark(runs: int = 5) -> dict:
+    """
+    Measure the startup imports several times and compare the median to the stored baseline.
+
+    Parameters:
+        runs (int): The number of fresh interpreters to measure.
+
+    Returns:
+        dict: The median total in microseconds, the baseline, and the forbidden modules imported.
+    """
+    totals: list[int] = []
+    imported: set[str] = set()
+    for _ in range(runs):
+        total_us, modules = measure_import_time()
+        totals.append(total_us)
+        imported |= modules
+
+    baseline_us = None
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as baseline_file:
+            baseline_us = json.load(baseline_file)["total_us"]
+
+    return {
+        "total_us": int(statistics.median(totals)),
+        "baseline_us": baseline_us,
+        "forbidden_modules": sorted(
+            {module.split(".")[0] for module in imported} & set(FORBIDDEN_MODULES)
+        ),
+    }
+
+
+def get_regression(result: dict, threshold: float | None = None) -> str | None:
+    """
+    Describe a regression of the startup import time against the baseline.
+
+    Parameters:
+        result (dict): The result of run_benchmark.
+        threshold (float | None): The fraction of the baseline the total may exceed it by, read
+        from IMPORT_TIME_REGRESSION_THRESHOLD by default.
+
+    Returns:
+        str | None: The description of the regression, or None if there is no baseline or the
+        total is within the threshold.
+    """
+    if threshold is None:
+        threshold = float(os.getenv("IMPORT_TIME_REGRESSION_THRESHOLD", "0.25"))
+    if not result["baseline_us"] or result["total_us"] <= result["baseline_us"] * (1 + threshold):
+        return None
+    return (
+        f"Startup import time regressed: {result['total_us']}us against a baseline of "
+        f"{result['baseline_us']}us (threshold {threshold:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs)
+    print(json.dumps(result, indent=2))
+
+    if result["forbidden_modules"]:
+        sys.exit(f"Heavy modules imported at startup: {result['forbidden_modules']}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as baseline_file:
+            json.dump({"total_us": result["total_us"]}, baseline_file, indent=2)
+            baseline_file.write("\n")
+    elif get_regression(result):
+        sys.exit(get_regression(result))
@@ -0,0 +1,248 @@
+"""
+This module contains the micro-benchmark suite of the card validators, the approval decision
+functions, the velocity check and the request models. Each case times one public function on a representative input,
+taking the fastest of several repeats of a loop sized to run for about 50ms, and measures the peak
+memory allocated by a single call with tracemalloc. The results are compared to the stored
+baseline, and the suite fails when a case is slower, or allocates more, than the baseline by more
+than the MICRO_BENCHMARK_REGRESSION_THRESHOLD.
+
+Baselines are machine specific: update them on the machine that runs the regression gate.
+
+The suite can be run by executing the following commands:
+    - python -m benchmarks.micro_benchmarks
+    - python -m benchmarks.micro_benchmarks --filter luhn
+    - python -m benchmarks.micro_benchmarks --update-baseline
+
+Functions:
+    make_luhn_valid_card_number: Build a card number of the given length that passes the Luhn check.
+    get_cases: Return the benchmark cases.
+    measure_case: Time a case and measure its allocations.
+    find_regressions: Compare results to the baseline.
+    run_benchmarks: Measure every case matching a filter.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - datetime: The datetime module for the dates of the representative inputs.
+    - json: The JSON module for reading and writing the baseline.
+    - os: The OS module for interacting with the operating system.
+    - sys: The sys module for exiting with a failure.
+    - timeit: The timeit module for timing the cases.
+    - tracemalloc: The tracemalloc module for measuring allocations.
+    - typing: The typing module for type hints.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+from app.interface.card_validation_interface import get_card_validation_errors
+from app.interface.credit_approval_checker_interface import (
+    get_credit_approval_request_result,
+    get_credit_tier,
+)
+from app.interface.utility.credit_approval_utils import CreditApprovalChecker
+from app.interface.utility.credit_validation_utils import CreditCardValidator
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.credit_approval_response import CreditApprovalResponse
+from app.service.velocity_check_service import VelocityChecker
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(PROJECT_ROOT, "benchmarks", "micro_benchmarks_baseline.json")
+
+REQUEST_FORM = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "date_of_birth": "2000-01-01",
+    "is_existing_customer": False,
+    "credit_card_number": "4929439557473282537",
+    "expiration_date": "2027-08",
+    "cvv": "123",
+    "credit_card_issuer": "Visa",
+}
+
+
+def make_luhn_valid_card_number(length: int) -> str:
+    """
+    Build a card number of the given length that passes the Luhn check, so that the benchmark
+    covers the full algorithm.
+
+    Parameters:
+        length (int): The number of digits.
+
+    Returns:
+        str: The card number.
+    """
+    payload = ("4" + "539148803436467")[: length - 1].ljust(length - 1, "7")
+    total = 0
+    for position, digit in enumerate(reversed(payload)):
+        value = int(digit) * (2 if position % 2 == 0 else 1)
+        total += value - 9 if value > 9 else value
+    return payload + str((10 - total % 10) % 10)
+
+
+def get_cases() -> dict[str, Callable[[], object]]:
+    """
+    Return the benchmark cases: each public validator for Luhn checks of 8 to 19 digit cards and
+    the other card fields, the full card validation, each decision function, the velocity check of
+    a card, and the construction of the request and response models.
+
+    Returns:
+        dict[str, Callable[[], object]]: The zero-argument callable of each case, keyed by name.
+    """
+    date_of_birth = datetime.date(2000, 1, 1)
+    expiration_date = datetime.date(2027, 8, 1)
+    velocity_checker = VelocityChecker([(60, 5), (3600, 20)])
+    cases: dict[str, Callable[[], object]] = {}
+
+    for length in range(8, 20):
+        card_number = make_luhn_valid_card_number(length)
+        cases[f"get_luhn_validation_errors[{length}]"] = (
+            lambda card_number=card_number: CreditCardValidator.get_luhn_validation_errors(
+                card_number
+            )
+        )
+
+    cases.update(
+        {
+            "get_card_number_length_errors": lambda: (
+                CreditCardValidator.get_card_number_length_errors("4929439557473282537")
+            ),
+            "get_cvv_length_errors": lambda: CreditCardValidator.get_cvv_length_errors("123"),
+            "get_card_expired_errors": lambda: (
+                CreditCardValidator.get_card_expired_errors(expiration_date)
+            ),
+            "get_card_issuer_errors": lambda: (
+                CreditCardValidator.get_card_issuer_errors("Visa")
+            ),
+            "get_card_validation_errors": lambda: get_card_validation_errors(
+                "4929439557473282537", "123", expiration_date, "Visa"
+            ),
+            "is_creditee_is_of_legal_age": lambda: (
+                CreditApprovalChecker.is_creditee_is_of_legal_age(date_of_birth)
+            ),
+            "is_credit_score_and_credit_duration_within_approval_limits": lambda: (
+                CreditApprovalChecker.is_credit_score_and_credit_duration_within_approval_limits(
+                    350, 9
+                )
+            ),
+            "get_credit_approval_request_result[approved]": lambda: (
+                get_credit_approval_request_result(date_of_birth, False, 800, 5)
+            ),
+            "get_credit_approval_request_result[denied]": lambda: (
+                get_credit_approval_request_result(date_of_birth, False, 350, 9)
+            ),
+            "get_credit_tier": lambda: get_credit_tier(725),
+            "VelocityChecker.check": lambda: velocity_checker.check("4929439557473282537"),
+            "CreditApprovalRequest": lambda: CreditApprovalRequest(**REQUEST_FORM),
+            "CreditApprovalResponse": lambda: CreditApprovalResponse(
+                is_existing_customer=False,
+                date_of_birth=date_of_birth,
+                is_approved=False,
+                credit_card_number="4929439557473282537",
+            ),
+        }
+    )
+    return cases
+
+
+def measure_case(
+    case: Callable[[], object], repeats: int = 5, loop_seconds: float = 0.05
+) -> dict:
+    """
+    Time a case and measure the memory it allocates.
+
+    Parameters:
+        case (Callable[[], object]): The zero-argument callable of the case.
+        repeats (int): The number of timed loops, of which the fastest is kept.
+        loop_seconds (float): The approximate duration of each timed loop.
+
+    Returns:
+        dict: The nanoseconds per call and the peak bytes allocated by a call.
+    """
+    timer = timeit.Timer(case)
+    number = 1
+    while (elapsed := timer.timeit(number)) < loop_seconds / 10:
+        number *= 10
+    number = max(1, int(number * loop_seconds / elapsed))
+    ns_per_call = min(timer.repeat(repeats, number)) / number * 1e9
+
+    tracemalloc.start()
+    try:
+        case()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        case()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"ns_per_call": round(ns_per_call, 1), "peak_alloc_bytes": peak - before}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare the results to the baseline, listing every case slower, or allocating more, than its
+    baseline by more than the threshold. Cases missing from the baseline are not compared.
+
+    Parameters:
+        results (dict): The measurements of each case.
+        baseline (dict): The baseline measurements of each case.
+        threshold (float): The allowed relative increase, e.g. 0.25 for 25%.
+
+    Returns:
+        list[str]: A description of each regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        for metric, value in result.items():
+            expected = baseline.get(name, {}).get(metric)
+            if expected is not None and value > expected * (1 + threshold):
+                regressions.append(f"{name}: {metric} {value} against a baseline of {expected}")
+    return regressions
+
+
+def run_benchmarks(name_filter: str = "") -> dict:
+    """
+    Measure every case whose name contains the filter.
+
+    Parameters:
+        name_filter (str): The substring the case names must contain.
+
+    Returns:
+        dict: The measurements of each case, keyed by name.
+    """
+    return {
+        name: measure_case(case)
+        for name, case in get_cases().items()
+        if name_filter in name
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.filter)
+    threshold = float(os.getenv("MICRO_BENCHMARK_REGRESSION_THRESHOLD", "0.25"))
+    print(json.dumps(results, indent=2))
+
+    baseline: dict = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2)
+            baseline_file.write("\n")
+    else:
+        regressions = find_regressions(results, baseline, threshold)
+        if regressions:
+            sys.exit("Micro-benchmarks regressed:\n" + "\n".join(regressions))
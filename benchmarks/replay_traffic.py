@@ -0,0 +1,142 @@
+"""
+This module contains the replay of captured /check_credit traffic against a running service. The
+capture files written by the traffic capture are merged in timestamp order, and each request is
+sent at its original offset from the first one, divided by the speed-up factor, without waiting
+for the earlier responses. The report gives the status codes, the response latency percentiles
+and how late the requests were sent compared to their schedule.
+
+The replay can be run by executing the following commands:
+    - python -m benchmarks.replay_traffic captures/ --target http://localhost:8000
+    - python -m benchmarks.replay_traffic captures/ --target http://localhost:8000 --speed 4
+
+Functions:
+    read_capture: Read the captured requests of a directory in timestamp order.
+    replay: Send the captured requests with their original timing.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - asyncio: The asyncio module for sending the requests on schedule.
+    - collections: The collections module for counting the status codes.
+    - glob: The glob module for listing the capture files.
+    - heapq: The heapq module for merging the capture files.
+    - json: The JSON module for reading the capture files and writing the report.
+    - os: The OS module for interacting with the operating system.
+    - statistics: The statistics module for the latency percentiles.
+    - time: The time module for timing the requests.
+    - typing: The typing module for type hints.
+    - httpx: The HTTP client sending the requests.
+"""
+
+import argparse
+import asyncio
+import collections
+import glob
+import heapq
+import json
+import os
+import statistics
+import time
+from typing import Iterator
+import httpx
+
+
+def _read_file(path: str) -> Iterator[dict]:
+    """Read the captured requests of a capture file."""
+    with open(path, encoding="utf-8") as capture_file:
+        for line in capture_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_capture(directory: str) -> Iterator[dict]:
+    """
+    Read the captured requests of a directory, merging the capture files in timestamp order.
+
+    Parameters:
+        directory (str): The directory of the capture files.
+
+    Returns:
+        Iterator[dict]: The captured requests.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, "*.jsonl")))
+    return heapq.merge(
+        *(_read_file(path) for path in paths), key=lambda record: record["timestamp"]
+    )
+
+
+async def replay(
+    records: Iterator[dict],
+    target: str,
+    speed: float = 1.0,
+    timeout: float = 10.0,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict:
+    """
+    Send the captured requests to the target with their original timing.
+
+    Parameters:
+        records (Iterator[dict]): The captured requests, in timestamp order.
+        target (str): The base URL of the service.
+        speed (float): The speed-up factor of the schedule.
+        timeout (float): The timeout of each request in seconds.
+        transport (httpx.AsyncBaseTransport | None): The transport of the client, such as an
+        httpx.ASGITransport to replay into an application in the same process.
+
+    Returns:
+        dict: The number of requests sent, their status codes, the latency percentiles and the
+        send lag percentiles, in milliseconds.
+    """
+    statuses: collections.Counter = collections.Counter()
+    latencies: list[float] = []
+    lags: list[float] = []
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, transport=transport) as client:
+
+        async def send(record: dict) -> None:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/check_credit", data=record["form"], headers=record["headers"]
+                )
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+        tasks = []
+        first_timestamp = None
+        started = time.perf_counter()
+        for record in records:
+            if first_timestamp is None:
+                first_timestamp = record["timestamp"]
+            scheduled = (record["timestamp"] - first_timestamp) / speed
+            delay = scheduled - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lags.append(max(0.0, time.perf_counter() - started - scheduled))
+            tasks.append(asyncio.create_task(send(record)))
+        await asyncio.gather(*tasks)
+
+    def percentiles(values: list[float]) -> dict[str, float]:
+        if len(values) < 2:
+            return {"p50_ms": values[0] * 1000 if values else 0.0}
+        cut_points = statistics.quantiles(values, n=100, method="inclusive")
+        return {"p50_ms": cut_points[49] * 1000, "p99_ms": cut_points[98] * 1000}
+
+    return {
+        "requests": len(tasks),
+        "statuses": dict(statuses),
+        "latency": percentiles(latencies),
+        "send_lag": percentiles(lags),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(read_capture(args.directory), args.target, args.speed))
+    print(json.dumps(report, indent=2))
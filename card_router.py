@@ -0,0 +1,22 @@
+"""
+This module contains the front router of the service instances. It forwards every request to one
+of the instances listed in ROUTER_UPSTREAMS, sending the credit checks of each card number to the
+same instance by consistent hashing, so that the local score cache of each instance holds its own
+share of the cards rather than a copy of the same hot cards. The router's statistics are served
+at /router/stats.
+
+Since the routing is per instance, the local caches of the workers of one instance still overlap;
+run one worker per instance (SERVER_WORKERS=1) for fully disjoint caches, or rely on the shared
+score cache between the workers of an instance.
+
+The router can be run by executing the following command:
+    - SERVER_APP=card_router:app python -m serve
+
+Dependencies:
+    - app: The module that initializes the logging and the router.
+"""
+
+from app import init_card_router, init_logging
+
+init_logging()
+app = init_card_router()
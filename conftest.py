@@ -0,0 +1,305 @@
+"""
+This module contains the shared test fixtures. It provides a local stand-in for a Supabase PostgREST
+endpoint, so that the DataBaseService can be tested against real HTTP servers without a database,
+and a local stand-in for a server speaking the Redis protocol.
+
+Classes:
+    StandInPostgrest: A local stand-in PostgREST server.
+    StandInHandler: The request handler of the stand-in server.
+    StandInRedis: A local stand-in Redis server.
+    StandInRedisHandler: The connection handler of the stand-in Redis server.
+
+Fixtures:
+    servers: Start stand-in servers, shutting them down after the test.
+    redis_server: Start a stand-in Redis server, shutting it down after the test.
+
+Dependencies:
+    - json
+    - re
+    - socketserver
+    - threading
+    - time
+    - datetime
+    - http.server
+    - urllib.parse
+    - pytest
+"""
+
+import json
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+TEST_KEY = "header.payload.signature"
+
+
+class StandInPostgrest(ThreadingHTTPServer):
+    """
+    A local stand-in for a PostgREST endpoint. It answers score lookups from `scores`, or with a
+    score of 800 and a duration of 5 for every card when `scores` is None, and lists the card
+    numbers of `scores` by id, in insertion order. It accepts transaction inserts, answers
+    transaction queries from `history` with the eq, gt, gte, lt, lte and or filters and the
+    ordering they ask for, runs the check_credit_and_record_transaction function when
+    `rpc_enabled` is set, and can be made slow or failing.
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        failing: bool = False,
+        rpc_enabled: bool = False,
+        scores: dict[str, tuple[int, int]] | None = None,
+        history: list[dict] | None = None,
+    ) -> None:
+        self.delay = delay
+        self.failing = failing
+        self.rpc_enabled = rpc_enabled
+        self.scores = scores
+        self.history = history or []
+        self.requests: list[tuple[str, str]] = []
+        self.transactions: list[dict] = []
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, method: str, table: str) -> int:
+        return sum(1 for m, path in self.requests if m == method and table in path)
+
+    def lookup(self, card_number: str) -> tuple[int, int] | None:
+        if self.scores is None:
+            return 800, 5
+        return self.scores.get(card_number)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """The request handler of the StandInPostgrest server."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status: int, body: object) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        time.sleep(self.server.delay)
+        if self.server.failing and "credit_scores" in self.path:
+            self._respond(500, {"message": "replica unavailable", "code": "XX000"})
+            return
+        if "credit_scores" in self.path and "card_number=" not in self.path:
+            self._respond(200, self._list_card_numbers())
+            return
+        if "credit_scores" in self.path:
+            card_number = parse_qs(urlparse(self.path).query)["card_number"][0]
+            score = self.server.lookup(card_number.removeprefix("eq."))
+            rows = [] if score is None else [{"score": score[0], "duration": score[1]}]
+            self._respond(200, rows)
+            return
+        if "transactions" in self.path:
+            self._respond(200, self._query_history())
+            return
+        self._respond(200, [])
+
+    @staticmethod
+    def _matches(row: dict, column: str, operator: str, value: str) -> bool:
+        value = value.strip('"')
+        if column == "created_at":
+            left, right = datetime.fromisoformat(row[column]), datetime.fromisoformat(value)
+        elif column == "id":
+            left, right = row[column], int(value)
+        else:
+            left, right = row[column], value
+        return {
+            "eq": left == right,
+            "gt": left > right,
+            "gte": left >= right,
+            "lt": left < right,
+            "lte": left <= right,
+        }[operator]
+
+    def _query_history(self) -> list[dict]:
+        rows = self.server.history
+        for column, values in parse_qs(urlparse(self.path).query).items():
+            for value in values:
+                if column == "or":
+                    filters = re.findall(r'(\w+)\.(\w+)\.("[^"]*"|[^,)]*)', value)
+                    rows = [r for r in rows if any(self._matches(r, *f) for f in filters)]
+                elif column not in ("select", "order", "limit"):
+                    operator, operand = value.split(".", 1)
+                    rows = [r for r in rows if self._matches(r, column, operator, operand)]
+
+        query = parse_qs(urlparse(self.path).query)
+        for key in reversed(query.get("order", [""])[0].split(",")):
+            if key:
+                column, _, direction = key.partition(".")
+                rows = sorted(rows, key=lambda r: r[column], reverse=direction == "desc")
+        return rows[: int(query.get("limit", [len(rows)])[0])]
+
+    def _list_card_numbers(self) -> list[dict]:
+        query = parse_qs(urlparse(self.path).query)
+        after = int(query.get("id", ["gt.0"])[0].removeprefix("gt."))
+        limit = int(query.get("limit", ["1000"])[0])
+        rows = [
+            {"card_number": card_number, "id": row_id}
+            for row_id, card_number in enumerate(self.server.scores or {}, start=1)
+            if row_id > after
+        ]
+        return rows[:limit]
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.server.delay)
+        if "/rpc/check_credit_and_record_transaction" in self.path:
+            self._run_check_credit_and_record_transaction(body)
+            return
+        self.server.transactions.append(body)
+        self._respond(201, [])
+
+    def _run_check_credit_and_record_transaction(self, params: dict) -> None:
+        if not self.server.rpc_enabled:
+            self._respond(
+                404,
+                {"code": "PGRST202", "message": "Could not find the function"},
+            )
+            return
+
+        score = self.server.lookup(params["p_card_number"])
+        if score is None:
+            self._respond(
+                200, [{"found": False, "score": None, "duration": None, "approved": None}]
+            )
+            return
+
+        approved = params["p_is_existing_customer"] or (
+            params["p_is_of_legal_age"]
+            and any(
+                c["min_score"] <= score[0] <= c["max_score"]
+                and score[1] >= c["min_duration"]
+                for c in params["p_criteria"]
+            )
+        )
+        self.server.transactions.append(
+            {
+                "card_number": params["p_card_number"],
+                "approved?": approved,
+                "error_codes": params["p_error_codes"],
+            }
+        )
+        self._respond(
+            200,
+            [{"found": True, "score": score[0], "duration": score[1], "approved": approved}],
+        )
+
+
+@pytest.fixture
+def servers():
+    started: list[StandInPostgrest] = []
+
+    def start(**kwargs) -> StandInPostgrest:
+        server = StandInPostgrest(**kwargs)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+class StandInRedis(socketserver.ThreadingTCPServer):
+    """
+    A local stand-in for a server speaking the Redis protocol. It supports PING, GET, MGET and SET
+    with an expiry in PX milliseconds, records the commands it runs, and can be made slow.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.commands: list[list[bytes]] = []
+        super().__init__(("127.0.0.1", 0), StandInRedisHandler)
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def get(self, key: bytes) -> bytes | None:
+        value, expires_at = self.data.get(key, (None, 0.0))
+        return value if expires_at > time.monotonic() else None
+
+
+class StandInRedisHandler(socketserver.StreamRequestHandler):
+    """The connection handler of the StandInRedis server."""
+
+    def _read_command(self) -> list[bytes] | None:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        arguments = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            arguments.append(self.rfile.read(length + 2)[:-2])
+        return arguments
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self.server.commands.append(command)
+            time.sleep(self.server.delay)
+            name = command[0].upper()
+            if name == b"PING":
+                reply = b"+PONG\r\n"
+            elif name == b"GET":
+                reply = self._bulk(self.server.get(command[1]))
+            elif name == b"MGET":
+                reply = b"*%d\r\n" % (len(command) - 1) + b"".join(
+                    self._bulk(self.server.get(key)) for key in command[1:]
+                )
+            elif name == b"SET":
+                expires_at = time.monotonic() + int(command[4]) / 1000
+                self.server.data[command[1]] = (command[2], expires_at)
+                reply = b"+OK\r\n"
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def redis_server():
+    started: list[StandInRedis] = []
+
+    def start(**kwargs) -> StandInRedis:
+        server = StandInRedis(**kwargs)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
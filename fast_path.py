@@ -0,0 +1,232 @@
+"""
+This module contains a minimal ASGI handler for the /check_credit endpoint. For a payload as small
+as a credit approval request, FastAPI's dependency resolution, form model building and response
+serialization cost more CPU than the credit check itself. The handler parses the URL-encoded form
+directly, applies the same admission control and request deadline as the FastAPI route, calls
+process_credit_check, and writes pre-encoded response bytes. Its status codes and response bodies
+match the FastAPI route, including the 422 validation errors.
+
+The handler wraps the FastAPI application: every other request, including multipart forms and the
+lifespan events, is passed through to it unchanged.
+
+Classes:
+    CheckCreditFastPath
+
+Dependencies:
+    - json: The JSON module for encoding error responses.
+    - urllib.parse: The urllib.parse module for parsing the URL-encoded form.
+    - fastapi: The FastAPI framework, for its HTTPException and its error encoding.
+    - pydantic: The pydantic module for validating the form and headers like FastAPI does.
+    - app.model.credit_approval_request: The model for the credit approval request.
+    - app.model.request_deadline: The model for the time budget of a request.
+    - app.service.credit_check_service: The service for processing the credit check.
+"""
+
+import json
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qsl
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline, RequestTimeout
+from app.service.credit_check_service import process_credit_check
+
+_CREDIT_APPROVAL_REQUEST_ADAPTER = TypeAdapter(CreditApprovalRequest)
+_REQUEST_TIMEOUT_ADAPTER = TypeAdapter(RequestTimeout | None)
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+_RESULT_BODIES = {
+    True: b'{"credit_approval":"approved"}',
+    False: b'{"credit_approval":"denied"}',
+}
+
+
+def _encode_json(content: Any) -> bytes:
+    """Encode a response body the way FastAPI's JSONResponse does."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class CheckCreditFastPath:
+    """
+    An ASGI application answering URL-encoded POST requests to /check_credit directly, and passing
+    every other request through to the wrapped application.
+
+    Attributes:
+        app: The wrapped ASGI application, normally the FastAPI application.
+        db_service: The database service object.
+        admission_controller: The admission controller guarding the credit check route.
+        audit_log: The local audit log of the decisions, or None if it is disabled.
+
+    Methods:
+        __call__: Handle an ASGI connection.
+        _check_credit: Run the credit check of a request and build the response.
+        _get_form_values: Arrange the form fields in the order FastAPI passes them to the model.
+        _send: Send a complete HTTP response.
+    """
+
+    def __init__(self, app, db_service, admission_controller, audit_log=None) -> None:
+        self.app = app
+        self.db_service = db_service
+        self.admission_controller = admission_controller
+        self.audit_log = audit_log
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        """
+        Handle an ASGI connection, answering URL-encoded credit check requests and passing the
+        rest through to the wrapped application.
+        """
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] != "/check_credit"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").split(b";", 1)[0].strip()
+        if content_type != b"application/x-www-form-urlencoded":
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        try:
+            status, response_headers, response_body = await self._check_credit(
+                scope, headers, body
+            )
+        except HTTPException as e:
+            status = e.status_code
+            response_headers = list(_JSON_HEADERS)
+            response_headers.extend(
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in (e.headers or {}).items()
+            )
+            response_body = _encode_json({"detail": e.detail})
+
+        await self._send(send, status, response_headers, response_body)
+
+    async def _check_credit(
+        self, scope: dict, headers: dict[bytes, bytes], body: bytes
+    ) -> tuple[int, list, bytes]:
+        """
+        Run the credit check of a request in the order the FastAPI route resolves it: admission
+        control first, then the X-Request-Timeout header and the form, whose validation errors are
+        reported together with a 422.
+
+        Parameters:
+            scope (dict): The ASGI scope of the request.
+            headers (dict[bytes, bytes]): The request headers.
+            body (bytes): The URL-encoded form.
+
+        Returns:
+            tuple: The status code, headers and body of the response.
+
+        Raises:
+            HTTPException: The request was rejected by admission control or by the credit check.
+        """
+        api_key = headers.get(b"x-api-key")
+        client_id = self.admission_controller.get_client_id(
+            None if api_key is None else api_key.decode("latin-1"),
+            scope["client"][0] if scope.get("client") else None,
+        )
+        self.admission_controller.admit(client_id)
+        try:
+            errors: list = []
+            request_timeout = None
+            try:
+                raw_timeout = headers.get(b"x-request-timeout")
+                request_timeout = _REQUEST_TIMEOUT_ADAPTER.validate_python(
+                    None if raw_timeout is None else raw_timeout.decode("latin-1")
+                )
+            except ValidationError as e:
+                errors.extend(
+                    {**error, "loc": ("header", "x-request-timeout", *error["loc"])}
+                    for error in e.errors(include_url=False)
+                )
+
+            credit_approval_request = None
+            try:
+                credit_approval_request = _CREDIT_APPROVAL_REQUEST_ADAPTER.validate_python(
+                    self._get_form_values(body)
+                )
+            except ValidationError as e:
+                errors.extend(
+                    {**error, "loc": ("body", *error["loc"])}
+                    for error in e.errors(include_url=False)
+                )
+
+            if errors:
+                return 422, _JSON_HEADERS, _encode_json(
+                    {"detail": jsonable_encoder(errors)}
+                )
+
+            result = await process_credit_check(
+                credit_approval_request,
+                self.db_service,
+                RequestDeadline.from_request_timeout(request_timeout),
+                self.audit_log,
+            )
+            return 200, _JSON_HEADERS, _RESULT_BODIES[result["credit_approval"] == "approved"]
+        finally:
+            self.admission_controller.release()
+
+    @staticmethod
+    def _get_form_values(body: bytes) -> dict[str, str]:
+        """
+        Parse the URL-encoded form and arrange its fields the way FastAPI passes them to the model:
+        the non-empty model fields first, in declaration order, then every other field.
+
+        Parameters:
+            body (bytes): The URL-encoded form.
+
+        Returns:
+            dict[str, str]: The form fields.
+        """
+        form = dict(parse_qsl(body.decode("latin-1"), keep_blank_values=True))
+        values = {
+            name: form[name]
+            for name in CreditApprovalRequest.model_fields
+            if form.get(name, "") != ""
+        }
+        for name, value in form.items():
+            values.setdefault(name, value)
+        return values
+
+    @staticmethod
+    async def _send(
+        send: Callable[[dict], Awaitable[None]],
+        status: int,
+        headers: list,
+        body: bytes,
+    ) -> None:
+        """
+        Send a complete HTTP response.
+
+        Parameters:
+            send: The ASGI send callable.
+            status (int): The status code.
+            headers (list): The response headers, without the content length.
+            body (bytes): The response body.
+        """
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [*headers, (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
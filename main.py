@@ -1,43 +1,302 @@
 """
 This module contains the API endpoint for checking the approval status of a credit approval request.
-It uses the FastAPI framework to create the API endpoint. The API endpoint is a POST request that 
+It uses the FastAPI framework to create the API endpoint. The API endpoint is a POST request that
 takes in the form data for the credit approval request and returns the result of the credit check.
+`fast_app` wraps the FastAPI application with a raw ASGI fast path for /check_credit, and can be
+served instead of `app` (uvicorn main:fast_app) to cut the per-request framework overhead. In
+production, either one is run by the launcher in serve.py (python -m serve). When traffic capture
+is enabled, both entry points capture a sample of the credit check requests. The transaction
+history routes are only mounted when the transaction history is enabled, and answer the requests
+presenting its admin token in their X-Admin-Token header.
 
 Routes:
     /check_credit: The API endpoint for checking the approval status of a credit approval request.
+    /metrics: The API endpoint for reading the service's operational counters.
+    /stats: The API endpoint for reading the rolling approval statistics.
+    /transactions: The API endpoint for paging through the transactions of a card, if enabled.
+    /transactions/export: The API endpoint for exporting the transactions of a time range, if
+    enabled.
 
 Functions:
-    credit_check_route: The function that implements the API endpoint for checking the approval 
+    lifespan: The lifespan handler that drains background work on shutdown.
+    admit_credit_check_request: The dependency that applies admission control to a request.
+    get_request_deadline: The dependency that sets the deadline of a request.
+    credit_check_route: The function that implements the API endpoint for checking the approval
     status of a credit approval request.
+    metrics_route: The function that implements the API endpoint for reading the counters.
+    stats_route: The function that implements the API endpoint for reading the approval
+    statistics.
+    authorize_admin_request: The dependency that checks the admin token of a request.
+    transactions_route: The function that implements the API endpoint for paging through the
+    transactions of a card.
+    export_transactions_route: The function that implements the API endpoint for exporting the
+    transactions of a time range.
 
 Dependencies:
+    - os: The OS module for interacting with the operating system.
+    - datetime: The datetime module for the bounds of the exported range.
+    - anyio: The anyio module for sizing the thread pool of the synchronous routes.
     - fastapi: The FastAPI framework for building APIs.
     - app.model.credit_approval_request: The model for the credit approval request.
+    - app.model.request_deadline: The model for the time budget of a request.
     - app.service.credit_check_service: The service for processing the credit check.
-    - app: The module that initializes the database connection.
+    - app.service.utility.event_loop_monitor: The monitor of the event loop lag.
+    - fast_path: The raw ASGI fast path for the credit check endpoint.
+    - app.service.traffic_capture_service: The middleware capturing sampled requests.
+    - app.service.transaction_history_service: The service for the transaction history.
+    - app: The module that initializes the logging, the database connection, the admission
+    controller, the audit log, the traffic capture and the transaction history.
 """
 
-from typing import Annotated
-from fastapi import Form, FastAPI
+import os
+import datetime
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, Literal
+from anyio import to_thread
+from fastapi import APIRouter, Depends, Form, FastAPI, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from app.model.credit_approval_request import CreditApprovalRequest
-from app.service.credit_check_service import process_credit_check
-from app import init_db
+from app.model.request_deadline import RequestDeadline, RequestTimeout
+from app.service.utility.event_loop_monitor import EventLoopLagMonitor
+from app.service.credit_check_service import (
+    get_approval_stats,
+    get_db_executor_stats,
+    get_db_write_executor_stats,
+    get_local_executor_stats,
+    get_pipeline_stats,
+    get_priority_lane_stats,
+    get_velocity_stats,
+    process_credit_check,
+    wait_for_pending_transactions,
+)
+from app.service.traffic_capture_service import TrafficCaptureMiddleware
+from app.service.transaction_history_service import MAX_PAGE_SIZE
+from app import (
+    init_admission_controller,
+    init_audit_log,
+    init_db,
+    init_logging,
+    init_traffic_capture,
+    init_transaction_history,
+)
+from fast_path import CheckCreditFastPath
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """
+    Lifespan handler of the application. It sizes the thread pool running the synchronous routes
+    and dependencies from SERVER_THREADPOOL_SIZE, runs the event loop lag monitor, and on shutdown
+    waits for the transactions still being recorded in the background, flushes the audit log and
+    writes the captured requests.
+    """
+    threadpool_size = os.getenv("SERVER_THREADPOOL_SIZE")
+    if threadpool_size:
+        to_thread.current_default_thread_limiter().total_tokens = int(threadpool_size)
+    event_loop_monitor.start()
+    yield
+    await event_loop_monitor.stop()
+    await wait_for_pending_transactions()
+    if audit_log is not None:
+        audit_log.close()
+    if traffic_capture is not None:
+        traffic_capture.close()
+
+
+init_logging()
+app = FastAPI(lifespan=lifespan)
 db_service = init_db()
+admission_controller = init_admission_controller()
+audit_log = init_audit_log()
+traffic_capture = init_traffic_capture()
+transaction_history = init_transaction_history(db_service)
+event_loop_monitor = EventLoopLagMonitor(
+    interval=float(os.getenv("EVENT_LOOP_MONITOR_INTERVAL_SECONDS", "0.5"))
+)
+fast_app = CheckCreditFastPath(app, db_service, admission_controller, audit_log)
+if traffic_capture is not None:
+    app.add_middleware(TrafficCaptureMiddleware, capture=traffic_capture)
+    fast_app = TrafficCaptureMiddleware(fast_app, traffic_capture)
+
+
+async def admit_credit_check_request(request: Request) -> AsyncIterator[None]:
+    """
+    Dependency applying admission control to a credit check request. The client is identified by
+    its X-API-Key header if the key is trusted, otherwise by its IP address. Rejected requests are
+    answered with 429 or 503 before the credit check starts.
 
+    Parameters:
+        request (Request): The incoming HTTP request.
+    """
+    client_id = admission_controller.get_client_id(
+        request.headers.get("x-api-key"), request.client.host if request.client else None
+    )
+    admission_controller.admit(client_id)
+    try:
+        yield
+    finally:
+        admission_controller.release()
+
+
+def get_request_deadline(
+    x_request_timeout: Annotated[RequestTimeout | None, Header()] = None
+) -> RequestDeadline:
+    """
+    Dependency setting the deadline of a credit check request from its X-Request-Timeout header, in
+    seconds, falling back to REQUEST_TIMEOUT_SECONDS. The header must be a finite number greater
+    than zero, and is clamped to [REQUEST_TIMEOUT_MIN_SECONDS, REQUEST_TIMEOUT_MAX_SECONDS].
+
+    Parameters:
+        x_request_timeout (RequestTimeout | None): The time budget the client is willing to wait.
 
-@app.post("/check_credit")
-def credit_check_route(
-    credit_approval_request: Annotated[CreditApprovalRequest, Form()]
+    Returns:
+        RequestDeadline: The deadline of the request.
+    """
+    return RequestDeadline.from_request_timeout(x_request_timeout)
+
+
+@app.post("/check_credit", dependencies=[Depends(admit_credit_check_request)])
+async def credit_check_route(
+    credit_approval_request: Annotated[CreditApprovalRequest, Form()],
+    deadline: Annotated[RequestDeadline, Depends(get_request_deadline)],
 ) -> dict | str:
     """
     Function with the API endpoint to check the approval status of a credit approval request.
 
     Parameters:
         credit_approval_request (CreditApprovalRequest): Form data for the credit approval request.
+        deadline (RequestDeadline): The deadline of the request.
 
     Returns:
         dict: The result of the credit check.
     """
-    return process_credit_check(credit_approval_request, db_service)
+    return await process_credit_check(
+        credit_approval_request, db_service, deadline, audit_log
+    )
+
+
+@app.get("/metrics")
+def metrics_route() -> dict:
+    """
+    Function with the API endpoint to read the service's operational counters.
+
+    Returns:
+        dict: The admission counters per client, the load, shed requests and latency percentiles
+        of the priority lanes if they are enabled, the database calls made and avoided by the
+        credit check pipeline, the saturation and adaptive concurrency limit of the database
+        executor, the saturation of the transaction and local lookup executors, the saturation
+        of the event loop, the health of the read replicas, the win rate and latency of each
+        score provider, the size and false positive rates of the known card filter and the hits
+        of the score cache if they are enabled, the memory and exceeded limits of the velocity
+        checks, the counters of the audit log and the traffic capture if they are enabled, and
+        the card lookups and exports of the transaction history if it is enabled.
+    """
+    return {
+        "admission": admission_controller.get_counters(),
+        "priority_lanes": get_priority_lane_stats(),
+        "pipeline": get_pipeline_stats(),
+        "db_executor": get_db_executor_stats(),
+        "db_write_executor": get_db_write_executor_stats(),
+        "local_executor": get_local_executor_stats(),
+        "event_loop": event_loop_monitor.get_stats(),
+        "read_replicas": db_service.read_replicas.get_stats(),
+        "score_providers": db_service.score_lookup.get_stats(),
+        "known_cards": (
+            db_service.known_cards.get_stats() if db_service.known_cards is not None else None
+        ),
+        "score_cache": (
+            db_service.score_cache.get_stats() if db_service.score_cache is not None else None
+        ),
+        "velocity": get_velocity_stats(),
+        "audit_log": audit_log.get_stats() if audit_log is not None else None,
+        "traffic_capture": (
+            traffic_capture.get_stats() if traffic_capture is not None else None
+        ),
+        "transaction_history": (
+            transaction_history.get_stats() if transaction_history is not None else None
+        ),
+    }
+
+
+@app.get("/stats")
+def stats_route() -> dict:
+    """
+    This function implements the API endpoint for reading the approval statistics. The statistics
+    are maintained in memory as decisions are made, so dashboards can poll this endpoint instead of
+    querying the transactions table. With several workers, each worker reports its own decisions.
+
+    Returns:
+        dict: The approvals, denials, approval rate, error counts and tier outcomes over each
+        sliding time window.
+    """
+    return get_approval_stats()
+
+
+def authorize_admin_request(x_admin_token: Annotated[str | None, Header()] = None) -> None:
+    """
+    Dependency checking the admin token of a transaction history request, answering 401 when it
+    is missing or wrong.
+
+    Parameters:
+        x_admin_token (str | None): The admin token of the request.
+    """
+    transaction_history.authorize(x_admin_token)
+
+
+history_router = APIRouter(dependencies=[Depends(authorize_admin_request)])
+
+
+@history_router.post("/transactions")
+def transactions_route(
+    card_number: Annotated[str, Form()],
+    limit: Annotated[int, Form(ge=1, le=MAX_PAGE_SIZE)] = 50,
+    cursor: Annotated[str | None, Form()] = None,
+) -> dict:
+    """
+    This function implements the API endpoint for paging through the transactions of a card,
+    newest first. The card number is taken from the form body, so that it stays out of URLs and
+    access logs. The next page is requested by passing the next_cursor of the previous page.
+
+    Parameters:
+        card_number (str): The credit card number of the user.
+        limit (int): The maximum number of transactions of the page.
+        cursor (str | None): The next_cursor of the previous page.
+
+    Returns:
+        dict: The transactions of the page, and the cursor of the next page, None on the last
+        page.
+    """
+    return transaction_history.get_card_history(card_number, limit, cursor)
+
+
+@history_router.get("/transactions/export")
+def export_transactions_route(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+) -> StreamingResponse:
+    """
+    This function implements the API endpoint for exporting the transactions created in
+    [start, end), oldest first, as NDJSON or CSV. The export is streamed page by page, so its size
+    is not bounded by the memory of the service.
+
+    Parameters:
+        start (datetime.datetime): The start of the range, included.
+        end (datetime.datetime): The end of the range, excluded.
+        export_format (str): The format of the export, "ndjson" or "csv".
+
+    Returns:
+        StreamingResponse: The exported transactions.
+    """
+    chunks = transaction_history.export_transactions(start, end, export_format)
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{export_format}"'
+        },
+    )
+
+
+if transaction_history is not None:
+    app.include_router(history_router)
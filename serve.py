@@ -0,0 +1,228 @@
+"""
+This module contains the production launcher of the service. It runs the application under a
+gunicorn master process with uvicorn workers, using uvloop and httptools when they are installed.
+The number of workers defaults to one per available core, bounded by the CPU limit of the cgroup
+the service runs in, since each worker runs a single event loop. The modules of the application
+are imported in the master before the workers are forked, so their code and import-time data are
+shared copy-on-write between the workers. The application itself (main) is created in each
+worker, as it starts the background threads of the logging, the audit log and the traffic capture,
+which do not survive a fork.
+
+The launcher is configured from the environment:
+    - SERVER_APP: The application to serve, main:fast_app by default.
+    - SERVER_BIND: The address to listen on, 0.0.0.0:8000 by default.
+    - SERVER_WORKERS: The number of workers, derived from the available cores by default. The
+    in-memory state of each worker is its own, so the velocity limits of VELOCITY_LIMITS apply
+    per worker; see app.service.velocity_check_service.
+    - SERVER_KEEPALIVE_SECONDS: The time an idle keep-alive connection is kept open.
+    - SERVER_BACKLOG: The maximum number of connections waiting to be accepted.
+    - SERVER_THREADPOOL_SIZE: The number of threads running the synchronous routes and
+    dependencies of each worker, applied by the lifespan handler of main.
+    - SERVER_DRAIN_SECONDS: The time in-flight requests are given to finish on shutdown.
+    - SERVER_TIMEOUT_SECONDS: The time a silent worker is given before it is restarted.
+    - SERVER_FORWARDED_ALLOW_IPS: The comma-separated addresses and networks of the proxies, such
+    as the card router, whose X-Forwarded-For header gives the client address, 127.0.0.1,::1 by
+    default. Requests from any other peer are attributed to the peer itself.
+
+Signals sent to the master:
+    - TERM: Stop accepting connections, drain the in-flight requests of each worker, then run
+    the shutdown of its lifespan handler and exit.
+    - HUP: Start new workers and drain the old ones, recreating the application.
+    - USR2: Start a new master running the current code on the same sockets; the old master is
+    then stopped with TERM, for upgrades without dropped connections.
+
+The launcher can be run by executing the following command:
+    - python -m serve
+
+Functions:
+    get_cgroup_cpu_limit: Return the CPU limit of the cgroup of the process.
+    get_default_worker_count: Return the number of workers for the available CPUs.
+    select_event_loop: Return the fastest installed event loop and HTTP parser.
+    get_server_options: Return the server settings from the environment.
+    preload_modules: Import the modules of the application before the workers are forked.
+    serve: Run the application under gunicorn.
+
+Dependencies:
+    - gc: The gc module for freezing the preloaded objects before forking.
+    - importlib: The importlib module for preloading modules and detecting optional packages.
+    - math: The math module for rounding the CPU limit.
+    - os: The OS module for interacting with the operating system.
+    - gunicorn: The process manager running the workers, imported when the server is run.
+    - uvicorn_worker: The gunicorn worker running the ASGI application, imported when the server
+    is run.
+"""
+
+import gc
+import importlib
+import importlib.util
+import math
+import os
+
+PRELOADED_MODULES = (
+    "fastapi",
+    "pydantic",
+    "app",
+    "app.model.credit_approval_request",
+    "app.model.request_deadline",
+    "app.service.credit_check_service",
+    "app.service.database_service",
+    "app.service.admission_control_service",
+    "app.service.audit_log_service",
+    "app.service.traffic_capture_service",
+    "app.service.utility.event_loop_monitor",
+    "fast_path",
+)
+# The time left to the workers to run their lifespan shutdown after the drain, before the master
+# kills them.
+SHUTDOWN_SECONDS = 10
+
+
+def get_cgroup_cpu_limit(cgroup_root: str = "/sys/fs/cgroup") -> float | None:
+    """
+    Return the CPU limit of the cgroup of the process, read from cpu.max under cgroup v2 or from
+    the CFS quota and period under cgroup v1.
+
+    Parameters:
+        cgroup_root (str): The mount point of the cgroup file system.
+
+    Returns:
+        float | None: The number of CPUs the process may use, or None if it is not limited.
+    """
+    def read(*path: str) -> str:
+        with open(os.path.join(cgroup_root, *path), encoding="utf-8") as cgroup_file:
+            return cgroup_file.read().strip()
+
+    try:
+        quota, period = read("cpu.max").split()[:2]
+    except (OSError, ValueError):
+        try:
+            quota = read("cpu", "cpu.cfs_quota_us")
+            period = read("cpu", "cpu.cfs_period_us")
+        except OSError:
+            return None
+
+    if quota in ("max", "-1") or int(period) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def get_default_worker_count(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """
+    Return one worker per core the process may run on, bounded by the CPU limit of its cgroup,
+    rounded up.
+
+    Parameters:
+        cgroup_root (str): The mount point of the cgroup file system.
+
+    Returns:
+        int: The number of workers.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+
+    cpu_limit = get_cgroup_cpu_limit(cgroup_root)
+    if cpu_limit is not None:
+        cores = min(cores, math.ceil(cpu_limit))
+    return max(1, cores)
+
+
+def select_event_loop() -> tuple[str, str]:
+    """
+    Return uvloop and httptools when they are installed, falling back to the asyncio event loop
+    and the h11 parser.
+
+    Returns:
+        tuple[str, str]: The event loop and the HTTP parser of the workers.
+    """
+    loop = "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    return loop, http
+
+
+def get_server_options() -> dict:
+    """
+    Return the gunicorn settings of the server from the environment, and the trusted proxies
+    of the workers. The proxies are passed to the uvicorn workers directly, since gunicorn only
+    accepts single addresses.
+
+    Returns:
+        dict: The gunicorn settings, and the trusted proxies under forwarded_allow_ips.
+    """
+    return {
+        "bind": os.getenv("SERVER_BIND", "0.0.0.0:8000"),
+        "workers": int(os.getenv("SERVER_WORKERS") or get_default_worker_count()),
+        "keepalive": int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5")),
+        "backlog": int(os.getenv("SERVER_BACKLOG", "2048")),
+        "timeout": int(os.getenv("SERVER_TIMEOUT_SECONDS", "30")),
+        "graceful_timeout": (
+            math.ceil(float(os.getenv("SERVER_DRAIN_SECONDS", "20"))) + SHUTDOWN_SECONDS
+        ),
+        "forwarded_allow_ips": [
+            address.strip()
+            for address in os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1,::1").split(",")
+            if address.strip()
+        ],
+    }
+
+
+def preload_modules(module_names: tuple[str, ...] = PRELOADED_MODULES) -> None:
+    """
+    Import the modules of the application in the master, then move the objects they created out
+    of the reach of the garbage collector, so that collections in the workers do not write to the
+    shared pages.
+
+    Parameters:
+        module_names (tuple[str, ...]): The modules to import.
+    """
+    for module_name in module_names:
+        importlib.import_module(module_name)
+    gc.freeze()
+
+
+def serve(app_path: str | None = None) -> None:
+    """
+    Run the application under gunicorn until the master is stopped.
+
+    Parameters:
+        app_path (str | None): The application to serve, as module:attribute, SERVER_APP by
+        default.
+    """
+    from gunicorn.app.base import BaseApplication
+    from uvicorn_worker import UvicornWorker
+
+    app_path = app_path or os.getenv("SERVER_APP", "main:fast_app")
+    options = get_server_options()
+    forwarded_allow_ips = options.pop("forwarded_allow_ips")
+    loop, http = select_event_loop()
+
+    class CreditCheckWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": loop,
+            "http": http,
+            "timeout_graceful_shutdown": options["graceful_timeout"] - SHUTDOWN_SECONDS,
+            "forwarded_allow_ips": forwarded_allow_ips,
+        }
+
+    class CreditCheckServer(BaseApplication):
+        def load_config(self) -> None:
+            for name, value in {**options, "worker_class": CreditCheckWorker}.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            module_name, attribute = app_path.split(":", 1)
+            return getattr(importlib.import_module(module_name), attribute)
+
+    def when_ready(server) -> None:
+        server.log.info(
+            "Serving %s with %d workers, %s and %s", app_path, options["workers"], loop, http
+        )
+
+    options["when_ready"] = when_ready
+    preload_modules()
+    CreditCheckServer().run()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,142 @@
+"""
+This module contains the streaming exporter of the local audit log of the credit approval
+decisions. It writes the records of the selected hours as JSON lines or CSV, one audit file at a
+time, so that exporting a large log needs neither the database nor the whole log in memory. It
+also exports the records as a history for the what-if simulator of the rules, with the columns of
+HISTORY_COLUMNS.
+
+The exporter can be run by executing the following commands:
+    - python -m simulation.export_audit_log audit/ > decisions.jsonl
+    - python -m simulation.export_audit_log audit/ --since 2026-10-19T00 --format csv
+    - python -m simulation.export_audit_log audit/ --history history.npz
+
+Functions:
+    export_audit_log: Write the audit records of a directory to a text stream.
+    export_history: Save the audit records of a directory as a history for the rule simulator.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - csv: The CSV module for writing CSV exports.
+    - json: The JSON module for writing JSON lines exports.
+    - sys: The sys module for writing to the standard output.
+    - typing: The typing module for type hints.
+    - numpy: The numpy module for the columns of the history.
+    - stream_audit_records: The function that streams the audit records.
+    - HISTORY_COLUMNS: The columns of the history of the rule simulator.
+    - save_history: The function that saves a history of the rule simulator.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import TextIO
+import numpy as np
+from app.service.audit_log_service import stream_audit_records
+from simulation.rule_simulator import HISTORY_COLUMNS, save_history
+
+EXPORT_FIELDS = (
+    "timestamp",
+    "credit_card_number",
+    "is_approved",
+    "is_existing_customer",
+    "credit_tier",
+    "error_codes",
+    "credit_score",
+    "credit_duration",
+    "age_years",
+)
+
+
+def export_audit_log(
+    directory: str,
+    output: TextIO,
+    output_format: str = "jsonl",
+    since: str | None = None,
+    until: str | None = None,
+) -> int:
+    """
+    Write the audit records of a directory to a text stream.
+
+    Parameters:
+        directory (str): The directory of the audit log.
+        output (TextIO): The stream to write to.
+        output_format (str): "jsonl" for JSON lines, or "csv".
+        since (str | None): The first hour to export, as YYYY-MM-DDTHH in UTC.
+        until (str | None): The last hour to export, as YYYY-MM-DDTHH in UTC.
+
+    Returns:
+        int: The number of records written.
+    """
+    records = stream_audit_records(directory, since, until)
+    count = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    else:
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def export_history(
+    directory: str,
+    path: str,
+    since: str | None = None,
+    until: str | None = None,
+) -> int:
+    """
+    Save the audit records of a directory as a history for the rule simulator. Only the columns of
+    the history are kept while streaming, not the records. A decision that did not depend on the
+    credit score keeps its score and duration of -1, which no tier approves.
+
+    Parameters:
+        directory (str): The directory of the audit log.
+        path (str): The path of the .npz file of the history.
+        since (str | None): The first hour to export, as YYYY-MM-DDTHH in UTC.
+        until (str | None): The last hour to export, as YYYY-MM-DDTHH in UTC.
+
+    Returns:
+        int: The number of records saved.
+    """
+    columns: dict[str, list] = {name: [] for name in HISTORY_COLUMNS}
+    for record in stream_audit_records(directory, since, until):
+        columns["credit_score"].append(record["credit_score"])
+        columns["credit_duration"].append(record["credit_duration"])
+        columns["age_years"].append(record["age_years"])
+        columns["is_existing_customer"].append(record["is_existing_customer"])
+        columns["has_errors"].append(record["error_codes"] != 0)
+
+    save_history(
+        path,
+        {
+            name: np.array(columns[name], dtype=dtype)
+            for name, dtype in HISTORY_COLUMNS.items()
+        },
+    )
+    return len(columns["credit_score"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the local audit log of the decisions.")
+    parser.add_argument("directory", help="The directory of the audit log.")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--since", metavar="HOUR", help="The first hour, as YYYY-MM-DDTHH.")
+    parser.add_argument("--until", metavar="HOUR", help="The last hour, as YYYY-MM-DDTHH.")
+    parser.add_argument(
+        "--history", metavar="PATH", help="Save a history for the rule simulator instead."
+    )
+    args = parser.parse_args()
+
+    if args.history:
+        export_history(args.directory, args.history, args.since, args.until)
+    else:
+        export_audit_log(args.directory, sys.stdout, args.format, args.since, args.until)
+
+
+if __name__ == "__main__":
+    main()
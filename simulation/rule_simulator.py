@@ -0,0 +1,338 @@
+"""
+This module contains the what-if simulator of the credit approval rules. It replays the history of
+credit approval requests, stored in columnar form, against the current rule set of
+CreditApprovalChecker and one or more candidate rule sets, and reports how many decisions would
+flip and how the approval rate would change for each score tier and age band. Every rule set is
+evaluated with vectorized array operations over whole columns: the tiers are compiled into a table
+of the minimum credit duration for each credit score, so a decision costs one table lookup and a
+few comparisons per row.
+
+The history is an .npz file with the columns listed in HISTORY_COLUMNS, exported from the local
+audit log of the decisions by simulation.export_audit_log --history. A candidate rule set is a
+JSON file with the structure of CreditApprovalChecker.get_credit_criteria() under "tiers", and an
+optional "legal_age".
+
+The simulator can be run by executing the following commands:
+    - python -m simulation.rule_simulator history.npz --candidate candidate.json
+    - python -m simulation.rule_simulator --synthetic 20000000 --candidate candidate.json
+
+Classes:
+    RuleSet
+
+Functions:
+    load_history: Load the history of credit approval requests from an .npz file.
+    save_history: Save the history of credit approval requests to an .npz file.
+    generate_synthetic_history: Generate a random history for trying out rule sets.
+    get_age_band_labels: Return the label of each age band.
+    simulate: Compare the decisions of candidate rule sets to the current one.
+
+Dependencies:
+    - argparse: The argparse module for parsing command line arguments.
+    - json: The JSON module for reading candidate rule sets and writing reports.
+    - os: The OS module for interacting with the operating system.
+    - time: The time module for timing the simulation.
+    - numpy: The numpy module for the columnar history and vectorized evaluation.
+    - CreditApprovalChecker: The class holding the current approval rules.
+"""
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+from app.interface.utility.credit_approval_utils import CreditApprovalChecker
+
+HISTORY_COLUMNS = {
+    "credit_score": np.int16,
+    "credit_duration": np.int16,
+    "age_years": np.float32,
+    "is_existing_customer": np.bool_,
+    "has_errors": np.bool_,
+}
+
+AGE_BAND_EDGES = (18, 25, 35, 45, 55, 65)
+
+MAX_CREDIT_SCORE = 1000
+
+# Minimum duration of the scores no tier covers, which no credit duration reaches
+UNAPPROVABLE_DURATION = np.iinfo(np.int16).max
+
+
+class RuleSet:
+    """
+    A class to represent a set of credit approval rules compiled for vectorized evaluation.
+
+    Attributes:
+        name (str): The name of the rule set, used in the report.
+        tiers (dict): The score range and minimum duration of each credit tier, keyed by tier name.
+        legal_age (int): The minimum age of an approved creditee who is not an existing customer.
+
+    Methods:
+        current: Build the rule set currently enforced by CreditApprovalChecker.
+        from_file: Load a candidate rule set from a JSON file.
+        evaluate: Decide every request of the history.
+        tier_index: Return the index of the tier of each credit score.
+    """
+
+    def __init__(self, name: str, tiers: dict, legal_age: int) -> None:
+        self.name = name
+        self.tiers = tiers
+        self.legal_age = legal_age
+
+        # The smallest duration approved for each score, so that overlapping tiers keep the
+        # "any tier approves" semantics of CreditApprovalChecker
+        self._min_duration_by_score = np.full(
+            MAX_CREDIT_SCORE + 1, UNAPPROVABLE_DURATION, dtype=np.int16
+        )
+        for criteria in tiers.values():
+            score_min, score_max = criteria["range"]
+            scores = self._min_duration_by_score[score_min : score_max + 1]
+            np.minimum(scores, criteria["min_duration"], out=scores)
+
+    @classmethod
+    def current(cls) -> "RuleSet":
+        """
+        Build the rule set currently enforced by CreditApprovalChecker, from the same environment
+        variables.
+
+        Returns:
+            RuleSet: The current rule set.
+        """
+        return cls(
+            "current",
+            CreditApprovalChecker.get_credit_criteria(),
+            int(os.getenv("LEGAL_AGE", "18")),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        """
+        Load a candidate rule set from a JSON file. Tiers missing from the file keep their current
+        criteria, and the legal age defaults to the current one.
+
+        Parameters:
+            path (str): The path of the JSON file.
+
+        Returns:
+            RuleSet: The candidate rule set, named after the file.
+        """
+        with open(path, encoding="utf-8") as rule_file:
+            candidate = json.load(rule_file)
+
+        tiers = CreditApprovalChecker.get_credit_criteria()
+        tiers.update(candidate.get("tiers", {}))
+        return cls(
+            os.path.splitext(os.path.basename(path))[0],
+            tiers,
+            int(candidate.get("legal_age", os.getenv("LEGAL_AGE", "18"))),
+        )
+
+    def evaluate(self, history: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Decide every request of the history. Existing customers are approved, requests with card
+        validation errors are denied, and the others are approved if the creditee is of legal age
+        and their credit duration reaches the minimum of their credit score.
+
+        Parameters:
+            history (dict[str, np.ndarray]): The columns of the history.
+
+        Returns:
+            np.ndarray: The decision of each request.
+        """
+        min_duration = self._min_duration_by_score[
+            np.clip(history["credit_score"], 0, MAX_CREDIT_SCORE)
+        ]
+        approved = history["credit_duration"] >= min_duration
+        approved &= history["age_years"] >= self.legal_age
+        approved &= ~history["has_errors"]
+        approved |= history["is_existing_customer"]
+        return approved
+
+    def tier_index(self, credit_scores: np.ndarray) -> np.ndarray:
+        """
+        Return the index of the tier of each credit score, in the order of `tiers`, with
+        len(tiers) for the scores outside every tier.
+
+        Parameters:
+            credit_scores (np.ndarray): The credit scores.
+
+        Returns:
+            np.ndarray: The tier index of each credit score.
+        """
+        tier_by_score = np.full(MAX_CREDIT_SCORE + 1, len(self.tiers), dtype=np.int8)
+        for index, criteria in reversed(list(enumerate(self.tiers.values()))):
+            score_min, score_max = criteria["range"]
+            tier_by_score[score_min : score_max + 1] = index
+        return tier_by_score[np.clip(credit_scores, 0, MAX_CREDIT_SCORE)]
+
+
+def load_history(path: str) -> dict[str, np.ndarray]:
+    """
+    Load the history of credit approval requests from an .npz file, casting each column to its
+    type in HISTORY_COLUMNS.
+
+    Parameters:
+        path (str): The path of the .npz file.
+
+    Returns:
+        dict[str, np.ndarray]: The columns of the history.
+
+    Raises:
+        ValueError: A column of HISTORY_COLUMNS is missing or the columns differ in length.
+    """
+    with np.load(path) as archive:
+        missing = set(HISTORY_COLUMNS) - set(archive.files)
+        if missing:
+            raise ValueError(f"History is missing columns: {', '.join(sorted(missing))}")
+        history = {
+            name: archive[name].astype(dtype, copy=False)
+            for name, dtype in HISTORY_COLUMNS.items()
+        }
+
+    if len({len(column) for column in history.values()}) != 1:
+        raise ValueError("History columns differ in length")
+    return history
+
+
+def save_history(path: str, history: dict[str, np.ndarray]) -> None:
+    """
+    Save the history of credit approval requests to an .npz file.
+
+    Parameters:
+        path (str): The path of the .npz file.
+        history (dict[str, np.ndarray]): The columns of the history.
+    """
+    np.savez(path, **{name: history[name] for name in HISTORY_COLUMNS})
+
+
+def generate_synthetic_history(rows: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """
+    Generate a random history of credit approval requests, for trying out rule sets and
+    benchmarking the simulator without production data.
+
+    Parameters:
+        rows (int): The number of requests.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        dict[str, np.ndarray]: The columns of the history.
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "credit_score": rng.integers(300, 851, rows, dtype=np.int16),
+        "credit_duration": rng.integers(0, 16, rows, dtype=np.int16),
+        "age_years": rng.uniform(16, 80, rows).astype(np.float32),
+        "is_existing_customer": rng.random(rows, dtype=np.float32) < 0.2,
+        "has_errors": rng.random(rows, dtype=np.float32) < 0.05,
+    }
+
+
+def get_age_band_labels() -> list[str]:
+    """
+    Return the label of each age band delimited by AGE_BAND_EDGES.
+
+    Returns:
+        list[str]: The age band labels, from youngest to oldest.
+    """
+    labels = [f"<{AGE_BAND_EDGES[0]}"]
+    for lower, upper in zip(AGE_BAND_EDGES, AGE_BAND_EDGES[1:]):
+        labels.append(f"{lower}-{upper - 1}")
+    labels.append(f"{AGE_BAND_EDGES[-1]}+")
+    return labels
+
+
+def simulate(
+    history: dict[str, np.ndarray],
+    candidates: list[RuleSet],
+    current: RuleSet | None = None,
+) -> dict:
+    """
+    Compare the decisions of candidate rule sets to those of the current rule set. Requests are
+    grouped by the tier of their score under the current rule set and by the age band of the
+    creditee, and each group's approval counts are gathered with a single bincount.
+
+    Parameters:
+        history (dict[str, np.ndarray]): The columns of the history.
+        candidates (list[RuleSet]): The candidate rule sets.
+        current (RuleSet | None): The rule set to compare against, the current one by default.
+
+    Returns:
+        dict: The number of requests and the current approval rate, then for each candidate its
+        approval rate, the number of decisions flipping each way, and the approval rate delta of
+        each score tier and age band group.
+    """
+    current = current or RuleSet.current()
+    rows = len(history["credit_score"])
+    tier_labels = [*current.tiers, "unrated"]
+    band_labels = get_age_band_labels()
+
+    group = current.tier_index(history["credit_score"]).astype(np.intp) * len(band_labels)
+    group += np.searchsorted(AGE_BAND_EDGES, history["age_years"], side="right")
+    group_count = len(tier_labels) * len(band_labels)
+    group_sizes = np.bincount(group, minlength=group_count)
+
+    current_approved = current.evaluate(history)
+    current_by_group = np.bincount(group, weights=current_approved, minlength=group_count)
+
+    report: dict = {
+        "rows": rows,
+        "current_approval_rate": float(current_approved.mean()) if rows else 0.0,
+        "candidates": {},
+    }
+    for candidate in candidates:
+        approved = candidate.evaluate(history)
+        candidate_by_group = np.bincount(group, weights=approved, minlength=group_count)
+
+        groups = {}
+        for index in np.flatnonzero(group_sizes):
+            tier, band = divmod(int(index), len(band_labels))
+            groups[f"{tier_labels[tier]}/{band_labels[band]}"] = {
+                "rows": int(group_sizes[index]),
+                "approval_rate_delta": float(
+                    (candidate_by_group[index] - current_by_group[index])
+                    / group_sizes[index]
+                ),
+            }
+
+        report["candidates"][candidate.name] = {
+            "approval_rate": float(approved.mean()) if rows else 0.0,
+            "newly_approved": int(np.count_nonzero(approved & ~current_approved)),
+            "newly_denied": int(np.count_nonzero(current_approved & ~approved)),
+            "groups": groups,
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay the credit approval history against candidate rule sets."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("history", nargs="?", help="The .npz file of the history.")
+    source.add_argument(
+        "--synthetic", type=int, metavar="ROWS", help="Replay a random history instead."
+    )
+    parser.add_argument(
+        "--candidate",
+        action="append",
+        required=True,
+        metavar="PATH",
+        help="A JSON file of a candidate rule set. Can be given several times.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    history = (
+        generate_synthetic_history(args.synthetic)
+        if args.synthetic is not None
+        else load_history(args.history)
+    )
+    loaded = time.perf_counter()
+    report = simulate(history, [RuleSet.from_file(path) for path in args.candidate])
+    report["load_seconds"] = loaded - start
+    report["simulate_seconds"] = time.perf_counter() - loaded
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+-- Single round trip credit decision used by DataBaseService when DB_DECISION_MODE=rpc.
+--
+-- Looks up the score and duration of the card in credit_scores, evaluates the approval from the
+-- tier criteria sent by the API (so CreditApprovalChecker stays the single source of the rules),
+-- records the transaction, and returns the score, duration and decision in the same call.
+--
+-- When the card has no credit_scores row, nothing is recorded and found is false: the API then
+-- falls back to random values and records the transaction itself, as in the two-call path.
+--
+-- p_criteria is a JSON array of {"min_score": int, "max_score": int, "min_duration": int}.
+-- p_error_codes is the bitmask of the card validation errors (see CardValidationErrors), and
+-- requires the error_codes column added by transactions_error_codes.sql.
+
+drop function if exists public.check_credit_and_record_transaction(
+    text, text, boolean, boolean, jsonb
+);
+
+create or replace function public.check_credit_and_record_transaction(
+    p_card_number text,
+    p_error_codes integer,
+    p_is_existing_customer boolean,
+    p_is_of_legal_age boolean,
+    p_criteria jsonb
+)
+returns table (found boolean, score integer, duration integer, approved boolean)
+language plpgsql
+as $$
+declare
+    v_score integer;
+    v_duration integer;
+    v_approved boolean;
+begin
+    select cs.score, cs.duration
+    into v_score, v_duration
+    from public.credit_scores cs
+    where cs.card_number = p_card_number
+    limit 1;
+
+    if not found then
+        return query select false, null::integer, null::integer, null::boolean;
+        return;
+    end if;
+
+    v_approved := p_is_existing_customer or (
+        p_is_of_legal_age and exists (
+            select 1
+            from jsonb_array_elements(p_criteria) as criteria
+            where v_score between (criteria->>'min_score')::integer
+                              and (criteria->>'max_score')::integer
+              and v_duration >= (criteria->>'min_duration')::integer
+        )
+    );
+
+    insert into public.transactions (card_number, "approved?", error_codes)
+    values (p_card_number, v_approved, p_error_codes);
+
+    return query select true, v_score, v_duration, v_approved;
+end;
+$$;
@@ -0,0 +1,31 @@
+-- Stores the card validation errors of each transaction as the bitmask of CardValidationErrors in
+-- an indexed integer column, instead of their "; "-joined messages in the errors text column, so
+-- that error analytics filter integers instead of scanning text with LIKE:
+--
+--     select count(*) from public.transactions where error_codes & 32 <> 0;  -- failed Luhn checks
+--
+-- The flags are 1 card number length, 2 CVV length, 4 card expired, 8 card issuer, 16 card number
+-- type and 32 Luhn check. Existing rows are backfilled from their messages. The errors column is
+-- kept, but no longer written, so that instances still running the previous version keep recording
+-- transactions during the rollout; it can be dropped once they are gone.
+--
+-- Apply before deploying the version writing error_codes, then apply
+-- check_credit_and_record_transaction.sql.
+
+alter table public.transactions
+    add column if not exists error_codes integer not null default 0;
+
+update public.transactions
+set error_codes =
+      (case when errors like 'Card number must be between%' then 1 else 0 end)
+    | (case when errors like '%CVV must be%' then 2 else 0 end)
+    | (case when errors like '%Card is expired;%' then 4 else 0 end)
+    | (case when errors like '%Invalid credit card issuer type;%' then 8 else 0 end)
+    | (case when errors like '%Invalid credit card number type;%' then 16 else 0 end)
+    | (case when errors like '%Invalid credit card number;%' then 32 else 0 end)
+where errors is not null and errors <> '';
+
+-- Most transactions have no errors, so only the others are indexed
+create index if not exists transactions_error_codes_idx
+    on public.transactions (error_codes)
+    where error_codes <> 0;
@@ -0,0 +1,14 @@
+-- Indexes of the keyset-paginated transaction history. Pages continue after the (created_at, id)
+-- of the last row of the previous page instead of skipping an offset, so each page of a card's
+-- history is a range scan of the first index, newest first, and each page of an export is a range
+-- scan of the second, oldest first. The id column breaks ties between transactions recorded in
+-- the same microsecond.
+--
+-- The indexes are built concurrently so that transactions keep being recorded while they are
+-- built; run each statement on its own, outside of a transaction block.
+
+create index concurrently if not exists transactions_card_number_created_at_idx
+    on public.transactions (card_number, created_at desc, id desc);
+
+create index concurrently if not exists transactions_created_at_idx
+    on public.transactions (created_at, id);
@@ -0,0 +1,154 @@
+"""
+This module contains a test suite for the admission control in front of the /check_credit route.
+
+The test suite includes the following test cases:
+    - Test that a token bucket admits up to its burst and then rejects
+    - Test that a token bucket refills over time
+    - Test that a rate limited client is rejected with 429 and a Retry-After header
+    - Test that the global in-flight cap rejects with 503 until a slot is released
+    - Test that per-client overrides and counters are applied independently
+    - Test that only allow-listed API keys identify a client
+
+The test suite can be run by executing the following command:
+    - pytest test_admission_control.py
+
+Dependencies:
+    - pytest
+    - fastapi
+    - app.service.utility.token_bucket
+    - app.service.admission_control_service
+"""
+
+import pytest
+from fastapi import HTTPException
+from app.service.utility.token_bucket import TokenBucket
+from app.service.admission_control_service import AdmissionController
+
+
+def test_token_bucket_admits_up_to_burst():
+    """
+    Test case to check that a token bucket admits exactly `burst` requests at once.
+
+    Asserts:
+        - The first three acquisitions succeed
+        - The fourth acquisition returns the time until the next token
+    """
+    bucket = TokenBucket(rate=2, burst=3)
+    now = bucket.last_refill
+    assert [bucket.try_acquire(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire(now) == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_over_time():
+    """
+    Test case to check that a token bucket refills at its rate without exceeding its burst.
+
+    Asserts:
+        - A token is available again after 1 / rate seconds
+        - The bucket never holds more than its burst
+    """
+    bucket = TokenBucket(rate=2, burst=3)
+    now = bucket.last_refill
+    for _ in range(3):
+        bucket.try_acquire(now)
+    assert bucket.try_acquire(now + 0.5) == 0.0
+    bucket.try_acquire(now + 100)
+    assert bucket.tokens == 2
+
+
+def test_rate_limited_client_gets_429():
+    """
+    Test case to check that a client over its rate is rejected with a 429.
+
+    Asserts:
+        - The status code of the rejection is 429
+        - The Retry-After header is present
+        - The rejection is counted for the client
+    """
+    controller = AdmissionController(default_rate=1, default_burst=1, max_in_flight=10)
+    controller.admit("partner")
+    controller.release()
+    with pytest.raises(HTTPException) as exc_info:
+        controller.admit("partner")
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "1"
+    assert controller.get_counters()["clients"]["partner"] == {
+        "admitted": 1,
+        "rate_limited": 1,
+        "overloaded": 0,
+    }
+
+
+def test_in_flight_cap_gets_503():
+    """
+    Test case to check that the global in-flight cap sheds load with a 503.
+
+    Asserts:
+        - The status code of the rejection is 503
+        - A new request is admitted once a slot is released
+    """
+    controller = AdmissionController(
+        default_rate=100, default_burst=100, max_in_flight=1, overload_retry_after=2
+    )
+    controller.admit("a")
+    with pytest.raises(HTTPException) as exc_info:
+        controller.admit("b")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "2"
+    controller.release()
+    controller.admit("b")
+    assert controller.get_counters()["in_flight"] == 1
+
+
+def test_client_overrides_are_independent():
+    """
+    Test case to check that a client override does not affect other clients.
+
+    Asserts:
+        - The overridden client can burst beyond the default
+        - Another client is limited by the default burst
+    """
+    controller = AdmissionController(
+        default_rate=1,
+        default_burst=1,
+        max_in_flight=100,
+        client_overrides={"gold": (10, 5)},
+    )
+    for _ in range(5):
+        controller.admit("gold")
+    controller.admit("10.0.0.1")
+    with pytest.raises(HTTPException):
+        controller.admit("10.0.0.1")
+    counters = controller.get_counters()["clients"]
+    assert counters["gold"]["admitted"] == 5
+    assert counters["10.0.0.1"]["rate_limited"] == 1
+
+
+def test_untrusted_api_keys_are_rate_limited_by_address():
+    """
+    Test case to check that a request is only identified by its API key if the key is trusted.
+
+    Asserts:
+        - A trusted API key identifies the client by its label
+        - Untrusted or missing API keys fall back to the IP address of the client
+        - Rotating untrusted keys does not escape the rate limit of the address
+        - The counters are reported by label, without the keys
+    """
+    controller = AdmissionController(
+        default_rate=0.001,
+        default_burst=1,
+        max_in_flight=100,
+        trusted_api_keys={"secret-key": "partner"},
+    )
+    assert controller.get_client_id("secret-key", "10.0.0.1") == "partner"
+    assert controller.get_client_id("partner", "10.0.0.1") == "10.0.0.1"
+    assert controller.get_client_id("rotated", "10.0.0.1") == "10.0.0.1"
+    assert controller.get_client_id(None, None) == "unknown"
+
+    controller.admit(controller.get_client_id("key-1", "10.0.0.1"))
+    with pytest.raises(HTTPException) as exc_info:
+        controller.admit(controller.get_client_id("key-2", "10.0.0.1"))
+    assert exc_info.value.status_code == 429
+    controller.release()
+    controller.admit(controller.get_client_id("secret-key", "10.0.0.1"))
+    assert set(controller.get_counters()["clients"]) == {"10.0.0.1", "partner"}
@@ -0,0 +1,142 @@
+"""
+This module contains a test suite for the rolling approval statistics kept by the service.
+
+The test suite includes the following test cases:
+    - Test that events leave the sliding window once it has passed
+    - Test that a long idle period empties the window
+    - Test that decisions are aggregated by outcome, error type and credit tier
+    - Test that the credit check pipeline records each decision with its tier
+
+The test suite can be run by executing the following command:
+    - pytest test_approval_stats.py
+
+Dependencies:
+    - asyncio
+    - pytest
+    - fastapi
+    - conftest
+    - app.model.card_validation_errors
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.database_service
+    - app.service.approval_stats_service
+    - app.service.utility.sliding_window_counter
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from conftest import TEST_KEY
+from app.model.card_validation_errors import CardValidationErrors
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service.database_service import DataBaseService
+from app.service.approval_stats_service import ApprovalStats
+from app.service.utility.sliding_window_counter import SlidingWindowCounter
+from app.service import credit_check_service
+
+
+def test_events_leave_the_window():
+    """
+    Test case to check that counts only cover the last window.
+
+    Asserts:
+        - Events are counted while inside the window
+        - Each bucket's events are subtracted once it falls out of the window
+    """
+    counter = SlidingWindowCounter(window_seconds=10, bucket_count=10)
+    start = counter._newest
+
+    counter.add(["approved"], now=start + 0.5)
+    counter.add(["approved", "denied"], now=start + 5.5)
+    assert counter.get_counts(now=start + 9.5) == {"approved": 2, "denied": 1}
+    assert counter.get_counts(now=start + 10.5) == {"approved": 1, "denied": 1}
+    assert counter.get_counts(now=start + 15.5) == {}
+
+
+def test_idle_period_empties_the_window():
+    """
+    Test case to check that advancing far past the window clears every bucket.
+
+    Asserts:
+        - No count survives an idle period longer than the window
+        - New events are counted after the idle period
+    """
+    counter = SlidingWindowCounter(window_seconds=1, bucket_count=4)
+    start = counter._newest * 0.25
+
+    counter.add(["approved"] * 3, now=start)
+    counter.add(["denied"], now=start + 1000)
+    assert counter.get_counts(now=start + 1000) == {"denied": 1}
+
+
+def test_decisions_are_aggregated_by_outcome_error_and_tier():
+    """
+    Test case to check the aggregates reported for each window.
+
+    Asserts:
+        - Approvals, denials and the approval rate are reported
+        - Each card validation error is counted separately
+        - The outcomes of each credit tier are reported, with unscored decisions apart
+    """
+    stats = ApprovalStats([60, 3600])
+    no_errors = CardValidationErrors(0)
+    stats.record(True, no_errors, "good")
+    stats.record(False, no_errors, "good")
+    stats.record(True, no_errors, "")
+    stats.record(
+        False, CardValidationErrors.CARD_EXPIRED | CardValidationErrors.CARD_NUMBER_LUHN, ""
+    )
+
+    window = stats.get_stats()["60s"]
+    assert window["approved"] == 2
+    assert window["denied"] == 2
+    assert window["approval_rate"] == 0.5
+    assert window["errors"] == {"Card is expired": 1, "Invalid credit card number": 1}
+    assert window["tiers"] == {
+        "good": {"approved": 1, "denied": 1},
+        "unscored": {"approved": 1, "denied": 1},
+    }
+    assert stats.get_stats()["3600s"] == window
+
+
+def test_pipeline_records_decisions(servers, monkeypatch):
+    """
+    Test case to check that process_credit_check feeds the approval statistics.
+
+    Asserts:
+        - A scored decision is recorded under the tier of its score
+        - A request failing validation is recorded with its error
+    """
+    stats = ApprovalStats([60])
+    monkeypatch.setattr(credit_check_service, "_approval_stats", stats)
+    primary = servers(scores={"4929439557473282537": (650, 2)})
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    request_data = {
+        "first_name": "John",
+        "last_name": "Doe",
+        "date_of_birth": "2000-01-01",
+        "is_existing_customer": False,
+        "credit_card_number": "4929439557473282537",
+        "expiration_date": "2027-08",
+        "cvv": "123",
+        "credit_card_issuer": "Visa",
+    }
+
+    async def check_credit(**overrides) -> dict:
+        request = CreditApprovalRequest(**{**request_data, **overrides})
+        try:
+            return await credit_check_service.process_credit_check(
+                request, db_service, RequestDeadline.from_timeout(5)
+            )
+        finally:
+            await credit_check_service.wait_for_pending_transactions()
+
+    assert asyncio.run(check_credit()) == {"credit_approval": "denied"}
+    with pytest.raises(HTTPException):
+        asyncio.run(check_credit(credit_card_number="1234567890123456"))
+
+    window = stats.get_stats()["60s"]
+    assert window["tiers"]["good"] == {"approved": 0, "denied": 1}
+    assert window["errors"] == {"Invalid credit card number": 1}
@@ -0,0 +1,307 @@
+"""
+This module contains a test suite for the local audit log of the credit approval decisions.
+
+The test suite includes the following test cases:
+    - Test that appended decisions are flushed to the segment of their hour and read back
+    - Test that a record cut short by a crash is ignored
+    - Test that appending across hours leaves the file I/O to the writer
+    - Test that the segments of past hours are compacted into hourly columnar files
+    - Test that a segment whose compaction failed or was abandoned is read and compacted later
+    - Test that a later segment of the same hour and process does not replace a compacted one
+    - Test that the exporter streams the records as JSON lines and CSV
+
+The test suite can be run by executing the following command:
+    - pytest test_audit_log.py
+
+Dependencies:
+    - csv
+    - datetime
+    - numpy
+    - pytest
+    - io
+    - json
+    - os
+    - app.model.card_validation_errors
+    - app.service.audit_log_service
+    - simulation.export_audit_log
+"""
+
+import csv
+import datetime
+import io
+import json
+import os
+import numpy as np
+import pytest
+from app.model.card_validation_errors import CardValidationErrors
+from app.service import audit_log_service
+from app.service.audit_log_service import AuditLog, stream_audit_records
+from simulation.export_audit_log import export_audit_log
+
+DECISIONS = [
+    (
+        "4929439557473282537",
+        True,
+        False,
+        "good",
+        CardValidationErrors(0),
+        720,
+        8,
+        datetime.date(1990, 5, 17),
+    ),
+    (
+        "373337942404166",
+        False,
+        True,
+        "",
+        CardValidationErrors(0),
+        -1,
+        -1,
+        datetime.date(1975, 1, 2),
+    ),
+    (
+        "1234567890123456",
+        False,
+        False,
+        "",
+        CardValidationErrors.CARD_NUMBER_LUHN,
+        -1,
+        -1,
+        datetime.date(2001, 11, 30),
+    ),
+]
+
+
+def write_decisions(directory: str) -> AuditLog:
+    audit_log = AuditLog(directory, flush_seconds=60)
+    for decision in DECISIONS:
+        audit_log.append(*decision)
+    audit_log.close()
+    return audit_log
+
+
+def move_segments_to_past_hour(directory: str) -> None:
+    segments = os.path.join(directory, "segments")
+    for name in os.listdir(segments):
+        os.rename(
+            os.path.join(segments, name),
+            os.path.join(segments, "2000-01-01T00-" + name.rsplit("-", 1)[1]),
+        )
+
+
+def test_decisions_are_flushed_and_read_back(tmp_path):
+    """
+    Test case to check that appended decisions reach the segment of their hour on close.
+
+    Asserts:
+        - Every decision is flushed and the buffer is empty
+        - The records are read back in order with every field
+        - The age of the user is recorded at the time of the decision
+    """
+    audit_log = write_decisions(str(tmp_path))
+
+    stats = audit_log.get_stats()
+    assert stats["records"] == 3
+    assert stats["buffered_bytes"] == 0
+    assert len(os.listdir(tmp_path / "segments")) == 1
+
+    records = list(stream_audit_records(str(tmp_path)))
+    assert [
+        (
+            record["credit_card_number"],
+            record["is_approved"],
+            record["is_existing_customer"],
+            record["credit_tier"],
+            record["error_codes"],
+            record["credit_score"],
+            record["credit_duration"],
+        )
+        for record in records
+    ] == [decision[:7] for decision in DECISIONS]
+    assert records[0]["timestamp"] <= records[2]["timestamp"]
+    assert records[0]["age_years"] == pytest.approx(
+        (datetime.date.today() - DECISIONS[0][7]).days / 365.2425, abs=0.01
+    )
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    """
+    Test case to check that a record cut short by a crash during a write does not break reading.
+
+    Asserts:
+        - The complete records before the truncated one are read
+    """
+    write_decisions(str(tmp_path))
+    [segment] = (tmp_path / "segments").iterdir()
+    segment.write_bytes(segment.read_bytes()[:-5])
+
+    records = list(stream_audit_records(str(tmp_path)))
+    assert [record["credit_card_number"] for record in records] == [
+        decision[0] for decision in DECISIONS[:2]
+    ]
+
+
+def test_new_hour_is_written_by_writer(tmp_path, monkeypatch):
+    """
+    Test case to check that appending the first record of a new hour does no file I/O.
+
+    Asserts:
+        - No segment is written by the appends while the writer is held up
+        - Once written, the records of both hours are read back
+    """
+    current_hour = ["2000-01-01T00"]
+    monkeypatch.setattr(audit_log_service, "_hour_of", lambda _: current_hour[0])
+    audit_log = AuditLog(str(tmp_path), flush_seconds=60)
+    with audit_log._write_lock:
+        audit_log.append(*DECISIONS[0])
+        current_hour[0] = "2000-01-01T01"
+        audit_log.append(*DECISIONS[1])
+        assert os.listdir(tmp_path / "segments") == []
+        assert audit_log.get_stats()["buffered_bytes"] > 0
+
+    audit_log.close()
+    assert audit_log.get_stats()["buffered_bytes"] == 0
+    assert [
+        record["credit_card_number"] for record in stream_audit_records(str(tmp_path))
+    ] == [decision[0] for decision in DECISIONS[:2]]
+
+
+def test_past_hours_are_compacted(tmp_path):
+    """
+    Test case to check that the segments of past hours are compacted into hourly columnar files.
+
+    Asserts:
+        - The segment is replaced by a columnar file in the partition of its hour
+        - The columnar records equal the appended decisions
+        - The hour filters select the partition
+    """
+    audit_log = write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+
+    audit_log.compact()
+
+    assert os.listdir(tmp_path / "segments") == []
+    [columnar_file] = os.listdir(tmp_path / "hour=2000-01-01T00")
+    assert columnar_file.endswith(".npz")
+    assert audit_log.get_stats()["segments_compacted"] == 1
+
+    records = list(stream_audit_records(str(tmp_path), since="2000-01-01T00"))
+    assert [
+        (
+            record["credit_card_number"],
+            record["is_approved"],
+            record["is_existing_customer"],
+            record["credit_tier"],
+            record["error_codes"],
+            record["credit_score"],
+            record["credit_duration"],
+        )
+        for record in records
+    ] == [decision[:7] for decision in DECISIONS]
+    assert list(stream_audit_records(str(tmp_path), since="2000-01-01T01")) == []
+
+
+def test_failed_compaction_is_recovered(tmp_path, monkeypatch):
+    """
+    Test case to check that no segment is stranded by a failed or abandoned compaction.
+
+    Asserts:
+        - A segment whose columnar file fails to be written is put back and still exported
+        - A segment left claimed by a process that died is exported, then compacted
+    """
+    audit_log = write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(np, "savez_compressed", fail)
+        with pytest.raises(OSError):
+            audit_log.compact()
+    [segment] = os.listdir(tmp_path / "segments")
+    assert segment.endswith(".log")
+    assert len(list(stream_audit_records(str(tmp_path)))) == 3
+
+    dead_pid = 2**31 - 1
+    os.rename(
+        tmp_path / "segments" / segment,
+        tmp_path / "segments" / f"{segment}.0123456789abcdef.{dead_pid}.compacting",
+    )
+    assert len(list(stream_audit_records(str(tmp_path)))) == 3
+
+    audit_log.compact()
+    assert os.listdir(tmp_path / "segments") == []
+    assert len(os.listdir(tmp_path / "hour=2000-01-01T00")) == 1
+    assert len(list(stream_audit_records(str(tmp_path)))) == 3
+
+
+def test_compacting_the_same_segment_twice(tmp_path, monkeypatch):
+    """
+    Test case to check that compacting a segment of an hour and pid that was already compacted,
+    such as one flushed late or written by a restarted process reusing the pid, keeps both.
+
+    Asserts:
+        - Each compaction writes its own columnar file in the partition of the hour
+        - The records of both compactions are read back
+        - A claim left behind after its columnar file was written is removed, not compacted again
+    """
+    audit_log = write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+    audit_log.compact()
+    write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+    audit_log.compact()
+
+    assert len(os.listdir(tmp_path / "hour=2000-01-01T00")) == 2
+    assert sorted(
+        record["credit_card_number"] for record in stream_audit_records(str(tmp_path))
+    ) == sorted(decision[0] for decision in DECISIONS * 2)
+
+    write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+    remove = os.remove
+
+    def crash_before_release(path):
+        if str(path).endswith(".compacting"):
+            raise OSError("Killed")
+        remove(path)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "remove", crash_before_release)
+        with pytest.raises(OSError):
+            audit_log.compact()
+    assert len(list(stream_audit_records(str(tmp_path)))) == 9
+
+    audit_log.compact()
+    assert os.listdir(tmp_path / "segments") == []
+    assert len(os.listdir(tmp_path / "hour=2000-01-01T00")) == 3
+    assert len(list(stream_audit_records(str(tmp_path)))) == 9
+
+
+def test_exporter_streams_records(tmp_path):
+    """
+    Test case to check that the exporter writes the compacted and uncompacted records.
+
+    Asserts:
+        - The JSON lines export holds one line per record, compacted ones first
+        - The CSV export holds a header and one row per record
+    """
+    audit_log = write_decisions(str(tmp_path))
+    move_segments_to_past_hour(str(tmp_path))
+    audit_log.compact()
+    write_decisions(str(tmp_path))
+
+    output = io.StringIO()
+    assert export_audit_log(str(tmp_path), output) == 6
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["credit_card_number"] for line in lines] == [
+        decision[0] for decision in DECISIONS * 2
+    ]
+    assert lines[0]["is_approved"] is True
+
+    output = io.StringIO()
+    assert export_audit_log(str(tmp_path), output, "csv") == 6
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert len(rows) == 6
+    assert rows[2]["error_codes"] == str(int(CardValidationErrors.CARD_NUMBER_LUHN))
@@ -0,0 +1,227 @@
+"""
+This module contains a test suite for the BoundedExecutor running the blocking database calls.
+
+The test suite includes the following test cases:
+    - Test that calls are rejected once every thread is busy and the queue is full
+    - Test that queue wait time and active threads are reported
+    - Test that a queued call cancelled before it starts releases its capacity
+    - Test that a saturated executor takes the fallback decision path
+    - Test that transactions are recorded while the lookup executor is saturated
+
+The test suite can be run by executing the following command:
+    - pytest test_bounded_executor.py
+
+Dependencies:
+    - asyncio
+    - collections
+    - threading
+    - pytest
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.utility.bounded_executor
+    - app.service.score_provider_service
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import collections
+import threading
+import pytest
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service.utility.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from app.service.score_provider_service import HedgedScoreLookup, ScoreProvider
+from app.service import credit_check_service
+
+
+def test_rejects_calls_when_saturated():
+    """
+    Test case to check that the executor bounds the calls waiting for a thread.
+
+    Asserts:
+        - Calls up to the thread count plus the queue size are accepted
+        - The next call raises ExecutorSaturatedError and is counted as rejected
+        - Capacity is available again once the calls complete
+    """
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    futures = [executor.submit(release.wait) for _ in range(2)]
+
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit(release.wait)
+    assert executor.get_stats()["rejected"] == 1
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert executor.submit(lambda: 1).result(timeout=5) == 1
+    executor.shutdown()
+
+
+def test_reports_queue_wait_and_active_threads():
+    """
+    Test case to check the saturation metrics of the executor.
+
+    Asserts:
+        - A running call and a queued call are reported as such
+        - The queued call's wait is reflected in the queue wait percentiles
+    """
+    executor = BoundedExecutor("test", max_workers=1, max_queue=4)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_call():
+        started.set()
+        release.wait()
+
+    first = executor.submit(blocking_call)
+    second = executor.submit(lambda: None)
+    started.wait(timeout=5)
+    stats = executor.get_stats()
+    assert stats["active_threads"] == 1
+    assert stats["queued"] == 1
+
+    threading.Timer(0.05, release.set).start()
+    first.result(timeout=5)
+    second.result(timeout=5)
+    stats = executor.get_stats()
+    assert stats["completed"] == 2
+    assert stats["queue_wait_max_ms"] >= 40
+    assert stats["queue_wait_p99_ms"] >= stats["queue_wait_p50_ms"]
+    executor.shutdown()
+
+
+def test_cancelled_queued_call_releases_capacity():
+    """
+    Test case to check that a call timing out while still queued never runs.
+
+    Asserts:
+        - The awaiting task times out
+        - The queued call does not run, and its capacity is released
+    """
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    ran = []
+
+    async def run():
+        executor.submit(release.wait)
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(executor.run(ran.append, 1), timeout=0.05)
+
+    asyncio.run(run())
+    assert executor.get_stats()["queued"] == 0
+    release.set()
+    executor.shutdown()
+    assert ran == []
+
+
+def test_saturated_executor_uses_fallback(monkeypatch):
+    """
+    Test case to check that a credit check is still decided when the database executor is full.
+
+    Asserts:
+        - The response uses the fallback score and duration
+        - No database method is called
+        - The transaction dropped by the saturated transaction executor is counted
+    """
+
+    class UnreachableDataBaseService:
+        use_rpc = False
+
+        def __init__(self):
+            self.score_lookup = HedgedScoreLookup(
+                [ScoreProvider("primary", self.fetch_credit_score_and_duration_from_db)]
+            )
+
+        def fetch_credit_score_and_duration_from_db(self, _):
+            raise AssertionError("The database must not be called")
+
+        def record_credit_approval_request_transaction(self, *_):
+            raise AssertionError("The database must not be called")
+
+        @staticmethod
+        def get_fallback_credit_score_and_duration():
+            return 800, 20
+
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+    executor.submit(release.wait)
+    monkeypatch.setattr(credit_check_service, "_db_executor", executor)
+    monkeypatch.setattr(credit_check_service, "_db_write_executor", executor)
+    monkeypatch.setattr(credit_check_service, "_pipeline_counters", collections.Counter())
+
+    request = CreditApprovalRequest(
+        first_name="John",
+        last_name="Doe",
+        date_of_birth="2000-01-01",
+        is_existing_customer=False,
+        credit_card_number="4929439557473282537",
+        expiration_date="2027-08",
+        cvv="123",
+        credit_card_issuer="Visa",
+    )
+    result = asyncio.run(
+        credit_check_service.process_credit_check(
+            request, UnreachableDataBaseService(), RequestDeadline.from_timeout(5)
+        )
+    )
+    assert result == {"credit_approval": "approved"}
+    assert executor.get_stats()["rejected"] == 2
+    assert credit_check_service.get_pipeline_stats()["transactions_dropped"] == 1
+    release.set()
+    executor.shutdown()
+
+
+def test_transactions_have_their_own_capacity(monkeypatch):
+    """
+    Test case to check that a saturated lookup executor does not drop the transactions.
+
+    Asserts:
+        - The transaction is recorded on the transaction executor
+        - No transaction is dropped
+    """
+
+    class RecordingDataBaseService:
+        use_rpc = False
+
+        def __init__(self):
+            self.recorded: list = []
+            self.score_lookup = HedgedScoreLookup([])
+
+        def record_credit_approval_request_transaction(self, *args):
+            self.recorded.append(args)
+
+        @staticmethod
+        def get_fallback_credit_score_and_duration():
+            return 800, 20
+
+    lookups = BoundedExecutor("lookups", max_workers=1, max_queue=0)
+    release = threading.Event()
+    lookups.submit(release.wait)
+    monkeypatch.setattr(credit_check_service, "_db_executor", lookups)
+    monkeypatch.setattr(credit_check_service, "_pipeline_counters", collections.Counter())
+
+    request = CreditApprovalRequest(
+        first_name="John",
+        last_name="Doe",
+        date_of_birth="2000-01-01",
+        is_existing_customer=False,
+        credit_card_number="4929439557473282537",
+        expiration_date="2027-08",
+        cvv="123",
+        credit_card_issuer="Visa",
+    )
+    db_service = RecordingDataBaseService()
+
+    async def check_credit() -> dict:
+        result = await credit_check_service.process_credit_check(
+            request, db_service, RequestDeadline.from_timeout(5)
+        )
+        await credit_check_service.wait_for_pending_transactions()
+        return result
+
+    assert asyncio.run(check_credit()) == {"credit_approval": "approved"}
+    assert db_service.recorded == [("4929439557473282537", True, 0)]
+    assert "transactions_dropped" not in credit_check_service.get_pipeline_stats()
+    release.set()
+    lookups.shutdown()
@@ -0,0 +1,157 @@
+"""
+This module contains a test suite for the consistent hash routing of the credit checks to the
+service instances.
+
+The test suite includes the following test cases:
+    - Test that the ring spreads the cards and only moves the cards of a node joining or leaving
+    - Test that bounded loads keep every node within the load factor of the average
+    - Test that the router sends each card to the same instance and retries unreachable ones
+
+The test suite can be run by executing the following command:
+    - pytest test_card_router.py
+
+Dependencies:
+    - asyncio
+    - collections
+    - json
+    - math
+    - urllib.parse
+    - httpx
+    - app.service.card_router_service
+    - app.service.utility.consistent_hash
+"""
+
+import asyncio
+import collections
+import json
+import math
+from urllib.parse import parse_qs
+import httpx
+from app.service.card_router_service import CardRouter
+from app.service.utility.consistent_hash import ConsistentHashRing
+
+NODES = ("http://10.0.0.1:8000", "http://10.0.0.2:8000", "http://10.0.0.3:8000")
+CARDS = [f"4{number:015d}" for number in range(4000)]
+
+
+class UpstreamBody(httpx.AsyncByteStream):
+    """The body of an upstream response, streamed like a network response."""
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    async def __aiter__(self):
+        yield self.body
+
+
+def test_ring_spreads_cards_and_moves_few():
+    """
+    Test case to check the placement of the cards on the ring.
+
+    Asserts:
+        - Every node holds a fair share of the cards
+        - A joining node only takes cards from the others, about 1/n of them
+        - A leaving node only gives its own cards away
+    """
+    ring = ConsistentHashRing(NODES)
+    before = {card: ring.get_node(card) for card in CARDS}
+    shares = collections.Counter(before.values())
+    assert min(shares.values()) > len(CARDS) / len(NODES) * 0.7
+
+    ring.add("http://10.0.0.4:8000")
+    joined = {card: ring.get_node(card) for card in CARDS}
+    moved = [card for card in CARDS if joined[card] != before[card]]
+    assert all(joined[card] == "http://10.0.0.4:8000" for card in moved)
+    assert 0.15 < len(moved) / len(CARDS) < 0.35
+
+    ring.remove(NODES[0])
+    left = {card: ring.get_node(card) for card in CARDS}
+    assert all(left[card] == joined[card] for card in CARDS if joined[card] != NODES[0])
+
+
+def test_bounded_loads():
+    """
+    Test case to check that a hot card spills over to other nodes under the load bound.
+
+    Asserts:
+        - The first requests of a card go to its own node
+        - No node serves more than load_factor times the average in-flight requests
+        - Released nodes take the card back
+    """
+    ring = ConsistentHashRing(NODES, load_factor=1.25)
+    owner = ring.get_node(CARDS[0])
+
+    acquired = [ring.acquire(CARDS[0]) for _ in range(30)]
+    loads = collections.Counter(acquired)
+    assert acquired[0] == owner and loads[owner] == max(loads.values())
+    assert max(loads.values()) <= math.ceil(1.25 * 30 / len(NODES))
+    assert sum(stats["overflow"] for stats in ring.get_stats()) > 0
+
+    for node in acquired:
+        ring.release(node)
+    assert ring.acquire(CARDS[0]) == owner
+
+
+def test_router_routes_cards_and_retries():
+    """
+    Test case to check the forwarding of the requests by the router.
+
+    Asserts:
+        - Every check of a card reaches the same instance, and the cards spread over them
+        - The client address is passed on in X-Forwarded-For
+        - Requests to an unreachable instance are retried on the next one, and the instance is
+        ejected after repeated failures
+        - Requests without a card are forwarded, and the statistics are served
+    """
+    down: set[str] = set()
+    routed: dict[str, set[str]] = collections.defaultdict(set)
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        node = f"http://{request.url.host}:{request.url.port}"
+        if node in down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/check_credit":
+            card = parse_qs(request.content.decode())["credit_card_number"][0]
+            routed[card].add(node)
+        body = json.dumps({"forwarded_for": request.headers.get("x-forwarded-for")}).encode()
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json", "content-length": str(len(body))},
+            stream=UpstreamBody(body),
+        )
+
+    router = CardRouter(
+        ConsistentHashRing(NODES),
+        httpx.AsyncClient(transport=httpx.MockTransport(upstream)),
+        max_consecutive_errors=2,
+    )
+
+    async def run() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=router, client=("203.0.113.7", 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://router") as client:
+            responses = []
+            for card in CARDS[:50] * 2:
+                responses.append(
+                    await client.post("/check_credit", data={"credit_card_number": card})
+                )
+            down.add(router.ring.get_node(CARDS[0]))
+            for _ in range(3):
+                responses.append(
+                    await client.post("/check_credit", data={"credit_card_number": CARDS[0]})
+                )
+            responses.append(await client.get("/metrics"))
+            responses.append(await client.get("/router/stats"))
+            return responses
+
+    responses = asyncio.run(run())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert responses[0].json()["forwarded_for"] == "203.0.113.7"
+    assert all(len(routed[card]) == 1 for card in CARDS[1:50])
+    assert len(set().union(*routed.values())) == len(NODES)
+    assert len(routed[CARDS[0]]) == 2
+
+    stats = responses[-1].json()
+    assert stats["requests"] == 104 and stats["keyed"] == 103
+    assert stats["retries"] == 2 and stats["ejections"] == 1
+    assert stats["ejected"] == sorted(down)
@@ -0,0 +1,70 @@
+"""
+This module contains a test suite for the card validation errors kept as a bitmask of flags.
+
+The test suite includes the following test cases:
+    - Test that each validation sets its own flag
+    - Test that the 400 detail renders the messages of the previous string errors
+
+The test suite can be run by executing the following command:
+    - pytest test_card_validation_errors.py
+
+Dependencies:
+    - datetime
+    - app.interface.card_validation_interface
+    - app.model.card_validation_errors
+"""
+
+import datetime
+from app.interface.card_validation_interface import get_card_validation_errors
+from app.model.card_validation_errors import CardValidationErrors
+
+VALID_CARD = ("4929439557473282537", "123", datetime.date(2099, 1, 1), "Visa")
+
+
+def test_each_validation_sets_its_flag():
+    """
+    Test case to check the flags set by the card validations.
+
+    Asserts:
+        - A valid card has no flag set
+        - Each failed validation sets its own flag, and several failures combine
+    """
+    card_number, cvv, expiration_date, issuer = VALID_CARD
+    expired = datetime.date(2000, 1, 1)
+
+    assert get_card_validation_errors(*VALID_CARD) == CardValidationErrors(0)
+    assert get_card_validation_errors("4928", cvv, expiration_date, issuer) == (
+        CardValidationErrors.CARD_NUMBER_LENGTH | CardValidationErrors.CARD_NUMBER_LUHN
+    )
+    assert get_card_validation_errors(card_number, "12", expired, "Discover") == (
+        CardValidationErrors.CVV_LENGTH
+        | CardValidationErrors.CARD_EXPIRED
+        | CardValidationErrors.CARD_ISSUER
+    )
+
+
+def test_detail_matches_previous_messages(monkeypatch):
+    """
+    Test case to check that clients get the same 400 detail as when the errors were strings.
+
+    Asserts:
+        - The messages are joined in the order the validations run, each ending with "; "
+        - The length bounds are taken from the environment as before
+        - No errors render an empty detail
+    """
+    monkeypatch.setenv("MINIMUM_CREDIT_CARD_NUMBER_LENGTH", "8")
+    monkeypatch.setenv("MAXIMUM_CREDIT_CARD_NUMBER_LENGTH", "19")
+    monkeypatch.delenv("MINIMUM_CREDIT_CARD_CVV_LENGTH", raising=False)
+    monkeypatch.delenv("MAXIMUM_CREDIT_CARD_CVV_LENGTH", raising=False)
+
+    assert CardValidationErrors(63).get_detail() == (
+        "Card number must be between 8 and 19 digits; "
+        "CVV must be None or None digits; "
+        "Card is expired; "
+        "Invalid credit card issuer type; "
+        "Invalid credit card number type; "
+        "Invalid credit card number; "
+    )
+    errors = CardValidationErrors.CARD_NUMBER_LUHN | CardValidationErrors.CARD_EXPIRED
+    assert errors.get_detail() == "Card is expired; Invalid credit card number; "
+    assert CardValidationErrors(0).get_detail() == ""
@@ -0,0 +1,200 @@
+"""
+This module contains a test suite for the adaptive concurrency limit of the database calls.
+
+The test suite includes the following test cases:
+    - Test that the limit settles near the capacity of a simulated database
+    - Test that the limit follows the capacity when it drops
+    - Test that failed calls cut the limit and that an idle limit does not grow
+    - Test that the unloaded RTT is measured without dropping the limit
+    - Test that the executor sheds calls over the limit and reports it
+    - Test that cache hits mixed with database calls do not lower the unloaded RTT
+
+The test suite can be run by executing the following command:
+    - pytest test_concurrency_limit.py
+
+Dependencies:
+    - asyncio
+    - threading
+    - time
+    - pytest
+    - app.service.score_provider_service
+    - app.service.utility.bounded_executor
+    - app.service.utility.concurrency_limit
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from app.service.score_provider_service import HedgedScoreLookup, ScoreProvider
+from app.service.utility.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+from app.service.utility.concurrency_limit import GradientConcurrencyLimit
+
+UNLOADED_RTT = 0.01
+
+
+def simulate(limit: GradientConcurrencyLimit, capacity: int, calls: int, now: float = 0.0):
+    """
+    Run saturated traffic against a simulated database serving `capacity` calls at once and
+    queueing the others, so that the RTT grows with the calls in flight beyond its capacity.
+
+    Returns:
+        tuple[list[int], float]: The limit after each call, and the simulated time.
+    """
+    history = []
+    for _ in range(calls):
+        in_flight = limit.get_limit()
+        rtt = UNLOADED_RTT * max(1.0, in_flight / capacity)
+        now += rtt / in_flight
+        limit.on_sample(rtt, in_flight, now=now)
+        history.append(limit.get_limit())
+    return history, now
+
+
+def test_limit_settles_near_capacity():
+    """
+    Test case to check that the limit finds the capacity of the database without growing the
+    latency past its tolerance.
+
+    Asserts:
+        - The unloaded RTT is measured from the fastest calls
+        - The limit settles above the capacity, so throughput is not lost
+        - The limit stays below twice the capacity, far below the maximum
+    """
+    limit = GradientConcurrencyLimit(initial_limit=4, min_limit=2, max_limit=200)
+
+    history, _ = simulate(limit, capacity=20, calls=3000)
+
+    assert limit.get_stats()["unloaded_rtt_ms"] == pytest.approx(UNLOADED_RTT * 1000)
+    assert 20 <= min(history[-500:]) and max(history[-500:]) < 2 * 20
+
+
+def test_limit_follows_a_capacity_drop():
+    """
+    Test case to check that the limit shrinks when the database slows down.
+
+    Asserts:
+        - The limit falls below twice the new capacity
+        - The recent RTT is reported above the unloaded RTT
+    """
+    limit = GradientConcurrencyLimit(initial_limit=4, min_limit=2, max_limit=200)
+    _, now = simulate(limit, capacity=40, calls=3000)
+    before = limit.get_limit()
+
+    history, _ = simulate(limit, capacity=10, calls=1000, now=now)
+
+    assert before > 40 and max(history[-200:]) < 2 * 10
+    stats = limit.get_stats()
+    assert stats["short_rtt_ms"] > stats["unloaded_rtt_ms"]
+
+
+def test_failures_and_idle_traffic():
+    """
+    Test case to check the limit on failures and light traffic.
+
+    Asserts:
+        - Light traffic does not raise the limit
+        - A failed call cuts the limit multiplicatively, down to the minimum
+    """
+    limit = GradientConcurrencyLimit(initial_limit=20, min_limit=2, max_limit=200)
+    for _ in range(100):
+        limit.on_sample(UNLOADED_RTT, 3, now=1.0)
+    assert limit.get_limit() == 20
+
+    limit.on_sample(UNLOADED_RTT, 20, failed=True)
+    assert limit.get_limit() == 18
+    for _ in range(50):
+        limit.on_sample(UNLOADED_RTT, 20, failed=True)
+    assert limit.get_limit() == 2
+    assert limit.get_stats()["failures"] == 51
+
+
+def test_unloaded_rtt_is_measured_passively():
+    """
+    Test case to check that the unloaded RTT is the minimum RTT of the recent windows, measured
+    without holding calls back.
+
+    Asserts:
+        - The limit never drops below its initial value under steady traffic, from the first call
+        - A lasting rise of the latency becomes the new unloaded RTT within two windows
+    """
+    limit = GradientConcurrencyLimit(initial_limit=8, min_limit=2, max_limit=200, rtt_window=10.0)
+
+    history, now = simulate(limit, capacity=20, calls=200)
+    assert min(history) >= 8
+    assert limit.get_stats()["unloaded_rtt_ms"] == pytest.approx(UNLOADED_RTT * 1000)
+
+    for second in range(1, 21):
+        limit.on_sample(2 * UNLOADED_RTT, 1, now=now + second)
+    assert limit.get_stats()["unloaded_rtt_ms"] == pytest.approx(2 * UNLOADED_RTT * 1000)
+    assert limit.get_stats()["windows"] == 2
+
+
+def test_executor_sheds_over_the_limit():
+    """
+    Test case to check that the executor rejects calls beyond the adaptive limit.
+
+    Asserts:
+        - Calls past the limit raise ExecutorSaturatedError although threads are free
+        - Completed calls are sampled, and the limit is reported in the executor stats
+    """
+    limit = GradientConcurrencyLimit(initial_limit=2, min_limit=2, max_limit=8)
+    executor = BoundedExecutor("test", max_workers=4, max_queue=4, concurrency_limit=limit)
+    release = threading.Event()
+
+    futures = [executor.submit(release.wait) for _ in range(2)]
+    with pytest.raises(ExecutorSaturatedError):
+        executor.submit(release.wait)
+
+    release.set()
+    for future in futures:
+        future.result()
+    executor.shutdown()
+
+    stats = executor.get_stats()
+    assert stats["rejected"] == 1
+    assert stats["concurrency_limit"]["samples"] == 2
+    assert stats["concurrency_limit"]["limit"] == 2
+
+
+def test_cache_hits_do_not_feed_the_limit():
+    """
+    Test case to check that the local providers of a score lookup run outside the adaptive limit
+    of the database calls.
+
+    Asserts:
+        - Only the database calls, including those hedging the cache, are sampled by the limit
+        - The unloaded RTT is that of the database, not that of the cache hits
+        - The cache hits run on the local executor
+    """
+    limit = GradientConcurrencyLimit(initial_limit=8, min_limit=2, max_limit=200)
+    db_executor = BoundedExecutor("db", max_workers=4, max_queue=4, concurrency_limit=limit)
+    local_executor = BoundedExecutor("local", max_workers=2, max_queue=4)
+
+    def query_database(card_number: str) -> tuple[int, int]:
+        time.sleep(UNLOADED_RTT)
+        return 700, 60
+
+    lookup = HedgedScoreLookup(
+        [
+            ScoreProvider(
+                "cache",
+                lambda card_number: (700, 60) if int(card_number) % 2 else None,
+                local=True,
+            ),
+            ScoreProvider("primary", query_database, default_hedge_delay=1.0),
+        ]
+    )
+
+    async def look_up_cards():
+        for card_number in range(40):
+            await lookup.lookup(str(card_number), db_executor.run, run_local=local_executor.run)
+
+    asyncio.run(look_up_cards())
+    db_executor.shutdown()
+    local_executor.shutdown()
+
+    stats = limit.get_stats()
+    assert stats["samples"] == lookup.get_stats()["primary"]["calls"] >= 20
+    assert stats["unloaded_rtt_ms"] >= UNLOADED_RTT * 1000
+    assert local_executor.get_stats()["completed"] == 40
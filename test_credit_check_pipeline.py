@@ -0,0 +1,147 @@
+"""
+This module contains a test suite for the staged credit check pipeline in process_credit_check.
+Each test runs the pipeline against a local stand-in PostgREST server from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that the score is fetched when the decision depends on it
+    - Test that the score fetch is skipped for existing customers
+    - Test that the score fetch is skipped for invalid cards
+    - Test that the score fetch is skipped for creditees under the legal age
+
+The test suite can be run by executing the following command:
+    - pytest test_credit_check_pipeline.py
+
+Dependencies:
+    - asyncio
+    - pytest
+    - fastapi
+    - conftest
+    - app.model.card_validation_errors
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.database_service
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from conftest import TEST_KEY
+from app.model.card_validation_errors import CardValidationErrors
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service.database_service import DataBaseService
+from app.service.credit_check_service import (
+    get_pipeline_stats,
+    process_credit_check,
+    wait_for_pending_transactions,
+)
+
+base_data = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "date_of_birth": "2000-01-01",
+    "is_existing_customer": False,
+    "credit_card_number": "4929439557473282537",
+    "expiration_date": "2027-08",
+    "cvv": "123",
+    "credit_card_issuer": "Visa",
+}
+
+
+def check_credit(db_service: DataBaseService, **overrides) -> dict:
+    async def run() -> dict:
+        request = CreditApprovalRequest(**{**base_data, **overrides})
+        try:
+            return await process_credit_check(
+                request, db_service, RequestDeadline.from_timeout(5)
+            )
+        finally:
+            await wait_for_pending_transactions()
+
+    return asyncio.run(run())
+
+
+def count_change(before: dict, counter: str) -> int:
+    return get_pipeline_stats().get(counter, 0) - before.get(counter, 0)
+
+
+def test_score_is_fetched_when_decision_depends_on_it(servers):
+    """
+    Test case to check that an adult new applicant with a valid card gets a score lookup.
+
+    Asserts:
+        - The decision comes from the stored score
+        - The score is fetched once and the transaction recorded once
+    """
+    primary = servers(scores={"4929439557473282537": (350, 9)})
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    before = get_pipeline_stats()
+
+    assert check_credit(db_service) == {"credit_approval": "denied"}
+    assert primary.count("GET", "credit_scores") == 1
+    assert len(primary.transactions) == 1
+    assert count_change(before, "score_fetches") == 1
+
+
+def test_existing_customer_skips_score_fetch(servers):
+    """
+    Test case to check that existing customers are approved without a score lookup.
+
+    Asserts:
+        - The response is an approval
+        - No score is fetched, and the skipped fetch is counted
+        - The transaction is still recorded
+    """
+    primary = servers(scores={})
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    before = get_pipeline_stats()
+
+    assert check_credit(db_service, is_existing_customer=True) == {
+        "credit_approval": "approved"
+    }
+    assert primary.count("GET", "credit_scores") == 0
+    assert count_change(before, "score_fetches_avoided_existing_customer") == 1
+    assert primary.transactions[0]["approved?"] is True
+
+
+def test_invalid_card_skips_score_fetch(servers):
+    """
+    Test case to check that a request failing card validation never fetches a score.
+
+    Asserts:
+        - The status code of the exception is 400, with the message of the error as detail
+        - No score is fetched, and the skipped fetch is counted
+        - The transaction is recorded as denied with the bitmask of its errors
+    """
+    primary = servers()
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    before = get_pipeline_stats()
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_credit(db_service, credit_card_number="1234567890123456")
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid credit card number; "
+    assert primary.count("GET", "credit_scores") == 0
+    assert count_change(before, "score_fetches_avoided_invalid_card") == 1
+    assert primary.transactions[0]["approved?"] is False
+    assert primary.transactions[0]["error_codes"] == CardValidationErrors.CARD_NUMBER_LUHN
+
+
+def test_under_legal_age_skips_score_fetch(servers):
+    """
+    Test case to check that creditees under the legal age are denied without a score lookup.
+
+    Asserts:
+        - The response is a denial
+        - No score is fetched, and the skipped fetch is counted
+    """
+    primary = servers()
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    before = get_pipeline_stats()
+
+    assert check_credit(db_service, date_of_birth="2015-01-01") == {
+        "credit_approval": "denied"
+    }
+    assert primary.count("GET", "credit_scores") == 0
+    assert count_change(before, "score_fetches_avoided_under_legal_age") == 1
@@ -0,0 +1,135 @@
+"""
+This module contains a test suite for the raw ASGI fast path of the /check_credit endpoint. Each test
+sends the same request to the FastAPI application and to the fast path, and compares the responses.
+The application is connected to a local stand-in PostgREST server from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that the fast path answers like the FastAPI route
+    - Test that admission control rejects requests like the FastAPI route
+    - Test that other requests are passed through to the FastAPI application
+
+The test suite can be run by executing the following command:
+    - pytest test_fast_path.py
+
+Dependencies:
+    - importlib
+    - pytest
+    - fastapi
+    - app
+    - conftest
+"""
+
+import importlib
+import pytest
+from fastapi.testclient import TestClient
+import app
+from conftest import TEST_KEY, StandInPostgrest
+
+base_data = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "date_of_birth": "2000-01-01",
+    "is_existing_customer": False,
+    "credit_card_number": "4929439557473282537",
+    "expiration_date": "2027-08",
+    "cvv": "123",
+    "credit_card_issuer": "Visa",
+}
+
+
+@pytest.fixture(scope="module")
+def main():
+    server = StandInPostgrest(
+        scores={"4929439557473282537": (350, 10), "373337942404166": (350, 9)}
+    )
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SUPABASE_URL", server.url)
+        monkeypatch.setenv("SUPABASE_KEY", TEST_KEY)
+        monkeypatch.setenv("RATE_LIMIT_REQUESTS_PER_SECOND", "1000")
+        monkeypatch.setenv("RATE_LIMIT_BURST", "1000")
+        monkeypatch.setenv(
+            "RATE_LIMIT_CLIENT_OVERRIDES", "limited-route:0.001:1,limited-fast:0.001:1"
+        )
+        monkeypatch.setenv(
+            "TRUSTED_API_KEYS", "limited-route:route-secret,limited-fast:fast-secret"
+        )
+        yield importlib.import_module("main")
+    # Write the last log records while pytest still captures them
+    app.stop_logging()
+    server.shutdown()
+    server.server_close()
+
+
+def post(asgi_app, data: dict, headers: dict, count: int = 1) -> list:
+    with TestClient(asgi_app) as client:
+        return [
+            client.post("/check_credit", data=data, headers=headers) for _ in range(count)
+        ]
+
+
+@pytest.mark.parametrize(
+    "data, headers",
+    [
+        (base_data, {}),
+        ({**base_data, "credit_card_number": "373337942404166"}, {}),
+        ({**base_data, "is_existing_customer": "true"}, {}),
+        ({**base_data, "credit_card_number": "1234567890123456"}, {}),
+        ({**base_data, "cvv": ""}, {}),
+        ({key: value for key, value in base_data.items() if key != "cvv"}, {}),
+        ({**base_data, "date_of_birth": "01/01/2000"}, {}),
+        ({**base_data, "is_existing_customer": "maybe"}, {"X-Request-Timeout": "abc"}),
+        (base_data, {"X-Request-Timeout": "0"}),
+    ],
+)
+def test_fast_path_matches_route(main, data, headers):
+    """
+    Test case to check that the fast path answers every kind of request like the FastAPI route.
+
+    Asserts:
+        - The status codes are equal
+        - The response bodies are equal, byte for byte
+        - The content types are equal
+    """
+    [expected] = post(main.app, data, headers)
+    [actual] = post(main.fast_app, data, headers)
+
+    assert actual.status_code == expected.status_code
+    assert actual.content == expected.content
+    assert actual.headers["content-type"] == expected.headers["content-type"]
+
+
+def test_fast_path_applies_admission_control(main):
+    """
+    Test case to check that the fast path rejects rate limited clients like the FastAPI route.
+
+    Asserts:
+        - The first request of a client is admitted and the second is rejected with a 429
+        - The rejection carries the same body and Retry-After header
+    """
+    responses = {}
+    for name, asgi_app in (("route", main.app), ("fast", main.fast_app)):
+        admitted, responses[name] = post(
+            asgi_app, base_data, {"X-API-Key": f"{name}-secret"}, count=2
+        )
+        assert admitted.status_code == 200
+
+    assert responses["fast"].status_code == responses["route"].status_code == 429
+    assert responses["fast"].content == responses["route"].content
+    assert responses["fast"].headers["retry-after"] == responses["route"].headers["retry-after"]
+
+
+def test_other_requests_pass_through(main):
+    """
+    Test case to check that the fast path leaves other requests to the FastAPI application.
+
+    Asserts:
+        - Other routes are served by the FastAPI application
+        - Multipart credit check requests are served by the FastAPI route
+    """
+    with TestClient(main.fast_app) as fast_client:
+        assert set(fast_client.get("/stats").json()) == {"60s", "900s", "3600s"}
+        response = fast_client.post(
+            "/check_credit",
+            files={key: (None, str(value)) for key, value in base_data.items()},
+        )
+    assert response.json() == {"credit_approval": "approved"}
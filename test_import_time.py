@@ -0,0 +1,79 @@
+"""
+This module contains a test suite for the startup imports of the application.
+
+The test suite includes the following test cases:
+    - Test that the heavy Supabase modules are not imported at startup
+    - Test that the full Supabase client is only imported on first use
+    - Test that the startup import time stays within the threshold of the stored baseline
+
+The test suite can be run by executing the following command:
+    - pytest test_import_time.py
+
+Dependencies:
+    - subprocess
+    - sys
+    - benchmarks.import_time
+"""
+
+import subprocess
+import sys
+from benchmarks.import_time import (
+    FORBIDDEN_MODULES,
+    get_regression,
+    measure_import_time,
+    run_benchmark,
+)
+
+
+def test_startup_does_not_import_heavy_modules():
+    """
+    Test case to check that startup only loads the PostgREST client.
+
+    Asserts:
+        - None of the supabase, gotrue, storage3, realtime, websockets, aiohttp or supafunc
+          packages is imported
+        - The PostgREST client is imported
+    """
+    _, modules = measure_import_time()
+    top_level_modules = {module.split(".")[0] for module in modules}
+    assert top_level_modules.isdisjoint(FORBIDDEN_MODULES)
+    assert "postgrest" in top_level_modules
+
+
+def test_supabase_client_is_imported_on_first_use():
+    """
+    Test case to check that the supabase package is loaded lazily by the database service.
+
+    Asserts:
+        - The supabase package is not imported with the database service
+        - The supabase package is imported when the full client is accessed
+    """
+    script = (
+        "import sys\n"
+        "from app.service.database_service import DataBaseService\n"
+        "service = DataBaseService.__new__(DataBaseService)\n"
+        "service._url, service._key = 'http://localhost', 'header.payload.signature'\n"
+        "print('supabase' in sys.modules)\n"
+        "service.supabase\n"
+        "print('supabase' in sys.modules)\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.split() == ["False", "True"]
+
+
+def test_startup_import_time_within_baseline():
+    """
+    Test case to check the startup import time against benchmarks/import_time_baseline.json.
+
+    Asserts:
+        - A baseline is stored
+        - The median of three runs exceeds it by no more than IMPORT_TIME_REGRESSION_THRESHOLD
+        - The check reports a total over the threshold as a regression
+    """
+    result = run_benchmark(runs=3)
+
+    assert result["baseline_us"]
+    assert get_regression(result) is None
+    assert get_regression({**result, "total_us": result["baseline_us"] * 2}, threshold=0.25)
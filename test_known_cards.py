@@ -0,0 +1,162 @@
+"""
+This module contains a test suite for the Bloom filter of the card numbers with a credit score.
+The database tests run against local stand-in PostgREST servers from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that the Bloom filter has no false negatives and stays near its false positive rate
+    - Test that the filter is loaded page by page, refreshed incrementally and rebuilt when full
+    - Test that cards ruled out by the filter skip the database and use the fallback
+    - Test that a lookup is counted once by the filter however many providers it skips
+    - Test that the database function is not called for cards ruled out by the filter
+
+The test suite can be run by executing the following command:
+    - pytest test_known_cards.py
+
+Dependencies:
+    - asyncio
+    - conftest
+    - app.service.database_service
+    - app.service.known_cards_service
+    - app.service.utility.bloom_filter
+    - app.service.utility.bounded_executor
+"""
+
+import asyncio
+from conftest import TEST_KEY
+from app.service.database_service import DataBaseService
+from app.service.known_cards_service import KnownCardFilter
+from app.service.utility.bloom_filter import BloomFilter
+from app.service.utility.bounded_executor import BoundedExecutor
+
+KNOWN_CARD = "4929439557473282537"
+UNKNOWN_CARD = "373337942404166"
+executor = BoundedExecutor("test", max_workers=2, max_queue=2)
+
+
+def test_bloom_filter_rates():
+    """
+    Test case to check the membership answers of the Bloom filter.
+
+    Asserts:
+        - Every added item is reported as present
+        - The false positive rate at capacity is close to the configured one
+        - The size follows the capacity and false positive rate
+    """
+    bloom_filter = BloomFilter(10000, 0.01)
+    for index in range(10000):
+        bloom_filter.add(f"card-{index}")
+
+    assert all(f"card-{index}" in bloom_filter for index in range(10000))
+    false_positives = sum(f"other-{index}" in bloom_filter for index in range(10000))
+    assert false_positives / 10000 < 0.02
+    assert bloom_filter.size_bytes() == 11982
+    assert 0.005 < bloom_filter.estimated_false_positive_rate() < 0.015
+
+
+def test_filter_loads_incrementally():
+    """
+    Test case to check the loading of the filter from pages of card numbers.
+
+    Asserts:
+        - Every card may be known until the filter is loaded
+        - The first refresh loads every page
+        - Later refreshes only load the cards after the last cursor
+        - The filter is rebuilt with twice the capacity once it is past its capacity
+    """
+    cards = [f"card-{index}" for index in range(5)]
+    loads = []
+
+    def load_page(cursor, page_size):
+        loads.append(cursor)
+        start = 0 if cursor is None else cursor
+        return [(index + 1, cards[index]) for index in range(start, len(cards))][:page_size]
+
+    known_cards = KnownCardFilter(load_page, capacity=4, page_size=2)
+    assert "card-9" in known_cards
+
+    known_cards.refresh()
+    assert loads == [None, 2, 4]
+    assert all(card in known_cards for card in cards)
+    assert known_cards.get_stats()["capacity"] == 4
+
+    cards.append("card-5")
+    loads.clear()
+    known_cards.refresh()
+    assert loads == [None, 2, 4, 6]
+    assert "card-5" in known_cards
+    assert known_cards.get_stats()["capacity"] == 8
+
+    loads.clear()
+    known_cards.refresh()
+    assert loads == [6]
+
+
+def test_unknown_cards_skip_the_database(servers):
+    """
+    Test case to check that lookups of cards ruled out by the filter make no database call.
+
+    Asserts:
+        - A known card is looked up in credit_scores
+        - An unknown card is not looked up and gets no score
+        - The skip and the observed false positive rate are reported
+    """
+    primary = servers(scores={KNOWN_CARD: (700, 8)})
+    db_service = DataBaseService(primary.url, TEST_KEY, known_cards_filter=True)
+    db_service.known_cards.stop()
+    db_service.known_cards.refresh()
+
+    assert asyncio.run(db_service.score_lookup.lookup(KNOWN_CARD, executor.run)) == (700, 8)
+    lookups = primary.count("GET", "card_number=eq.")
+    assert asyncio.run(db_service.score_lookup.lookup(UNKNOWN_CARD, executor.run)) is None
+    assert db_service.fetch_credit_score_and_duration_from_db(UNKNOWN_CARD) is not None
+    assert primary.count("GET", "card_number=eq.") == lookups
+
+    assert db_service.score_lookup.get_stats()["primary"]["skipped"] == 2
+    stats = db_service.known_cards.get_stats()
+    assert stats["cards"] == 1
+    assert stats["definitely_absent"] == 2
+    assert stats["observed_false_positive_rate"] == 0.0
+
+
+def test_filter_counts_each_lookup_once(servers, monkeypatch):
+    """
+    Test case to check that a lookup skipping both the cache and credit_scores is counted once.
+
+    Asserts:
+        - Both filtered providers are skipped
+        - The lookup is counted once as definitely absent
+    """
+    monkeypatch.setenv("SCORE_CACHE_MAX_ENTRIES", "100")
+    primary = servers(scores={KNOWN_CARD: (700, 8)})
+    db_service = DataBaseService(primary.url, TEST_KEY, known_cards_filter=True)
+    db_service.known_cards.stop()
+    db_service.known_cards.refresh()
+
+    assert asyncio.run(db_service.score_lookup.lookup(UNKNOWN_CARD, executor.run)) is None
+
+    provider_stats = db_service.score_lookup.get_stats()
+    assert provider_stats["cache"]["skipped"] == provider_stats["primary"]["skipped"] == 1
+    assert db_service.known_cards.get_stats()["definitely_absent"] == 1
+
+
+def test_unknown_cards_skip_the_database_function(servers):
+    """
+    Test case to check that the database function is not called for cards ruled out by the filter.
+
+    Asserts:
+        - The database function is called for a known card
+        - No call is made for an unknown card, which is left to the two-call path
+    """
+    primary = servers(rpc_enabled=True, scores={KNOWN_CARD: (700, 8)})
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, use_rpc=True, known_cards_filter=True
+    )
+    db_service.known_cards.stop()
+    db_service.known_cards.refresh()
+
+    assert db_service.check_credit_and_record_transaction(KNOWN_CARD, 0, False, True, [])
+    assert (
+        db_service.check_credit_and_record_transaction(UNKNOWN_CARD, 0, False, True, [])
+        is None
+    )
+    assert primary.count("POST", "check_credit_and_record_transaction") == 1
@@ -0,0 +1,80 @@
+"""
+This module contains a test suite for the micro-benchmark suite of the validators, decision
+functions and models.
+
+The test suite includes the following test cases:
+    - Test that the generated card numbers pass the Luhn check at every length
+    - Test that every case runs and is measured
+    - Test that regressions beyond the threshold are reported
+
+The test suite can be run by executing the following command:
+    - pytest test_micro_benchmarks.py
+
+Dependencies:
+    - app.interface.utility.credit_validation_utils
+    - benchmarks.micro_benchmarks
+"""
+
+from app.interface.utility.credit_validation_utils import CreditCardValidator
+from benchmarks.micro_benchmarks import (
+    find_regressions,
+    get_cases,
+    make_luhn_valid_card_number,
+    measure_case,
+)
+
+
+def test_generated_card_numbers_pass_luhn_check():
+    """
+    Test case to check the card numbers benchmarked by the Luhn cases.
+
+    Asserts:
+        - Each card number has the requested length
+        - Each card number passes the Luhn check, so the whole algorithm is timed
+    """
+    for length in range(8, 20):
+        card_number = make_luhn_valid_card_number(length)
+        assert len(card_number) == length
+        assert not CreditCardValidator.get_luhn_validation_errors(card_number)
+
+
+def test_every_case_is_measured():
+    """
+    Test case to check that every case can be run and measured.
+
+    Asserts:
+        - Every case runs without raising
+        - The measurement reports a positive time and the allocated bytes
+    """
+    cases = get_cases()
+    for case in cases.values():
+        case()
+
+    result = measure_case(cases["get_card_validation_errors"], repeats=1, loop_seconds=0.001)
+    assert result["ns_per_call"] > 0
+    assert result["peak_alloc_bytes"] >= 0
+
+
+def test_regressions_beyond_threshold_are_reported():
+    """
+    Test case to check the comparison of the results to the baseline.
+
+    Asserts:
+        - Increases within the threshold are accepted
+        - Slower and allocation-heavier cases are reported
+        - Cases without a baseline are not compared
+    """
+    baseline = {
+        "fast": {"ns_per_call": 100.0, "peak_alloc_bytes": 100},
+        "lean": {"ns_per_call": 100.0, "peak_alloc_bytes": 100},
+    }
+    results = {
+        "fast": {"ns_per_call": 140.0, "peak_alloc_bytes": 110},
+        "lean": {"ns_per_call": 110.0, "peak_alloc_bytes": 200},
+        "new": {"ns_per_call": 1000.0, "peak_alloc_bytes": 1000},
+    }
+
+    regressions = find_regressions(results, baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("fast: ns_per_call")
+    assert regressions[1].startswith("lean: peak_alloc_bytes")
@@ -0,0 +1,150 @@
+"""
+This module contains a test suite for the priority lanes of the credit checks.
+
+The test suite includes the following test cases:
+    - Test that existing customers and cached scores take the high-priority lane
+    - Test that low-priority requests are shed first and freed slots go to high priority first
+    - Test that a request whose deadline passes while queued is abandoned
+
+The test suite can be run by executing the following command:
+    - pytest test_priority_lanes.py
+
+Dependencies:
+    - asyncio
+    - pytest
+    - fastapi
+    - conftest
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.credit_check_service
+    - app.service.database_service
+    - app.service.priority_lane_service
+"""
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from conftest import TEST_KEY
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service import credit_check_service
+from app.service.database_service import DataBaseService
+from app.service.priority_lane_service import HIGH_PRIORITY, LOW_PRIORITY, PriorityLanes
+
+
+def test_requests_take_their_lane(servers, monkeypatch):
+    """
+    Test case to check the lane of the credit checks run by process_credit_check.
+
+    Asserts:
+        - A new applicant whose score is not cached takes the low-priority lane
+        - The same card, once its score is cached, and an existing customer take the
+        high-priority lane
+        - The latency percentiles of each lane are reported
+    """
+    lanes = PriorityLanes()
+    monkeypatch.setattr(credit_check_service, "_priority_lanes", lanes)
+    monkeypatch.setenv("SCORE_CACHE_MAX_ENTRIES", "100")
+    db_service = DataBaseService(servers().url, TEST_KEY)
+    request_data = {
+        "first_name": "John",
+        "last_name": "Doe",
+        "date_of_birth": "2000-01-01",
+        "is_existing_customer": False,
+        "credit_card_number": "4929439557473282537",
+        "expiration_date": "2099-08",
+        "cvv": "123",
+        "credit_card_issuer": "Visa",
+    }
+
+    async def check_credit(**overrides) -> dict:
+        request = CreditApprovalRequest(**{**request_data, **overrides})
+        try:
+            return await credit_check_service.process_credit_check(
+                request, db_service, RequestDeadline.from_timeout(5)
+            )
+        finally:
+            await credit_check_service.wait_for_pending_transactions()
+
+    asyncio.run(check_credit())
+    asyncio.run(check_credit())
+    existing_customer = check_credit(
+        is_existing_customer=True, credit_card_number="4111111111111111"
+    )
+    assert asyncio.run(existing_customer) == {"credit_approval": "approved"}
+
+    stats = credit_check_service.get_priority_lane_stats()
+    assert stats[LOW_PRIORITY]["admitted"] == 1
+    assert stats[HIGH_PRIORITY]["admitted"] == 2
+    assert stats[HIGH_PRIORITY]["latency_p99_ms"] >= stats[HIGH_PRIORITY]["latency_p50_ms"]
+    assert stats[HIGH_PRIORITY]["in_flight"] == stats[LOW_PRIORITY]["in_flight"] == 0
+
+
+def test_low_priority_is_shed_first():
+    """
+    Test case to check the scheduling of the lanes under overload.
+
+    Asserts:
+        - A low-priority request finding the low-priority queue full is shed with a 503
+        - A high-priority request finding every slot taken is queued rather than shed
+        - A freed low-priority slot goes to the queued high-priority request before the queued
+        low-priority one
+    """
+    lanes = PriorityLanes(high_limit=1, low_limit=1, high_max_queue=2, low_max_queue=1)
+    started: list[str] = []
+
+    async def run() -> None:
+        release = asyncio.Event()
+
+        async def request(priority: str, name: str) -> None:
+            async with lanes.slot(priority, RequestDeadline.from_timeout(5)):
+                started.append(name)
+                await release.wait()
+
+        tasks = [asyncio.create_task(request(LOW_PRIORITY, "low-1"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request(LOW_PRIORITY, "low-2")))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as e:
+            await request(LOW_PRIORITY, "low-3")
+        assert e.value.status_code == 503 and "Retry-After" in e.value.headers
+
+        tasks.append(asyncio.create_task(request(HIGH_PRIORITY, "high-1")))
+        tasks.append(asyncio.create_task(request(HIGH_PRIORITY, "high-2")))
+        await asyncio.sleep(0)
+        stats = lanes.get_stats()
+        assert stats[HIGH_PRIORITY]["waiting"] == 1 and stats[LOW_PRIORITY]["waiting"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert started == ["low-1", "high-1", "high-2", "low-2"]
+    stats = lanes.get_stats()
+    assert stats[LOW_PRIORITY]["shed"] == 1 and stats[HIGH_PRIORITY]["shed"] == 0
+    assert stats[HIGH_PRIORITY]["borrowed"] == 1
+
+
+def test_queued_request_expires():
+    """
+    Test case to check that a queued request is abandoned once its deadline has passed.
+
+    Asserts:
+        - The request is abandoned with a 504
+        - The request leaves the queue, and the slot it waited for stays with its holder
+    """
+    lanes = PriorityLanes(high_limit=1, low_limit=1)
+
+    async def run() -> None:
+        async with lanes.slot(LOW_PRIORITY, RequestDeadline.from_timeout(5)):
+            with pytest.raises(HTTPException) as e:
+                async with lanes.slot(LOW_PRIORITY, RequestDeadline.from_timeout(0.05)):
+                    pass
+            assert e.value.status_code == 504
+            stats = lanes.get_stats()[LOW_PRIORITY]
+            assert stats["waiting"] == 0 and stats["in_flight"] == 1
+
+    asyncio.run(run())
+    stats = lanes.get_stats()[LOW_PRIORITY]
+    assert stats["expired"] == 1 and stats["in_flight"] == 0
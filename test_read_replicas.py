@@ -0,0 +1,123 @@
+"""
+This module contains a test suite for the read/write split of the DataBaseService. Each test starts
+local stand-in PostgREST servers, from conftest.py, for the primary database and its read
+replicas.
+
+The test suite includes the following test cases:
+    - Test that score lookups go to the replicas and transactions to the primary
+    - Test that a failing replica is ejected and its traffic moves to the healthy replica
+    - Test that a slow replica receives less traffic than a fast one
+    - Test that reads fall back to the primary when every replica is ejected
+    - Test that a read failing on a replica is retried on another replica
+
+The test suite can be run by executing the following command:
+    - pytest test_read_replicas.py
+
+Dependencies:
+    - conftest
+    - app.service.database_service
+"""
+
+from conftest import TEST_KEY
+from app.service.database_service import DataBaseService
+
+
+def test_reads_use_replicas_and_writes_use_primary(servers):
+    """
+    Test case to check the read/write split.
+
+    Asserts:
+        - Score lookups never reach the primary
+        - Score lookups are spread over both replicas
+        - Transactions are only written to the primary
+    """
+    primary, replica_a, replica_b = servers(), servers(), servers()
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, read_urls=[replica_a.url, replica_b.url]
+    )
+    for _ in range(20):
+        assert db_service.fetch_credit_score_and_duration_from_db("123") == (800, 5)
+        db_service.record_credit_approval_request_transaction("123", True, 0)
+
+    assert primary.count("GET", "credit_scores") == 0
+    assert replica_a.count("GET", "credit_scores") > 0
+    assert replica_b.count("GET", "credit_scores") > 0
+    assert primary.count("POST", "transactions") == 20
+    assert replica_a.count("POST", "transactions") == 0
+
+
+def test_failing_replica_is_ejected(servers, monkeypatch):
+    """
+    Test case to check that a replica failing repeatedly is taken out of rotation.
+
+    Asserts:
+        - The failing replica receives no more traffic once ejected
+        - The replica is reported as ejected
+    """
+    monkeypatch.setenv("READ_REPLICA_MAX_CONSECUTIVE_ERRORS", "2")
+    primary, healthy, failing = servers(), servers(), servers(failing=True)
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, read_urls=[healthy.url, failing.url]
+    )
+    for _ in range(30):
+        db_service.fetch_credit_score_and_duration_from_db("123")
+
+    assert failing.count("GET", "credit_scores") == 2
+    stats = {s["url"]: s for s in db_service.read_replicas.get_stats()}
+    assert stats[failing.url]["ejected"]
+    assert not stats[healthy.url]["ejected"]
+
+
+def test_slow_replica_receives_less_traffic(servers):
+    """
+    Test case to check that replicas are balanced by latency.
+
+    Asserts:
+        - The fast replica serves more lookups than the slow replica
+    """
+    primary, fast, slow = servers(), servers(), servers(delay=0.02)
+    db_service = DataBaseService(primary.url, TEST_KEY, read_urls=[fast.url, slow.url])
+    for _ in range(40):
+        db_service.fetch_credit_score_and_duration_from_db("123")
+
+    assert fast.count("GET", "credit_scores") > slow.count("GET", "credit_scores")
+
+
+def test_reads_fall_back_to_primary_when_all_replicas_ejected(servers, monkeypatch):
+    """
+    Test case to check that the primary serves reads when no replica is healthy.
+
+    Asserts:
+        - A lookup failing on the only replica is retried on the primary
+        - The primary serves the lookups once the only replica is ejected
+        - The score comes from the primary rather than the random fallback
+    """
+    monkeypatch.setenv("READ_REPLICA_MAX_CONSECUTIVE_ERRORS", "1")
+    primary, failing = servers(), servers(failing=True)
+    db_service = DataBaseService(primary.url, TEST_KEY, read_urls=[failing.url])
+    assert db_service.fetch_credit_score_and_duration_from_db("123") == (800, 5)
+    assert db_service.fetch_credit_score_and_duration_from_db("123") == (800, 5)
+
+    assert failing.count("GET", "credit_scores") == 1
+    assert primary.count("GET", "credit_scores") == 2
+
+
+def test_failed_read_is_retried_on_another_replica(servers):
+    """
+    Test case to check that a read failing on a replica is retried once elsewhere.
+
+    Asserts:
+        - Every lookup is answered with the score rather than the random fallback
+        - Lookups failing on the failing replica are retried on the healthy replica
+        - The primary serves no reads while a healthy replica is left
+    """
+    primary, healthy, failing = servers(), servers(), servers(failing=True)
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, read_urls=[healthy.url, failing.url]
+    )
+    for _ in range(10):
+        assert db_service.fetch_credit_score_and_duration_from_db("123") == (800, 5)
+
+    assert failing.count("GET", "credit_scores") >= 1
+    assert healthy.count("GET", "credit_scores") == 10
+    assert primary.count("GET", "credit_scores") == 0
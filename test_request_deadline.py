@@ -0,0 +1,161 @@
+"""
+This module contains a test suite for the request deadlines carried through process_credit_check.
+
+The test suite includes the following test cases:
+    - Test that the remaining budget shrinks and honours the reserve
+    - Test that an expired request is abandoned before any database call
+    - Test that a score fetch running out of time takes the fallback decision path
+    - Test that the X-Request-Timeout header is validated and clamped
+
+The test suite can be run by executing the following command:
+    - pytest test_request_deadline.py
+
+Dependencies:
+    - asyncio
+    - collections
+    - time
+    - pytest
+    - fastapi
+    - pydantic
+    - app.model.request_deadline
+    - app.model.credit_approval_request
+    - app.service.score_provider_service
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import collections
+import time
+import pytest
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from app.model.request_deadline import RequestDeadline, RequestTimeout
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.service import credit_check_service
+from app.service.score_provider_service import HedgedScoreLookup, ScoreProvider
+from app.service.credit_check_service import (
+    process_credit_check,
+    wait_for_pending_transactions,
+)
+
+base_request = CreditApprovalRequest(
+    first_name="John",
+    last_name="Doe",
+    date_of_birth="2000-01-01",
+    is_existing_customer=False,
+    credit_card_number="4929439557473282537",
+    expiration_date="2027-08",
+    cvv="123",
+    credit_card_issuer="Visa",
+)
+
+
+class SlowDataBaseService:
+    """A stand-in database service whose score lookup takes `delay` seconds."""
+
+    def __init__(self, delay: float) -> None:
+        self.use_rpc = False
+        self.delay = delay
+        self.calls: list = []
+        self.score_lookup = HedgedScoreLookup(
+            [ScoreProvider("slow", self.fetch_credit_score_and_duration_from_db)]
+        )
+
+    def fetch_credit_score_and_duration_from_db(self, credit_card_number):
+        self.calls.append("fetch")
+        time.sleep(self.delay)
+        return 300, 0
+
+    @staticmethod
+    def get_fallback_credit_score_and_duration() -> tuple:
+        return 800, 5
+
+    def record_credit_approval_request_transaction(self, *args):
+        self.calls.append("record")
+
+
+def test_remaining_budget_honours_reserve():
+    """
+    Test case to check the remaining budget of a deadline.
+
+    Asserts:
+        - The remaining budget never exceeds the timeout
+        - The reserve is subtracted from the remaining budget
+        - The remaining budget is never negative
+    """
+    deadline = RequestDeadline.from_timeout(1)
+    assert 0.9 < deadline.remaining() <= 1
+    assert 0.4 < deadline.remaining(reserve=0.5) <= 0.5
+    assert deadline.remaining(reserve=5) == 0.0
+    assert not deadline.is_expired()
+
+
+def test_expired_request_is_abandoned_before_db_work():
+    """
+    Test case to check that an already expired request never reaches the database.
+
+    Asserts:
+        - The status code of the exception is 504
+        - No database call was made
+    """
+    db_service = SlowDataBaseService(delay=0)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(
+            process_credit_check(base_request, db_service, RequestDeadline.from_timeout(0))
+        )
+    assert exc_info.value.status_code == 504
+    assert db_service.calls == []
+
+
+def test_score_fetch_timeout_takes_fallback_path(monkeypatch):
+    """
+    Test case to check that a score fetch running out of budget uses the fallback values.
+
+    Asserts:
+        - The decision is made from the fallback score
+        - The transaction is still recorded within the reserved budget
+        - The timeout is counted along with the fallback
+    """
+    monkeypatch.setattr(credit_check_service, "_pipeline_counters", collections.Counter())
+    db_service = SlowDataBaseService(delay=0.5)
+
+    async def check_credit() -> dict:
+        deadline = RequestDeadline.from_timeout(0.2)
+        result = await process_credit_check(base_request, db_service, deadline)
+        await wait_for_pending_transactions()
+        return result
+
+    result = asyncio.run(check_credit())
+    assert result == {"credit_approval": "approved"}
+    assert db_service.calls == ["fetch", "record"]
+    stats = credit_check_service.get_pipeline_stats()
+    assert stats["score_fetch_timeouts"] == stats["score_fallbacks"] == 1
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "nan", "inf", "abc"])
+def test_invalid_request_timeout_is_rejected(value):
+    """
+    Test case to check that only finite time budgets greater than zero are accepted.
+
+    Asserts:
+        - The value fails validation
+    """
+    with pytest.raises(ValidationError):
+        TypeAdapter(RequestTimeout).validate_python(value)
+
+
+def test_request_timeout_is_clamped(monkeypatch):
+    """
+    Test case to check that the time budget of a request is clamped to the configured bounds.
+
+    Asserts:
+        - A budget below the minimum is raised to the minimum
+        - A budget above the maximum is lowered to the maximum
+        - A missing budget falls back to REQUEST_TIMEOUT_SECONDS
+    """
+    monkeypatch.setenv("REQUEST_TIMEOUT_SECONDS", "2")
+    monkeypatch.setenv("REQUEST_TIMEOUT_MIN_SECONDS", "1")
+    monkeypatch.setenv("REQUEST_TIMEOUT_MAX_SECONDS", "10")
+    assert 0.9 < RequestDeadline.from_request_timeout(0.001).remaining() <= 1
+    assert 9.9 < RequestDeadline.from_request_timeout(1e9).remaining() <= 10
+    assert 1.9 < RequestDeadline.from_request_timeout(None).remaining() <= 2
@@ -0,0 +1,166 @@
+"""
+This module contains a test suite for the single round trip decision through the
+check_credit_and_record_transaction database function. Each test runs process_credit_check against
+a local stand-in PostgREST server from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that a decision takes a single round trip in RPC mode
+    - Test that the function's decision matches the tier rules
+    - Test that a card without a score falls back to the two-call path
+    - Test that a missing function switches the service to the two-call path
+    - Test that a call failing after it was sent is not recorded again by the two-call path
+
+The test suite can be run by executing the following command:
+    - pytest test_rpc_decision.py
+
+Dependencies:
+    - asyncio
+    - time
+    - pytest
+    - fastapi
+    - conftest
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.database_service
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from conftest import TEST_KEY
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service.database_service import DataBaseService
+from app.service.credit_check_service import (
+    process_credit_check,
+    wait_for_pending_transactions,
+)
+
+base_data = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "date_of_birth": "2000-01-01",
+    "is_existing_customer": False,
+    "credit_card_number": "4929439557473282537",
+    "expiration_date": "2027-08",
+    "cvv": "123",
+    "credit_card_issuer": "Visa",
+}
+
+
+def check_credit(db_service: DataBaseService, **overrides) -> dict:
+    async def run() -> dict:
+        request = CreditApprovalRequest(**{**base_data, **overrides})
+        result = await process_credit_check(
+            request, db_service, RequestDeadline.from_timeout(5)
+        )
+        await wait_for_pending_transactions()
+        return result
+
+    return asyncio.run(run())
+
+
+def test_rpc_mode_takes_single_round_trip(servers):
+    """
+    Test case to check that RPC mode replaces the select and insert with one call.
+
+    Asserts:
+        - The response is an approval
+        - Only the function is called, with no separate select or insert
+        - The transaction is recorded with the card number and decision
+    """
+    primary = servers(rpc_enabled=True)
+    db_service = DataBaseService(primary.url, TEST_KEY, use_rpc=True)
+    requests_before = len(primary.requests)
+
+    assert check_credit(db_service) == {"credit_approval": "approved"}
+    assert primary.requests[requests_before:] == [
+        ("POST", "/rest/v1/rpc/check_credit_and_record_transaction")
+    ]
+    assert primary.transactions == [
+        {"card_number": "4929439557473282537", "approved?": True, "error_codes": 0}
+    ]
+
+
+def test_rpc_decision_matches_tier_rules(servers):
+    """
+    Test case to check the decision of the function at a tier boundary.
+
+    Asserts:
+        - A score of 350 with 10 years of history is approved
+        - A score of 350 with 9 years of history is denied
+    """
+    primary = servers(
+        rpc_enabled=True,
+        scores={"4929439557473282537": (350, 10), "373337942404166": (350, 9)},
+    )
+    db_service = DataBaseService(primary.url, TEST_KEY, use_rpc=True)
+
+    assert check_credit(db_service) == {"credit_approval": "approved"}
+    assert check_credit(db_service, credit_card_number="373337942404166") == {
+        "credit_approval": "denied"
+    }
+
+
+def test_card_without_score_uses_two_call_path(servers):
+    """
+    Test case to check that a card missing from credit_scores is handled by the two-call path.
+
+    Asserts:
+        - The function records nothing for the card
+        - The transaction is recorded once by the separate insert
+    """
+    primary = servers(rpc_enabled=True, scores={})
+    db_service = DataBaseService(primary.url, TEST_KEY, use_rpc=True)
+    check_credit(db_service)
+
+    assert primary.count("POST", "rpc/") == 1
+    assert primary.count("GET", "credit_scores") == 1
+    assert len(primary.transactions) == 1
+    assert db_service.use_rpc
+
+
+def test_missing_function_switches_to_two_call_path(servers):
+    """
+    Test case to check the fallback when the database function is not installed.
+
+    Asserts:
+        - The responses are still correct
+        - The function is only attempted once
+        - Every transaction is recorded
+    """
+    primary = servers(rpc_enabled=False)
+    db_service = DataBaseService(primary.url, TEST_KEY, use_rpc=True)
+
+    for _ in range(3):
+        assert check_credit(db_service) == {"credit_approval": "approved"}
+    assert not db_service.use_rpc
+    assert primary.count("POST", "rpc/") == 1
+    assert len(primary.transactions) == 3
+
+
+def test_unknown_outcome_is_not_recorded_twice(servers, monkeypatch):
+    """
+    Test case to check that a function call timing out after it was sent is not retried as two
+    calls, since the function may still record the transaction.
+
+    Asserts:
+        - The request is abandoned with a 504
+        - No separate score lookup or insert is made
+        - The transaction recorded by the function is the only one
+    """
+    monkeypatch.setenv("DB_CLIENT_TIMEOUT_SECONDS", "0.1")
+    primary = servers(rpc_enabled=True)
+    db_service = DataBaseService(primary.url, TEST_KEY, use_rpc=True)
+    primary.delay = 0.3
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_credit(db_service)
+    time.sleep(0.5)
+
+    assert exc_info.value.status_code == 504
+    assert primary.count("GET", "credit_scores") == 0
+    assert primary.count("POST", "transactions") == 0
+    assert len(primary.transactions) == 1
@@ -0,0 +1,214 @@
+"""
+This module contains a test suite for the what-if simulator of the credit approval rules.
+
+The test suite includes the following test cases:
+    - Test that the vectorized current rule set matches CreditApprovalChecker row by row
+    - Test that a stricter candidate only flips the decisions it targets
+    - Test that the approval rate deltas are reported by score tier and age band
+    - Test that a history round trips through an .npz file
+    - Test that the audit log exports a history the current rules decide as logged
+
+The test suite can be run by executing the following command:
+    - pytest test_rule_simulator.py
+
+Dependencies:
+    - datetime
+    - json
+    - numpy
+    - pytest
+    - app.interface.credit_approval_checker_interface
+    - app.interface.utility.credit_approval_utils
+    - app.model.card_validation_errors
+    - app.service.audit_log_service
+    - simulation.export_audit_log
+    - simulation.rule_simulator
+"""
+
+import datetime
+import json
+import numpy as np
+import pytest
+from app.interface.credit_approval_checker_interface import (
+    get_credit_approval_request_result,
+    get_credit_tier,
+)
+from app.interface.utility.credit_approval_utils import CreditApprovalChecker
+from app.model.card_validation_errors import CardValidationErrors
+from app.service.audit_log_service import AuditLog
+from simulation.export_audit_log import export_history
+from simulation.rule_simulator import (
+    RuleSet,
+    generate_synthetic_history,
+    load_history,
+    save_history,
+    simulate,
+)
+
+
+def test_current_rules_match_credit_approval_checker():
+    """
+    Test case to check that the compiled current rule set decides like the service.
+
+    Asserts:
+        - Every score and duration decision matches CreditApprovalChecker
+        - Existing customers are approved and requests with errors are denied
+    """
+    history = generate_synthetic_history(5000, seed=1)
+    approved = RuleSet.current().evaluate(history)
+
+    for i in range(len(approved)):
+        if history["is_existing_customer"][i]:
+            expected = True
+        elif history["has_errors"][i] or history["age_years"][i] < 18:
+            expected = False
+        else:
+            expected = (
+                CreditApprovalChecker.is_credit_score_and_credit_duration_within_approval_limits(
+                    int(history["credit_score"][i]), int(history["credit_duration"][i])
+                )
+            )
+        assert approved[i] == expected
+
+
+def test_stricter_candidate_only_flips_targeted_decisions(tmp_path):
+    """
+    Test case to check the decisions flipped by a candidate raising the poor tier's duration.
+
+    Asserts:
+        - No decision is newly approved
+        - Only poor tier requests with 10 or 11 years of history are newly denied
+    """
+    candidate_path = tmp_path / "strict_poor.json"
+    candidate_path.write_text(
+        json.dumps({"tiers": {"poor": {"range": [300, 499], "min_duration": 12}}})
+    )
+    history = generate_synthetic_history(100_000, seed=2)
+
+    report = simulate(history, [RuleSet.from_file(str(candidate_path))])
+    result = report["candidates"]["strict_poor"]
+
+    current = RuleSet.current().evaluate(history)
+    targeted = (
+        current
+        & ~history["is_existing_customer"]
+        & (history["credit_score"] <= 499)
+        & np.isin(history["credit_duration"], [10, 11])
+    )
+    assert result["newly_approved"] == 0
+    assert result["newly_denied"] == int(targeted.sum())
+
+
+def test_deltas_are_reported_by_tier_and_age_band(tmp_path):
+    """
+    Test case to check the grouping of the approval rate deltas.
+
+    Asserts:
+        - Raising the legal age only changes the rate of the 18-24 band
+        - The group sizes add up to the history
+    """
+    candidate_path = tmp_path / "legal_age_21.json"
+    candidate_path.write_text(json.dumps({"legal_age": 21}))
+    history = generate_synthetic_history(50_000, seed=3)
+
+    report = simulate(history, [RuleSet.from_file(str(candidate_path))])
+    groups = report["candidates"]["legal_age_21"]["groups"]
+
+    assert sum(group["rows"] for group in groups.values()) == report["rows"]
+    for name, group in groups.items():
+        if not name.endswith("/18-24"):
+            assert group["approval_rate_delta"] == 0
+    assert groups["exceptional/18-24"]["approval_rate_delta"] < 0
+
+
+def test_history_round_trips_through_npz(tmp_path):
+    """
+    Test case to check saving and loading a history.
+
+    Asserts:
+        - The loaded columns equal the saved ones
+        - A history missing a column is rejected
+    """
+    history = generate_synthetic_history(1000, seed=4)
+    path = tmp_path / "history.npz"
+    save_history(str(path), history)
+
+    loaded = load_history(str(path))
+    for name, column in history.items():
+        assert np.array_equal(loaded[name], column)
+
+    np.savez(tmp_path / "partial.npz", credit_score=history["credit_score"])
+    with pytest.raises(ValueError):
+        load_history(str(tmp_path / "partial.npz"))
+
+
+def test_audit_log_exports_history_decided_as_logged(tmp_path):
+    """
+    Test case to check a simulation of the history exported from the audit log.
+
+    Asserts:
+        - Every record of the audit log is exported
+        - The current rule set decides every exported request as the service logged it
+        - A candidate raising the legal age only denies the logged approvals of the young
+    """
+    today = datetime.date.today()
+    requests = [
+        (datetime.date(today.year - 40, 1, 1), False, 720, 8),
+        (datetime.date(today.year - 40, 1, 1), False, 420, 3),
+        (datetime.date(today.year - 19, 1, 1), False, 820, 5),
+        (datetime.date(today.year - 60, 1, 1), True, 350, 1),
+        (datetime.date(today.year - 30, 1, 1), False, 610, 12),
+    ]
+    audit_log = AuditLog(str(tmp_path / "audit"), flush_seconds=60)
+    approved = []
+    for index, (date_of_birth, is_existing_customer, score, duration) in enumerate(requests):
+        is_approved = get_credit_approval_request_result(
+            date_of_birth, is_existing_customer, score, duration
+        )
+        approved.append(is_approved)
+        audit_log.append(
+            f"400000000000000{index}",
+            is_approved,
+            is_existing_customer,
+            get_credit_tier(score),
+            CardValidationErrors(0),
+            score,
+            duration,
+            date_of_birth,
+        )
+    # An underage request is denied without a score, and a request with errors is denied
+    audit_log.append(
+        "4000000000000010",
+        False,
+        False,
+        "",
+        CardValidationErrors(0),
+        -1,
+        -1,
+        datetime.date(today.year - 16, 1, 1),
+    )
+    audit_log.append(
+        "1234567890123456",
+        False,
+        False,
+        "",
+        CardValidationErrors.CARD_NUMBER_LUHN,
+        -1,
+        -1,
+        datetime.date(today.year - 40, 1, 1),
+    )
+    approved += [False, False]
+    audit_log.close()
+
+    path = tmp_path / "history.npz"
+    assert export_history(str(tmp_path / "audit"), str(path)) == len(approved)
+    history = load_history(str(path))
+
+    assert RuleSet.current().evaluate(history).tolist() == approved
+
+    candidate_path = tmp_path / "legal_age_21.json"
+    candidate_path.write_text(json.dumps({"legal_age": 21}))
+    report = simulate(history, [RuleSet.from_file(str(candidate_path))])
+    assert report["rows"] == len(approved)
+    assert report["current_approval_rate"] == pytest.approx(sum(approved) / len(approved))
+    assert report["candidates"]["legal_age_21"]["newly_approved"] == 0
+    assert report["candidates"]["legal_age_21"]["newly_denied"] == int(approved[2])
@@ -0,0 +1,128 @@
+"""
+This module contains a test suite for the two-tier credit score cache. Each test runs against a
+local stand-in Redis server and stand-in PostgREST servers from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that a score read by one process is served to another from the shared L2
+    - Test that multi-key reads are pipelined into a single command
+    - Test that a slow L2 is abandoned after its timeout and skipped for a while
+    - Test that lookups fall back to the database when the L2 is down
+
+The test suite can be run by executing the following command:
+    - pytest test_score_cache.py
+
+Dependencies:
+    - asyncio
+    - socket
+    - time
+    - conftest
+    - app.service.database_service
+    - app.service.score_cache_service
+    - app.service.utility.bounded_executor
+    - app.service.utility.redis_client
+"""
+
+import asyncio
+import socket
+import time
+from conftest import TEST_KEY
+from app.service.database_service import DataBaseService
+from app.service.score_cache_service import ScoreCache
+from app.service.utility.bounded_executor import BoundedExecutor
+from app.service.utility.redis_client import RedisClient
+
+CARD_NUMBER = "4929439557473282537"
+executor = BoundedExecutor("test", max_workers=4, max_queue=4)
+
+
+def lookup(db_service: DataBaseService) -> tuple | None:
+    return asyncio.run(db_service.score_lookup.lookup(CARD_NUMBER, executor.run))
+
+
+def test_shared_l2_serves_other_processes(servers, redis_server, monkeypatch):
+    """
+    Test case to check that the L2 lets one process reuse the lookups of another.
+
+    Asserts:
+        - The first process reads the score from credit_scores and caches it
+        - The second process reads it from the L2 without querying credit_scores
+        - Its next lookup is a local hit
+    """
+    monkeypatch.setenv("SCORE_CACHE_MAX_ENTRIES", "100")
+    monkeypatch.setenv("SCORE_CACHE_L2_TIMEOUT_SECONDS", "1")
+    primary = servers(scores={CARD_NUMBER: (700, 8)})
+    redis = redis_server()
+    first = DataBaseService(primary.url, TEST_KEY, score_cache_url=redis.url)
+    second = DataBaseService(primary.url, TEST_KEY, score_cache_url=redis.url)
+
+    assert lookup(first) == (700, 8)
+    assert primary.count("GET", "card_number=eq.") == 1
+
+    assert lookup(second) == (700, 8)
+    assert lookup(second) == (700, 8)
+    assert primary.count("GET", "card_number=eq.") == 1
+    stats = second.score_cache.get_stats()
+    assert (stats["l2_hits"], stats["l1_hits"]) == (1, 1)
+    assert second.score_lookup.get_stats()["cache"]["wins"] == 2
+
+
+def test_multi_get_is_pipelined(redis_server):
+    """
+    Test case to check that reads and writes of several cards each take a single round trip.
+
+    Asserts:
+        - The writes are sent together and the reads as a single MGET
+        - Only the cached cards are returned
+    """
+    redis = redis_server()
+    scores = {"4929439557473282537": (700, 8), "373337942404166": (400, 2)}
+    ScoreCache(max_entries=0, l2=RedisClient(redis.url, timeout=1)).set_many(scores)
+    cache = ScoreCache(max_entries=0, l2=RedisClient(redis.url, timeout=1))
+
+    found = cache.get_many([*scores, "5127626881039365"])
+
+    assert found == scores
+    assert [command[0] for command in redis.commands] == [b"SET", b"SET", b"MGET"]
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_slow_l2_is_abandoned(redis_server):
+    """
+    Test case to check that a slow L2 costs at most its timeout, once.
+
+    Asserts:
+        - The read returns a miss within a fraction of the server delay
+        - The next read skips the L2 without waiting
+    """
+    redis = redis_server(delay=0.5)
+    cache = ScoreCache(l2=RedisClient(redis.url, timeout=0.02), l2_retry_seconds=60)
+
+    start = time.perf_counter()
+    assert cache.get(CARD_NUMBER) is None
+    assert cache.get(CARD_NUMBER) is None
+    assert time.perf_counter() - start < 0.25
+
+    stats = cache.get_stats()
+    assert (stats["l2_errors"], stats["l2_skipped"]) == (1, 1)
+    assert not stats["l2_available"]
+
+
+def test_lookups_fall_back_when_l2_is_down(servers):
+    """
+    Test case to check that lookups are answered by the database when the L2 is unreachable.
+
+    Asserts:
+        - The score comes from credit_scores
+        - The L2 failure is counted
+    """
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    primary = servers(scores={CARD_NUMBER: (700, 8)})
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, score_cache_url=f"redis://127.0.0.1:{port}/0"
+    )
+
+    assert lookup(db_service) == (700, 8)
+    assert db_service.score_cache.get_stats()["l2_errors"] == 1
+    assert db_service.score_lookup.get_stats()["primary"]["wins"] == 1
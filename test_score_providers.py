@@ -0,0 +1,158 @@
+"""
+This module contains a test suite for the hedged credit score lookup across score providers. Each
+test runs against local stand-in PostgREST servers from conftest.py.
+
+The test suite includes the following test cases:
+    - Test that a fast primary answers alone, without querying the other providers
+    - Test that a slow primary is hedged by the bureau, whose answer wins
+    - Test that a provider without the card hands over to the snapshot at once
+    - Test that the hedge delay follows the p95 latency of the provider
+    - Test that the random values are only used when no provider answers
+
+The test suite can be run by executing the following command:
+    - pytest test_score_providers.py
+
+Dependencies:
+    - asyncio
+    - json
+    - time
+    - conftest
+    - app.service.database_service
+    - app.service.score_provider_service
+    - app.service.utility.bounded_executor
+"""
+
+import asyncio
+import json
+import time
+from conftest import TEST_KEY
+from app.service.database_service import DataBaseService
+from app.service.score_provider_service import ScoreProvider
+from app.service.utility.bounded_executor import BoundedExecutor
+
+CARD_NUMBER = "4929439557473282537"
+executor = BoundedExecutor("test", max_workers=4, max_queue=4)
+
+
+def lookup(db_service: DataBaseService) -> tuple | None:
+    return asyncio.run(db_service.score_lookup.lookup(CARD_NUMBER, executor.run))
+
+
+def test_fast_primary_answers_alone(servers, monkeypatch):
+    """
+    Test case to check that lookups cost a single call while the primary is fast.
+
+    Asserts:
+        - The score comes from the primary
+        - The bureau is never queried
+        - The primary is credited with the win
+    """
+    monkeypatch.setenv("SCORE_HEDGE_DEFAULT_DELAY_SECONDS", "0.5")
+    primary = servers(scores={CARD_NUMBER: (700, 8)})
+    bureau = servers(scores={CARD_NUMBER: (400, 1)})
+    db_service = DataBaseService(primary.url, TEST_KEY, bureau_url=bureau.url)
+
+    assert lookup(db_service) == (700, 8)
+    assert bureau.count("GET", "credit_scores") == 0
+    stats = db_service.score_lookup.get_stats()
+    assert stats["primary"]["win_rate"] == 1.0
+    assert stats["bureau"]["calls"] == 0
+
+
+def test_slow_primary_is_hedged_by_bureau(servers, monkeypatch):
+    """
+    Test case to check that the bureau is queried in parallel once the primary is late.
+
+    Asserts:
+        - The score comes from the bureau, well before the primary would have answered
+        - Both providers were queried, and the bureau is credited with the win
+    """
+    monkeypatch.setenv("SCORE_HEDGE_DEFAULT_DELAY_SECONDS", "0.05")
+    primary = servers(scores={CARD_NUMBER: (700, 8)})
+    bureau = servers(scores={CARD_NUMBER: (400, 1)})
+    db_service = DataBaseService(primary.url, TEST_KEY, bureau_url=bureau.url)
+    primary.delay = 0.5
+
+    start = time.perf_counter()
+    assert lookup(db_service) == (400, 1)
+    assert time.perf_counter() - start < 0.4
+    assert primary.count("GET", "credit_scores") == 1
+    assert bureau.count("GET", "credit_scores") == 1
+    assert db_service.score_lookup.get_stats()["bureau"]["wins"] == 1
+
+
+def test_missing_card_hands_over_to_snapshot(servers, monkeypatch, tmp_path):
+    """
+    Test case to check that a provider without the card does not wait for the hedge delay.
+
+    Asserts:
+        - The score comes from the snapshot after the primary and bureau miss
+        - The lookup does not wait for the hedge delays
+        - The misses are counted per provider
+    """
+    monkeypatch.setenv("SCORE_HEDGE_DEFAULT_DELAY_SECONDS", "5")
+    snapshot_path = tmp_path / "scores.json"
+    snapshot_path.write_text(json.dumps({CARD_NUMBER: [650, 4]}))
+    primary = servers(scores={})
+    bureau = servers(scores={})
+    db_service = DataBaseService(
+        primary.url,
+        TEST_KEY,
+        bureau_url=bureau.url,
+        score_snapshot_path=str(snapshot_path),
+    )
+
+    start = time.perf_counter()
+    assert lookup(db_service) == (650, 4)
+    assert time.perf_counter() - start < 1
+    stats = db_service.score_lookup.get_stats()
+    assert stats["primary"]["misses"] == 1
+    assert stats["bureau"]["misses"] == 1
+    assert stats["snapshot"]["wins"] == 1
+
+
+def test_hedge_delay_follows_p95_latency():
+    """
+    Test case to check the hedge delay of a provider.
+
+    Asserts:
+        - The default delay is used until enough samples are collected
+        - The delay then follows the p95 latency of the provider
+    """
+    latencies = iter([0.001] * 19 + [0.05])
+
+    def timed_lookup(_):
+        time.sleep(next(latencies))
+        return None
+
+    provider = ScoreProvider(
+        "timed", timed_lookup, default_hedge_delay=1.0, min_samples=20
+    )
+    for _ in range(19):
+        provider.fetch(CARD_NUMBER)
+    assert provider.hedge_delay() == 1.0
+
+    provider.fetch(CARD_NUMBER)
+    assert 0.001 < provider.hedge_delay() < 0.05
+
+
+def test_random_values_only_when_no_provider_answers(servers, tmp_path):
+    """
+    Test case to check that the random values are the last resort of a score lookup.
+
+    Asserts:
+        - A failing primary is replaced by the snapshot
+        - Random values are used once the snapshot lacks the card too
+        - The failure is counted as an error of the primary
+    """
+    snapshot_path = tmp_path / "scores.json"
+    snapshot_path.write_text(json.dumps({CARD_NUMBER: [650, 4]}))
+    primary = servers(failing=True)
+    db_service = DataBaseService(
+        primary.url, TEST_KEY, score_snapshot_path=str(snapshot_path)
+    )
+    db_service.get_fallback_credit_score_and_duration = lambda: (1, 1)
+
+    assert db_service.fetch_credit_score_and_duration_from_db(CARD_NUMBER) == (650, 4)
+    assert db_service.fetch_credit_score_and_duration_from_db("123") == (1, 1)
+    assert db_service.score_lookup.get_stats()["primary"]["errors"] == 2
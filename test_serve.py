@@ -0,0 +1,89 @@
+"""
+This module contains a test suite for the production launcher of the service.
+
+The test suite includes the following test cases:
+    - Test that the CPU limit is read from cgroup v2 and cgroup v1
+    - Test that the worker count follows the available cores and the CPU limit
+    - Test that the server settings are read from the environment
+
+The test suite can be run by executing the following command:
+    - pytest test_serve.py
+
+Dependencies:
+    - os
+    - serve
+"""
+
+import os
+import serve
+
+
+def test_cgroup_cpu_limit(tmp_path):
+    """
+    Test case to check that the CPU limit is read from either cgroup version.
+
+    Asserts:
+        - A cgroup v2 quota is divided by its period, and "max" means no limit
+        - A cgroup v1 quota is divided by its period, and -1 means no limit
+        - No cgroup file means no limit
+    """
+    (tmp_path / "v2").mkdir()
+    (tmp_path / "v2" / "cpu.max").write_text("150000 100000\n")
+    assert serve.get_cgroup_cpu_limit(str(tmp_path / "v2")) == 1.5
+    (tmp_path / "v2" / "cpu.max").write_text("max 100000\n")
+    assert serve.get_cgroup_cpu_limit(str(tmp_path / "v2")) is None
+
+    (tmp_path / "v1" / "cpu").mkdir(parents=True)
+    (tmp_path / "v1" / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "v1" / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert serve.get_cgroup_cpu_limit(str(tmp_path / "v1")) == 2.0
+    (tmp_path / "v1" / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert serve.get_cgroup_cpu_limit(str(tmp_path / "v1")) is None
+
+    assert serve.get_cgroup_cpu_limit(str(tmp_path / "missing")) is None
+
+
+def test_default_worker_count(tmp_path, monkeypatch):
+    """
+    Test case to check that there is one worker per core, bounded by the CPU limit.
+
+    Asserts:
+        - Without a limit, there is one worker per core the process may run on
+        - A fractional limit is rounded up
+        - There is always at least one worker
+    """
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    assert serve.get_default_worker_count(str(tmp_path)) == 8
+
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    assert serve.get_default_worker_count(str(tmp_path)) == 3
+
+    (tmp_path / "cpu.max").write_text("10000 100000\n")
+    assert serve.get_default_worker_count(str(tmp_path)) == 1
+
+
+def test_server_options(monkeypatch):
+    """
+    Test case to check that the server settings are read from the environment.
+
+    Asserts:
+        - The address, workers, keep-alive and backlog are taken from their variables
+        - The workers are given the drain time plus time for their lifespan shutdown
+        - The trusted proxies are split into addresses and networks, local only by default
+    """
+    monkeypatch.setenv("SERVER_BIND", "127.0.0.1:9000")
+    monkeypatch.setenv("SERVER_WORKERS", "3")
+    monkeypatch.setenv("SERVER_KEEPALIVE_SECONDS", "75")
+    monkeypatch.setenv("SERVER_BACKLOG", "4096")
+    monkeypatch.setenv("SERVER_DRAIN_SECONDS", "4.5")
+    monkeypatch.setenv("SERVER_FORWARDED_ALLOW_IPS", "10.0.0.5, 10.1.0.0/16,")
+
+    options = serve.get_server_options()
+
+    assert (options["bind"], options["workers"]) == ("127.0.0.1:9000", 3)
+    assert (options["keepalive"], options["backlog"]) == (75, 4096)
+    assert options["graceful_timeout"] == 5 + serve.SHUTDOWN_SECONDS
+    assert options["forwarded_allow_ips"] == ["10.0.0.5", "10.1.0.0/16"]
+
+    monkeypatch.delenv("SERVER_FORWARDED_ALLOW_IPS")
+    assert serve.get_server_options()["forwarded_allow_ips"] == ["127.0.0.1", "::1"]
@@ -0,0 +1,159 @@
+"""
+This module contains a test suite for the application's structured, rate limited logging.
+
+The test suite includes the following test cases:
+    - Test that records are rendered as single-line JSON
+    - Test that repeated messages are suppressed after the burst
+    - Test that the suppressed count is reported in the next window
+    - Test that distinct messages are rate limited independently
+    - Test that suppressed counts are reported when the message does not recur
+    - Test that the pending suppressed counts are written on shutdown
+
+The test suite can be run by executing the following command:
+    - pytest test_structured_logging.py
+
+Dependencies:
+    - atexit
+    - io
+    - json
+    - logging
+    - sys
+    - app
+    - app.service.utility.structured_logging
+"""
+
+import atexit
+import io
+import json
+import logging
+import sys
+import app
+from app.service.utility.structured_logging import JsonFormatter, RateLimitFilter
+
+
+def make_record(msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord("app", logging.ERROR, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_renders_single_line():
+    """
+    Test case to check the JSON rendering of a record.
+
+    Asserts:
+        - The output is a single line of JSON
+        - The message is formatted with its arguments
+        - The level and suppressed count are included
+    """
+    record = make_record("Failed to record transaction: %s", "timeout")
+    record.suppressed = 3
+    output = JsonFormatter().format(record)
+    entry = json.loads(output)
+    assert "\n" not in output
+    assert entry["message"] == "Failed to record transaction: timeout"
+    assert entry["level"] == "ERROR"
+    assert entry["suppressed"] == 3
+
+
+def test_repeated_messages_are_suppressed_after_burst():
+    """
+    Test case to check that a message is only let through `burst` times per window.
+
+    Asserts:
+        - The first three records are let through
+        - The following records are suppressed
+    """
+    rate_limit = RateLimitFilter(burst=3, window_seconds=60)
+    results = [rate_limit.filter(make_record("Failed to fetch")) for _ in range(10)]
+    assert results == [True] * 3 + [False] * 7
+
+
+def test_suppressed_count_is_reported_in_next_window():
+    """
+    Test case to check that the suppressed count is carried to the next window.
+
+    Asserts:
+        - The first record of the next window is let through
+        - It carries the number of suppressed records
+    """
+    rate_limit = RateLimitFilter(burst=1, window_seconds=0)
+    rate_limit.window_seconds = 60
+    for _ in range(5):
+        rate_limit.filter(make_record("Failed to fetch"))
+    rate_limit.window_seconds = 0
+    record = make_record("Failed to fetch")
+    assert rate_limit.filter(record)
+    assert record.suppressed == 4
+
+
+def test_distinct_messages_are_limited_independently():
+    """
+    Test case to check that rate limiting is per message template.
+
+    Asserts:
+        - A different template is let through while the first is suppressed
+        - Different arguments to the same template share the limit
+    """
+    rate_limit = RateLimitFilter(burst=1, window_seconds=60)
+    assert rate_limit.filter(make_record("Failed to record transaction: %s", "a"))
+    assert not rate_limit.filter(make_record("Failed to record transaction: %s", "b"))
+    assert rate_limit.filter(make_record("Failed to fetch"))
+
+
+def test_suppressed_count_is_flushed_without_recurrence():
+    """
+    Test case to check that suppressed counts are not lost when the message stops or is evicted.
+
+    Asserts:
+        - Flushing an open window reports nothing unless forced
+        - A closed window is reported in a summary record carrying its suppressed count
+        - A message evicted to make room for a new one has its count reported
+    """
+    summaries: list[logging.LogRecord] = []
+    rate_limit = RateLimitFilter(
+        burst=1, window_seconds=60, max_tracked_messages=1, report=summaries.append
+    )
+    for _ in range(4):
+        rate_limit.filter(make_record("Failed to fetch"))
+    rate_limit.flush()
+    assert summaries == []
+
+    assert rate_limit.filter(make_record("Failed to record"))
+    assert [summary.suppressed for summary in summaries] == [3]
+    assert summaries[0].getMessage() == "3 records suppressed: Failed to fetch"
+
+    rate_limit.filter(make_record("Failed to record"))
+    rate_limit.window_seconds = 0
+    rate_limit.flush()
+    assert [summary.suppressed for summary in summaries] == [3, 1]
+
+
+def test_pending_suppressed_counts_are_written_on_shutdown(monkeypatch):
+    """
+    Test case to check the exit handler registered by init_logging.
+
+    Asserts:
+        - The suppressed count of an open window is written before the writer stops
+    """
+    exit_handlers = []
+    stderr = io.StringIO()
+    root_logger = logging.getLogger()
+    monkeypatch.setattr(atexit, "register", exit_handlers.append)
+    monkeypatch.setattr(sys, "stderr", stderr)
+    monkeypatch.setattr(app, "_log_listener", None)
+    monkeypatch.setattr(app, "_log_rate_limit", None)
+    monkeypatch.setattr(root_logger, "handlers", root_logger.handlers)
+    monkeypatch.setenv("LOG_LEVEL", logging.getLevelName(root_logger.level))
+    monkeypatch.setenv("LOG_RATE_LIMIT_BURST", "1")
+    monkeypatch.setenv("LOG_RATE_LIMIT_WINDOW_SECONDS", "60")
+
+    app.init_logging()
+    for _ in range(4):
+        logging.getLogger("app").error("Failed to fetch")
+    assert exit_handlers == [app.stop_logging]
+    app.stop_logging()
+
+    lines = [json.loads(line) for line in stderr.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == [
+        "Failed to fetch",
+        "3 records suppressed: Failed to fetch",
+    ]
@@ -0,0 +1,195 @@
+"""
+This module contains a test suite for the capture of sampled /check_credit requests and their
+replay.
+
+The test suite includes the following test cases:
+    - Test that card tokens are stable and keep the length and Luhn validity of the card
+    - Test that sampled requests are written tokenized to rotating capture files
+    - Test that unsampled and other requests are not captured
+    - Test that captured requests are replayed in order with their original timing
+
+The test suite can be run by executing the following command:
+    - pytest test_traffic_capture.py
+
+Dependencies:
+    - asyncio
+    - json
+    - httpx
+    - app.interface.utility.credit_validation_utils
+    - app.service.traffic_capture_service
+    - benchmarks.replay_traffic
+"""
+
+import asyncio
+import json
+import httpx
+from app.interface.utility.credit_validation_utils import CreditCardValidator
+from app.service.traffic_capture_service import TrafficCapture, TrafficCaptureMiddleware
+from benchmarks.replay_traffic import read_capture, replay
+
+FORM = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "date_of_birth": "2000-01-01",
+    "is_existing_customer": "false",
+    "credit_card_number": "4929439557473282537",
+    "expiration_date": "2027-08",
+    "cvv": "123",
+    "credit_card_issuer": "Visa",
+}
+
+
+async def echo_app(scope, receive, send):
+    """An ASGI application reading the whole body and answering 200."""
+    more_body = True
+    while more_body:
+        message = await receive()
+        more_body = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def post_all(asgi_app, requests: list[tuple[str, dict, dict]]) -> None:
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for path, form, headers in requests:
+            await client.post(path, data=form, headers=headers)
+
+
+def read_lines(tmp_path) -> list[dict]:
+    return [
+        json.loads(line)
+        for path in sorted(tmp_path.glob("*.jsonl"))
+        for line in path.read_text().splitlines()
+    ]
+
+
+def test_card_tokens(tmp_path):
+    """
+    Test case to check the tokens of the card numbers.
+
+    Asserts:
+        - The same card always gets the same token, and other keys other tokens
+        - A token keeps the length of the card and differs from it
+        - A token passes the Luhn check exactly when the card does
+    """
+    capture = TrafficCapture(str(tmp_path), 1.0, token_key=b"key")
+    other_capture = TrafficCapture(str(tmp_path), 1.0, token_key=b"other key")
+
+    for card_number in ("4929439557473282537", "373337942404166", "1234567890123456"):
+        token = capture.tokenize_card_number(card_number)
+        assert token == capture.tokenize_card_number(card_number)
+        assert token != other_capture.tokenize_card_number(card_number)
+        assert len(token) == len(card_number) and token != card_number
+        assert CreditCardValidator.get_luhn_validation_errors(token) == (
+            CreditCardValidator.get_luhn_validation_errors(card_number)
+        )
+    capture.close()
+    other_capture.close()
+
+
+def test_sampled_requests_are_captured(tmp_path):
+    """
+    Test case to check that sampled requests are written tokenized to rotating files.
+
+    Asserts:
+        - Every request is written with its timestamp, in arrival order
+        - The card number and API key are tokenized, the CVV zeroed and the names redacted
+        - The other fields and the request timeout are kept
+        - A new file is started once the current one is full
+    """
+    capture = TrafficCapture(str(tmp_path), 1.0, token_key=b"key", max_file_bytes=100)
+    asyncio.run(
+        post_all(
+            TrafficCaptureMiddleware(echo_app, capture),
+            [
+                ("/check_credit", FORM, {"X-API-Key": "client", "X-Request-Timeout": "2"}),
+                ("/check_credit", FORM, {}),
+            ],
+        )
+    )
+    capture.close()
+
+    records = read_lines(tmp_path)
+    assert len(records) == 2
+    assert records[0]["timestamp"] <= records[1]["timestamp"]
+    form = records[0]["form"]
+    assert form["credit_card_number"] == capture.tokenize_card_number(FORM["credit_card_number"])
+    assert (form["cvv"], form["first_name"], form["last_name"]) == ("000", "redacted", "redacted")
+    assert form["date_of_birth"] == FORM["date_of_birth"]
+    assert records[0]["headers"]["x-request-timeout"] == "2"
+    assert records[0]["headers"]["x-api-key"] != "client"
+    assert capture.get_stats()["files"] == 2
+
+
+def test_other_requests_are_not_captured(tmp_path):
+    """
+    Test case to check that only sampled URL-encoded credit check requests are captured, once.
+
+    Asserts:
+        - Unsampled requests, other paths and multipart forms are not captured
+        - A request passing through two capture middlewares is captured once
+    """
+    unsampled = TrafficCapture(str(tmp_path / "unsampled"), 0.0, token_key=b"key")
+    asyncio.run(
+        post_all(TrafficCaptureMiddleware(echo_app, unsampled), [("/check_credit", FORM, {})])
+    )
+    unsampled.close()
+    assert unsampled.get_stats()["captured"] == 0
+
+    capture = TrafficCapture(str(tmp_path / "sampled"), 1.0, token_key=b"key")
+    asyncio.run(
+        post_all(
+            TrafficCaptureMiddleware(TrafficCaptureMiddleware(echo_app, capture), capture),
+            [("/stats", FORM, {}), ("/check_credit", FORM, {})],
+        )
+    )
+    transport = httpx.ASGITransport(app=TrafficCaptureMiddleware(echo_app, capture))
+
+    async def post_multipart() -> None:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/check_credit", files={"cvv": (None, "123")})
+
+    asyncio.run(post_multipart())
+    capture.close()
+    assert capture.get_stats()["captured"] == 1
+
+
+def test_replay_keeps_the_timing(tmp_path):
+    """
+    Test case to check that captured requests are replayed in order on their original schedule.
+
+    Asserts:
+        - Every request is replayed with its form and headers
+        - The requests are spaced as captured, divided by the speed-up
+    """
+    for index, name in enumerate(("b", "a")):
+        (tmp_path / f"{name}.jsonl").write_text(
+            json.dumps(
+                {
+                    "timestamp": 1000.0 + index * 0.4,
+                    "headers": {"x-request-timeout": str(index + 1)},
+                    "form": {**FORM, "cvv": "000"},
+                }
+            )
+            + "\n"
+        )
+    received: list[tuple[float, str]] = []
+
+    async def recording_app(scope, receive, send):
+        timeout = dict(scope["headers"])[b"x-request-timeout"].decode()
+        received.append((asyncio.get_running_loop().time(), timeout))
+        await echo_app(scope, receive, send)
+
+    report = asyncio.run(
+        replay(
+            read_capture(str(tmp_path)),
+            "http://test",
+            speed=2.0,
+            transport=httpx.ASGITransport(app=recording_app),
+        )
+    )
+
+    assert report["requests"] == 2 and report["statuses"] == {"200": 2}
+    assert [timeout for _, timeout in received] == ["1", "2"]
+    assert 0.15 < received[1][0] - received[0][0] < 0.35
@@ -0,0 +1,156 @@
+"""
+This module contains a test suite for the transaction history lookup and export. Each test starts
+a local stand-in PostgREST server, from conftest.py, holding the recorded transactions.
+
+The test suite includes the following test cases:
+    - Test that the history of a card is paged by cursor without gaps or duplicates
+    - Test that the first page of a card's history is cached
+    - Test that exports stream the transactions of a range page by page as NDJSON and CSV
+    - Test that requests without the admin token are rejected
+
+The test suite can be run by executing the following command:
+    - pytest test_transaction_history.py
+
+Dependencies:
+    - csv
+    - datetime
+    - json
+    - pytest
+    - fastapi
+    - conftest
+    - app.service.database_service
+    - app.service.transaction_history_service
+"""
+
+import csv
+import datetime
+import json
+import pytest
+from fastapi import HTTPException
+from conftest import TEST_KEY
+from app.service.database_service import DataBaseService
+from app.service.transaction_history_service import TransactionHistory
+
+ADMIN_TOKEN = "admin-token"
+
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Three transactions per second, so that pages end between transactions sharing a timestamp
+HISTORY = [
+    {
+        "id": row_id,
+        "created_at": (START + datetime.timedelta(seconds=row_id // 3)).isoformat(),
+        "card_number": "4111" if row_id % 2 else "5500",
+        "approved?": row_id % 5 != 0,
+        "error_codes": 32 if row_id % 5 == 0 else 0,
+    }
+    for row_id in range(1, 61)
+]
+
+
+def create_history(server, **kwargs) -> TransactionHistory:
+    db_service = DataBaseService(server.url, TEST_KEY)
+    return TransactionHistory(
+        db_service.query_card_transactions,
+        db_service.query_transactions_in_range,
+        ADMIN_TOKEN,
+        **kwargs,
+    )
+
+
+def test_card_history_is_paged_by_cursor(servers):
+    """
+    Test case to check the keyset pagination of a card's history.
+
+    Asserts:
+        - Pages hold the card's transactions only, newest first, without gaps or duplicates
+        - The last page has no next cursor
+        - An invalid cursor is rejected with 400
+    """
+    history = create_history(servers(history=HISTORY), cache_max_entries=0)
+
+    seen, cursor = [], None
+    while True:
+        page = history.get_card_history("4111", 7, cursor)
+        seen.extend(row["id"] for row in page["transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [row["id"] for row in reversed(HISTORY) if row["card_number"] == "4111"]
+    with pytest.raises(HTTPException) as e:
+        history.get_card_history("4111", 7, "not-a-cursor")
+    assert e.value.status_code == 400
+
+
+def test_first_page_is_cached(servers):
+    """
+    Test case to check the cache of the recent history of a card.
+
+    Asserts:
+        - A repeated lookup of the first page does not query the database
+        - Following pages are not cached
+        - The lookups and cache hits are counted
+    """
+    server = servers(history=HISTORY)
+    history = create_history(server, cache_ttl_seconds=60)
+    queries = server.count("GET", "transactions")
+
+    first = history.get_card_history("5500", 10)
+    assert history.get_card_history("5500", 10) == first
+    history.get_card_history("5500", 10, first["next_cursor"])
+    history.get_card_history("5500", 10, first["next_cursor"])
+
+    assert server.count("GET", "transactions") - queries == 3
+    stats = history.get_stats()
+    assert stats["card_lookups"] == 4 and stats["cache_hits"] == 1
+
+
+def test_export_streams_the_range(servers):
+    """
+    Test case to check the export of the transactions of a time range.
+
+    Asserts:
+        - The export holds the transactions of [start, end) only, oldest first
+        - The export is queried one page at a time and yields one chunk per page
+        - The CSV export has a header row and the same transactions
+        - An empty range is rejected with 400
+    """
+    server = servers(history=HISTORY)
+    history = create_history(server, export_page_size=4)
+    start, end = START + datetime.timedelta(seconds=2), START + datetime.timedelta(seconds=10)
+    expected = [row for row in HISTORY if 6 <= row["id"] < 30]
+    queries = server.count("GET", "transactions")
+
+    chunks = list(history.export_transactions(start, end))
+    assert [json.loads(line) for line in "".join(chunks).splitlines()] == expected
+    assert len(chunks) == 6
+    assert server.count("GET", "transactions") - queries == 7
+
+    csv_export = "".join(history.export_transactions(start, end, "csv"))
+    rows = list(csv.DictReader(csv_export.splitlines()))
+    assert [int(row["id"]) for row in rows] == [row["id"] for row in expected]
+    assert rows[0]["approved?"] == "True" and rows[4]["error_codes"] == "32"
+
+    with pytest.raises(HTTPException) as e:
+        history.export_transactions(end, start)
+    assert e.value.status_code == 400
+    assert history.get_stats()["exported_transactions"] == 2 * len(expected)
+
+
+def test_admin_token_is_required(servers):
+    """
+    Test case to check the admin token of the transaction history requests.
+
+    Asserts:
+        - The admin token is accepted
+        - A missing or wrong token is rejected with 401, and counted
+    """
+    history = create_history(servers(history=HISTORY))
+
+    history.authorize(ADMIN_TOKEN)
+    for token in (None, "", "wrong-token", ADMIN_TOKEN + "x"):
+        with pytest.raises(HTTPException) as e:
+            history.authorize(token)
+        assert e.value.status_code == 401
+    assert history.get_stats()["unauthorized"] == 4
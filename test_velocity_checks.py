@@ -0,0 +1,149 @@
+"""
+This module contains a test suite for the in-memory velocity checks of the credit card numbers.
+
+The test suite includes the following test cases:
+    - Test that each window's limit is enforced and attempts leave the window
+    - Test that the running totals of the windows match a full count of the attempts
+    - Test that idle cards expire and the table is bounded
+    - Test that the credit check pipeline denies or flags a card exceeding a limit
+
+The test suite can be run by executing the following command:
+    - pytest test_velocity_checks.py
+
+Dependencies:
+    - asyncio
+    - random
+    - conftest
+    - app.model.credit_approval_request
+    - app.model.request_deadline
+    - app.service.database_service
+    - app.service.velocity_check_service
+    - app.service.credit_check_service
+"""
+
+import asyncio
+import random
+from conftest import TEST_KEY
+from app.model.credit_approval_request import CreditApprovalRequest
+from app.model.request_deadline import RequestDeadline
+from app.service.database_service import DataBaseService
+from app.service.velocity_check_service import VelocityChecker
+from app.service import credit_check_service
+
+
+def test_limits_are_enforced_per_window():
+    """
+    Test case to check that a card is reported once it exceeds the limit of a window.
+
+    Asserts:
+        - Attempts up to the limit are allowed
+        - The shortest exceeded window is reported
+        - Attempts leaving the short window are no longer counted in it
+        - The long window still counts them
+        - Other cards are counted separately
+    """
+    checker = VelocityChecker([(60, 2), (3600, 3)], bucket_seconds=1)
+
+    assert checker.check("4929439557473282537", now=0.5) is None
+    assert checker.check("4929439557473282537", now=10.5) is None
+    assert checker.check("4929439557473282537", now=20.5) == "60s"
+    assert checker.check("373337942404166", now=20.5) is None
+    assert checker.check("4929439557473282537", now=75.5) == "3600s"
+    assert checker.check("4929439557473282537", now=3700.5) is None
+    assert checker.get_stats()["exceeded"] == {"60s": 1, "3600s": 1}
+
+
+def test_running_totals_match_full_count():
+    """
+    Test case to check the running totals of the windows against counting every attempt.
+
+    Asserts:
+        - Each check reports the window a full count of the attempts in it reports
+    """
+    limits = [(5, 3), (20, 8), (60, 20)]
+    checker = VelocityChecker(limits, bucket_seconds=1)
+    buckets: list[int] = []
+    for now in sorted(random.Random(7).uniform(0, 300) for _ in range(600)):
+        buckets.append(int(now))
+        expected = next(
+            (
+                f"{seconds}s"
+                for seconds, max_attempts in limits
+                if sum(1 for bucket in buckets if bucket > int(now) - seconds) > max_attempts
+            ),
+            None,
+        )
+        assert checker.check("4929439557473282537", now=now) == expected
+
+
+def test_cards_expire_and_table_is_bounded():
+    """
+    Test case to check that the card table expires idle cards and keeps a bounded size.
+
+    Asserts:
+        - The least recently seen card is evicted when the table is full
+        - Cards idle for longer than the longest window expire
+        - The memory usage is reported
+        - Without limits, no card is tracked
+    """
+    checker = VelocityChecker([(60, 5)], bucket_seconds=1, max_tracked_cards=2)
+    checker.check("4929439557473282537", now=0.5)
+    checker.check("373337942404166", now=1.5)
+    checker.check("5127626881039365", now=2.5)
+
+    stats = checker.get_stats()
+    assert stats["tracked_cards"] == 2
+    assert stats["evicted_cards"] == 1
+    assert stats["memory_bytes"] > 0
+
+    checker.check("5127626881039365", now=62.0)
+    assert checker.get_stats()["tracked_cards"] == 1
+
+    checker = VelocityChecker([])
+    assert checker.check("4929439557473282537") is None
+    assert checker.get_stats()["tracked_cards"] == 0
+
+
+def test_pipeline_denies_or_flags_fast_cards(servers, monkeypatch):
+    """
+    Test case to check that process_credit_check applies the velocity checks.
+
+    Asserts:
+        - An existing customer exceeding the limit is denied without a score lookup
+        - With VELOCITY_ACTION set to "flag", the request is decided as usual and counted
+    """
+    monkeypatch.setattr(
+        credit_check_service, "_velocity_checker", VelocityChecker([(60, 1)])
+    )
+    primary = servers()
+    db_service = DataBaseService(primary.url, TEST_KEY)
+    request = CreditApprovalRequest(
+        first_name="John",
+        last_name="Doe",
+        date_of_birth="2000-01-01",
+        is_existing_customer=True,
+        credit_card_number="4929439557473282537",
+        expiration_date="2027-08",
+        cvv="123",
+        credit_card_issuer="Visa",
+    )
+
+    async def check_credit() -> dict:
+        try:
+            return await credit_check_service.process_credit_check(
+                request, db_service, RequestDeadline.from_timeout(5)
+            )
+        finally:
+            await credit_check_service.wait_for_pending_transactions()
+
+    counters_before = credit_check_service.get_pipeline_stats()
+    assert asyncio.run(check_credit()) == {"credit_approval": "approved"}
+    assert asyncio.run(check_credit()) == {"credit_approval": "denied"}
+
+    monkeypatch.setenv("VELOCITY_ACTION", "flag")
+    assert asyncio.run(check_credit()) == {"credit_approval": "approved"}
+
+    counters = credit_check_service.get_pipeline_stats()
+    for name in ("score_fetches_avoided_velocity_limit", "velocity_flags"):
+        assert counters[name] == counters_before.get(name, 0) + 1
+    assert credit_check_service.get_velocity_stats()["exceeded"] == {"60s": 2}